@@ -4,196 +4,207 @@ from __future__ import annotations
 
 import asyncio
 import time
-from collections.abc import Awaitable, Callable
+from collections import deque
+from collections.abc import Awaitable, Callable, Sequence
 from dataclasses import dataclass
+from typing import Any
+
+from prometheus_client import Counter, Histogram
 
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+BATCH_QUEUE_WAIT = Histogram(
+    "embeddings_batch_queue_wait_seconds",
+    "Time an embedding request waited in the batch queue before dispatch",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+BATCH_FILL_RATIO = Histogram(
+    "embeddings_batch_fill_ratio",
+    "Unique texts per dispatched batch divided by batch_size",
+    buckets=(0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0, 1.5, 2.0),
+)
+BATCH_FLUSHES = Counter(
+    "embeddings_batch_flushes_total", "Dispatched embedding batches", labelnames=("trigger",)
+)
+BATCH_DEDUPED_TEXTS = Counter(
+    "embeddings_batch_deduplicated_texts_total",
+    "Texts dropped from a batch because another request asked for the same text",
+)
+
 
 @dataclass
-class BatchRequest:
+class BatchRequest[T]:
     """A single embedding request within a batch."""
 
     texts: list[str]
-    future: asyncio.Future[list[list[float]]]
+    future: asyncio.Future[list[T]]
     timestamp: float
 
 
-class DynamicBatchProcessor:
+class DynamicBatchProcessor[T]:
     """
     Collects embedding requests and batches them together to reduce API calls.
 
-    This processor waits for a short time (batch_wait_ms) to collect multiple
-    requests before sending them as a single batch to the embedding service.
+    A batch is dispatched as soon as ``batch_size`` texts are queued, or when the oldest
+    queued request has waited ``batch_wait_ms``. Up to ``max_concurrency`` batches run at
+    once, identical texts within a batch are embedded once, and callers wait for queue
+    space when ``max_queue_size`` requests are already pending.
     """
 
     def __init__(
         self,
-        embed_fn: Callable[[list[str]], Awaitable[list[list[float]]]],
+        embed_fn: Callable[[list[str]], Awaitable[Sequence[T]]],
         batch_size: int = 128,
         batch_wait_ms: int = 50,
         max_queue_size: int = 1000,
+        max_concurrency: int = 3,
     ) -> None:
         self._embed_fn = embed_fn
-        self._batch_size = batch_size
+        self._batch_size = max(1, batch_size)
         self._batch_wait_ms = batch_wait_ms / 1000.0
-        self._max_queue_size = max_queue_size
-
-        self._queue: list[BatchRequest] = []
-        self._queue_lock = asyncio.Lock()
+        self._max_queue_size = max(1, max_queue_size)
+
+        self._queue: deque[BatchRequest[T]] = deque()
+        self._queued_texts = 0
+        self._slots = asyncio.Semaphore(self._max_queue_size)
+        self._inflight = asyncio.Semaphore(max(1, max_concurrency))
+        self._wakeup = asyncio.Event()
+        self._batch_tasks: set[asyncio.Task[None]] = set()
         self._processor_task: asyncio.Task[None] | None = None
         self._shutdown = False
 
     async def start(self) -> None:
         """Start the batch processor."""
         if self._processor_task is None:
+            self._shutdown = False
             self._processor_task = asyncio.create_task(self._process_batches())
 
     async def stop(self) -> None:
-        """Stop the batch processor."""
+        """Stop the batch processor after dispatching everything already queued."""
         self._shutdown = True
+        self._wakeup.set()
         if self._processor_task:
             try:
                 await self._processor_task
             except asyncio.CancelledError:
                 pass
             self._processor_task = None
+        if self._batch_tasks:
+            await asyncio.gather(*self._batch_tasks, return_exceptions=True)
 
-    async def embed(self, texts: list[str]) -> list[list[float]]:
+    async def embed(self, texts: list[str]) -> list[T]:
         """Request embeddings for texts, will be batched with other concurrent requests."""
-        if self._shutdown:
-
-            return await self._embed_fn(texts)
-
-        future: asyncio.Future[list[list[float]]] = asyncio.Future()
-        request = BatchRequest(texts=texts, future=future, timestamp=time.time())
-
-        async with self._queue_lock:
-            if len(self._queue) >= self._max_queue_size:
-
-                await self._process_immediate_batch()
-            self._queue.append(request)
+        if self._shutdown or self._processor_task is None:
+            return list(await self._embed_fn(texts))
+        if not texts:
+            return []
 
+        await self._slots.acquire()
+        future: asyncio.Future[list[T]] = asyncio.get_running_loop().create_future()
+        self._queue.append(BatchRequest(texts=texts, future=future, timestamp=time.monotonic()))
+        self._queued_texts += len(texts)
+        self._wakeup.set()
         return await future
 
     async def _process_batches(self) -> None:
-        """Main processing loop that batches and sends requests."""
-        while not self._shutdown:
+        """Scheduler loop: wait for a full batch or the oldest deadline, then dispatch."""
+        while True:
             try:
-                await asyncio.sleep(self._batch_wait_ms)
-                await self._process_queued_requests()
+                if not self._queue:
+                    if self._shutdown:
+                        return
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+                trigger = "size"
+                if self._queued_texts < self._batch_size and not self._shutdown:
+                    timeout = self._queue[0].timestamp + self._batch_wait_ms - time.monotonic()
+                    if timeout > 0:
+                        self._wakeup.clear()
+                        try:
+                            await asyncio.wait_for(self._wakeup.wait(), timeout)
+                        except TimeoutError:
+                            pass
+                        continue
+                    trigger = "deadline"
+                elif self._shutdown:
+                    trigger = "shutdown"
+                await self._inflight.acquire()
+                batch = self._take_batch()
+                BATCH_FLUSHES.labels(trigger=trigger).inc()
+                task = asyncio.create_task(self._run_batch(batch))
+                self._batch_tasks.add(task)
+                task.add_done_callback(self._on_batch_done)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 logger.error(f"Error in batch processor: {e}")
 
-    async def _process_queued_requests(self) -> None:
-        """Process all queued requests by batching them."""
-        async with self._queue_lock:
-            if not self._queue:
-                return
-
-            requests = self._queue.copy()
-            self._queue.clear()
-
-        batches = self._create_batches(requests)
-
-        for batch in batches:
-            try:
-                await self._process_batch(batch)
-            except Exception as e:
-                logger.error(f"Error processing batch: {e}")
-
-                for request in batch:
-                    if not request.future.done():
-                        request.future.set_exception(e)
-
-    async def _process_immediate_batch(self) -> None:
-        """Process a batch immediately when queue is full."""
-        if not self._queue:
-            return
-
-        batch_requests = self._queue[: self._batch_size]
-        self._queue = self._queue[self._batch_size :]
-
+    def _on_batch_done(self, task: asyncio.Task[None]) -> None:
+        self._batch_tasks.discard(task)
+        self._inflight.release()
+
+    def _take_batch(self) -> list[BatchRequest[T]]:
+        """Pop whole requests from the queue until the next one would overflow the batch."""
+        batch: list[BatchRequest[T]] = []
+        size = 0
+        now = time.monotonic()
+        while self._queue:
+            n = len(self._queue[0].texts)
+            if batch and size + n > self._batch_size:
+                break
+            request = self._queue.popleft()
+            self._queued_texts -= n
+            self._slots.release()
+            BATCH_QUEUE_WAIT.observe(now - request.timestamp)
+            batch.append(request)
+            size += n
+        return batch
+
+    async def _run_batch(self, requests: list[BatchRequest[T]]) -> None:
         try:
-            await self._process_batch(batch_requests)
+            await self._process_batch(requests)
         except Exception as e:
-            logger.error(f"Error processing immediate batch: {e}")
-            for request in batch_requests:
+            logger.error(f"Error processing batch: {e}")
+            for request in requests:
                 if not request.future.done():
                     request.future.set_exception(e)
 
-    def _create_batches(self, requests: list[BatchRequest]) -> list[list[BatchRequest]]:
-        """Group requests into optimal batches."""
-        if not requests:
-            return []
-
-        batches: list[list[BatchRequest]] = []
-        current_batch: list[BatchRequest] = []
-        current_batch_size = 0
-
-        for request in requests:
-            text_count = len(request.texts)
-
-            if current_batch and current_batch_size + text_count > self._batch_size:
-                batches.append(current_batch)
-                current_batch = []
-                current_batch_size = 0
-
-            current_batch.append(request)
-            current_batch_size += text_count
-
-        if current_batch:
-            batches.append(current_batch)
-
-        return batches
-
-    async def _process_batch(self, requests: list[BatchRequest]) -> None:
-        """Process a batch of requests by combining all texts and distributing results."""
+    async def _process_batch(self, requests: list[BatchRequest[T]]) -> None:
+        """Embed the unique texts of a batch once and hand each request its own slice."""
         if not requests:
             return
 
-        all_texts: list[str] = []
-        request_indices: list[tuple[int, int]] = []
+        total = sum(len(r.texts) for r in requests)
+        unique = list(dict.fromkeys(t for r in requests for t in r.texts))
+        if len(unique) < total:
+            BATCH_DEDUPED_TEXTS.inc(total - len(unique))
+        BATCH_FILL_RATIO.observe(len(unique) / self._batch_size)
 
+        embeddings = await self._embed_fn(unique)
+        # The embed function returns one vector per text or raises (for example
+        # EmbeddingsIncompleteError); a length mismatch fails every request of the batch.
+        by_text = dict(zip(unique, embeddings, strict=True))
         for request in requests:
-            start_idx = len(all_texts)
-            all_texts.extend(request.texts)
-            end_idx = len(all_texts)
-            request_indices.append((start_idx, end_idx))
-
-        if not all_texts:
-            for request in requests:
-                if not request.future.done():
-                    request.future.set_result([])
-            return
-
-        try:
-            all_embeddings = await self._embed_fn(all_texts)
-
-            for request, (start_idx, end_idx) in zip(requests, request_indices, strict=False):
-                if not request.future.done():
-                    request_embeddings = all_embeddings[start_idx:end_idx]
-                    request.future.set_result(request_embeddings)
-
-        except Exception as e:
-
-            for request in requests:
-                if not request.future.done():
-                    request.future.set_exception(e)
+            if not request.future.done():
+                request.future.set_result([by_text[t] for t in request.texts])
 
 
-_batch_processor: DynamicBatchProcessor | None = None
+_batch_processor: DynamicBatchProcessor[Any] | None = None
 
 
-def get_batch_processor(
-    embed_fn: Callable[[list[str]], Awaitable[list[list[float]]]],
+def get_batch_processor[T](
+    embed_fn: Callable[[list[str]], Awaitable[Sequence[T]]],
     batch_size: int = 128,
     batch_wait_ms: int = 50,
-) -> DynamicBatchProcessor:
+    max_concurrency: int = 3,
+) -> DynamicBatchProcessor[Any]:
     """Get or create a global batch processor instance."""
     global _batch_processor
     if _batch_processor is None:
-        _batch_processor = DynamicBatchProcessor(embed_fn, batch_size, batch_wait_ms)
+        _batch_processor = DynamicBatchProcessor(
+            embed_fn, batch_size, batch_wait_ms, max_concurrency=max_concurrency
+        )
     return _batch_processor
@@ -4,8 +4,12 @@ import asyncio
 import hashlib
 import json
 import re
+from collections.abc import Mapping, Sequence
 from typing import Any
 
+import numpy as np
+from numpy.typing import NDArray
+
 from app.core.logging import get_logger
 
 try:
@@ -15,6 +19,30 @@ except Exception:  # noqa: BLE001
 
 logger = get_logger(__name__)
 
+# Redis values are a one-byte dtype tag followed by the raw little-endian vector.
+# Legacy entries are JSON arrays and start with "[".
+_TAG_F32 = b"\x01"
+_TAG_F16 = b"\x02"
+_DTYPES: dict[str, tuple[bytes, np.dtype[Any]]] = {
+    "float32": (_TAG_F32, np.dtype("<f4")),
+    "float16": (_TAG_F16, np.dtype("<f2")),
+}
+_BY_TAG = {tag: dtype for tag, dtype in _DTYPES.values()}
+
+
+def pack_vector(vec: Sequence[float] | NDArray[Any], dtype: str = "float32") -> bytes:
+    tag, np_dtype = _DTYPES[dtype]
+    return tag + np.asarray(vec, dtype=np_dtype).tobytes()
+
+
+def unpack_vector(raw: bytes | str) -> NDArray[np.float32]:
+    if isinstance(raw, str):
+        return np.asarray(json.loads(raw), dtype=np.float32)
+    np_dtype = _BY_TAG.get(raw[:1])
+    if np_dtype is None:
+        return np.asarray(json.loads(raw), dtype=np.float32)
+    return np.frombuffer(raw, dtype=np_dtype, offset=1).astype(np.float32)
+
 
 _normalize_re = re.compile(r"\s+")
 
@@ -34,43 +62,46 @@ def normkey(text: str) -> str:
 
 
 class RedisCache:
-    def __init__(self, url: str, ttl_seconds: int) -> None:
+    def __init__(self, url: str, ttl_seconds: int, dtype: str = "float32") -> None:
         if Redis is None:
             logger.error("Redis client not available, cannot initialize cache")
             raise RuntimeError("redis missing")
-        logger.info("Initializing Redis cache", url=url, ttl_seconds=ttl_seconds)
+        if dtype not in _DTYPES:
+            raise ValueError(f"unsupported embedding dtype: {dtype}")
+        logger.info("Initializing Redis cache", url=url, ttl_seconds=ttl_seconds, dtype=dtype)
         self._r = Redis.from_url(url, decode_responses=False)
         self._ttl = ttl_seconds
+        self._dtype = dtype
         self._lock = asyncio.Lock()
 
-    async def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+    async def get_many(self, keys: list[str]) -> dict[str, NDArray[np.float32]]:
         if not keys:
             return {}
         logger.debug("Retrieving cached embeddings", key_count=len(keys))
         async with self._lock:
             vals = await self._r.mget(keys)
-        out: dict[str, list[float]] = {}
+        out: dict[str, NDArray[np.float32]] = {}
         cache_hits = 0
         for k, v in zip(keys, vals, strict=False):
             if v is None:
                 continue
             try:
-                out[k] = json.loads(v)
+                out[k] = unpack_vector(v)
                 cache_hits += 1
-            except (json.JSONDecodeError, TypeError):
+            except (json.JSONDecodeError, TypeError, ValueError):
                 logger.warning("Invalid cached data for key", key=k[:32])
                 continue
         logger.debug("Cache retrieval completed", hits=cache_hits, misses=len(keys) - cache_hits)
         return out
 
-    async def set_many(self, kv: dict[str, list[float]]) -> None:
+    async def set_many(self, kv: Mapping[str, Sequence[float] | NDArray[Any]]) -> None:
         if not kv:
             return
         logger.debug("Caching embeddings", count=len(kv))
         pipe = self._r.pipeline()
         for k, v in kv.items():
             ttl = self._ttl * 2
-            pipe.set(k, json.dumps(v).encode("utf-8"), ex=ttl)
+            pipe.set(k, pack_vector(v, self._dtype), ex=ttl)
         await pipe.execute()
         logger.debug("Embeddings cached successfully")
 
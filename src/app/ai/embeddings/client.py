@@ -10,7 +10,14 @@ from app.core.logging import get_logger
 from .batch_processor import DynamicBatchProcessor
 from .cache import RedisCache, normkey
 from .config import EmbeddingsConfig
-from .context import budget_var, req_cache_var
+from .context import EmbeddingsBudget, budget_var, req_cache_var
+from .local_store import LocalEmbeddingStore
+from .results import (
+    MISSING_ITEM,
+    EmbeddingBatchResult,
+    EmbeddingItem,
+    EmbeddingSource,
+)
 from .tokenizer import estimate_tokens
 
 logger = get_logger(__name__)
@@ -31,12 +38,17 @@ class EmbeddingsService:
         )
         self._api_version = cfg.azure_api_version
         self._sem = asyncio.Semaphore(value=max(1, cfg.max_concurrency))
-        self._redis = RedisCache(cfg.redis_url, cfg.ttl_seconds) if cfg.redis_url else None
+        self._local = LocalEmbeddingStore(
+            cfg.local_store_path, cfg.local_store_capacity, cfg.hot_cache_size
+        )
+        self._redis = (
+            RedisCache(cfg.redis_url, cfg.ttl_seconds, cfg.redis_dtype) if cfg.redis_url else None
+        )
         if not cfg.redis_url:
             logger.warning("Redis cache not configured, embeddings will not be cached")
 
         # Initialize batch processor if dynamic batching is enabled
-        self._batch_processor: DynamicBatchProcessor | None = None
+        self._batch_processor: DynamicBatchProcessor[EmbeddingItem] | None = None
         if cfg.enable_dynamic_batching:
             logger.info(
                 "Enabling dynamic batching",
@@ -47,6 +59,7 @@ class EmbeddingsService:
                 embed_fn=self._direct_embed,
                 batch_size=cfg.batch_size,
                 batch_wait_ms=cfg.batch_wait_ms,
+                max_concurrency=cfg.max_concurrency,
             )
             # Start the batch processor
             asyncio.create_task(self._batch_processor.start())
@@ -59,89 +72,116 @@ class EmbeddingsService:
         return _ws_re.sub(" ", text.strip())
 
     async def embed(self, texts: list[str]) -> list[list[float]]:
+        """Embed ``texts`` in order; raises EmbeddingsIncompleteError if any are unavailable."""
+        return (await self.embed_detailed(texts)).require_all()
+
+    async def embed_detailed(self, texts: list[str]) -> EmbeddingBatchResult:
         """Main embedding method that handles caching and batching."""
         if not texts:
-            return []
+            return EmbeddingBatchResult()
 
         logger.debug("Processing embedding request", text_count=len(texts))
         # Use batch processor if enabled
         if self._batch_processor:
-            result = await self._batch_processor.embed(texts)
-            logger.debug(
-                "Batch embedding completed",
-                input_count=len(texts),
-                output_count=len(result),
-            )
-            return result
-        result = await self._direct_embed(texts)
-        logger.debug("Direct embedding completed", input_count=len(texts), output_count=len(result))
+            items = await self._batch_processor.embed(texts)
+        else:
+            items = await self._direct_embed(texts)
+        result = EmbeddingBatchResult(items=items)
+        logger.debug(
+            "Embedding completed",
+            input_count=len(texts),
+            missing_count=len(result.missing_indices),
+            batched=self._batch_processor is not None,
+        )
         return result
 
-    async def _direct_embed(self, texts: list[str]) -> list[list[float]]:
-        """Direct embedding method without batch processing (used by batch processor)."""
+    async def _direct_embed(self, texts: list[str]) -> list[EmbeddingItem]:
+        """Resolve each unique text through request, local, Redis and API tiers in one pass.
+
+        The returned list is aligned with ``texts``; texts left over once the budget is
+        exhausted come back as ``MISSING_ITEM``.
+        """
         if not texts:
             return []
-        normed = [self._norm(t) for t in texts]
-        keys = [normkey(t) for t in normed]
+        keys: list[str] = []
+        pending: dict[str, str] = {}
+        for text in texts:
+            normed = self._norm(text)
+            key = normkey(normed)
+            keys.append(key)
+            pending.setdefault(key, normed)
+        found: dict[str, EmbeddingItem] = {}
+
         local = req_cache_var.get()
-        hits: dict[str, list[float]] = {}
+        if local:
+            for key in list(pending):
+                vec = local.get(key)
+                if vec is not None:
+                    found[key] = EmbeddingItem(vec, EmbeddingSource.REQUEST)
+                    del pending[key]
+
+        if pending:
+            for key, arr in (await self._local.get_many(list(pending))).items():
+                found[key] = EmbeddingItem(arr.tolist(), EmbeddingSource.LOCAL)
+                del pending[key]
+
+        if pending and self._redis:
+            redis_vecs = await self._redis.get_many(list(pending))
+            await self._local.put_many(redis_vecs)
+            for key, arr in redis_vecs.items():
+                found[key] = EmbeddingItem(arr.tolist(), EmbeddingSource.REDIS)
+                del pending[key]
+
+        fetched: dict[str, list[float]] = {}
+        if pending:
+            fetched = await self._fetch_from_api(pending)
+            for key, vec in fetched.items():
+                found[key] = EmbeddingItem(vec, EmbeddingSource.API)
+
         if local is not None:
-            hits = {k: v for k, v in ((k, local.get(k)) for k in keys) if v is not None}
-        miss_keys = [k for k in keys if k not in hits]
-        miss_texts = [t for t, k in zip(normed, keys, strict=False) if k in set(miss_keys)]
-        if self._redis:
-            redis_hits = await self._redis.get_many(miss_keys)
-            hits.update(redis_hits)
-            miss_keys = [k for k in miss_keys if k not in redis_hits]
-            miss_texts = [
-                t
-                for t, k in zip(miss_texts, [k for k in keys if k in set(miss_keys)], strict=False)
-            ]
-        remaining = list(zip(miss_keys, miss_texts, strict=False))
-        out: dict[str, list[float]] = {}
-        out.update(hits)
-        if remaining:
-            logger.debug("Processing embeddings not in cache", count=len(remaining))
-            batches = [
-                remaining[i : i + self._cfg.batch_size]
-                for i in range(0, len(remaining), self._cfg.batch_size)
-            ]
-            for batch_idx, batch in enumerate(batches):
-                spend = estimate_tokens([t for _, t in batch])
-                budget = budget_var.get()
-                if not budget.can_spend(spend):
-                    logger.warning(
-                        "Budget exhausted, stopping embedding batch processing",
-                        batch_idx=batch_idx,
-                        spend=spend,
-                    )
-                    break
-                logger.debug(
-                    "Processing embedding batch",
+            local.update({k: item.vector for k, item in found.items() if item.vector is not None})
+        else:
+            req_cache_var.set(
+                {k: item.vector for k, item in found.items() if item.vector is not None}
+            )
+        if fetched:
+            await self._local.put_many(fetched)
+            if self._redis:
+                await self._redis.set_many(fetched)
+        return [found.get(k, MISSING_ITEM) for k in keys]
+
+    async def _fetch_from_api(self, pending: dict[str, str]) -> dict[str, list[float]]:
+        logger.debug("Processing embeddings not in cache", count=len(pending))
+        budget = budget_var.get(None) or EmbeddingsBudget(
+            token_limit=self._cfg.req_token_budget, call_limit=self._cfg.req_call_budget
+        )
+        items = list(pending.items())
+        size = max(1, self._cfg.batch_size)
+        planned: list[list[tuple[str, str]]] = []
+        for batch_idx, start in enumerate(range(0, len(items), size)):
+            batch = items[start : start + size]
+            spend = estimate_tokens([t for _, t in batch])
+            if not budget.can_spend(spend):
+                logger.warning(
+                    "Budget exhausted, stopping embedding batch processing",
                     batch_idx=batch_idx,
-                    batch_size=len(batch),
-                    tokens=spend,
+                    spend=spend,
+                    missing=len(items) - start,
                 )
-                async with self._sem:
-                    res = await self._client.embeddings.create(
-                        model=self._cfg.deployment,
-                        input=[t for _, t in batch],
-                        extra_query={"api-version": self._api_version},
-                    )
-                budget.spend(spend)
-                for pair, d in zip(batch, res.data, strict=False):
-                    out[pair[0]] = d.embedding
-                logger.debug(
-                    "Embedding batch completed",
-                    batch_idx=batch_idx,
-                    embeddings_generated=len(batch),
+                break
+            budget.spend(spend)
+            planned.append(batch)
+
+        async def _call(batch: list[tuple[str, str]]) -> dict[str, list[float]]:
+            async with self._sem:
+                res = await self._client.embeddings.create(
+                    model=self._cfg.deployment,
+                    input=[t for _, t in batch],
+                    extra_query={"api-version": self._api_version},
                 )
-        if local is not None:
-            local.update(out)
-            req_cache_var.set(local)
-        else:
-            req_cache_var.set(out)
-        if self._redis:
-            to_set = {k: v for k, v in out.items()}
-            await self._redis.set_many(to_set)
-        return [out[k] for k in keys if k in out]
+            return {key: d.embedding for (key, _), d in zip(batch, res.data, strict=False)}
+
+        out: dict[str, list[float]] = {}
+        for part in await asyncio.gather(*(_call(b) for b in planned)):
+            out.update(part)
+        return out
@@ -21,6 +21,10 @@ class EmbeddingsConfig:
         "yes",
     }
     redis_url: str | None = os.getenv("REDIS_URL")
+    redis_dtype: str = os.getenv("EMB_REDIS_DTYPE", "float32")
+    local_store_path: str | None = os.getenv("EMB_LOCAL_STORE_PATH") or None
+    local_store_capacity: int = int(os.getenv("EMB_LOCAL_STORE_CAPACITY", "100000"))
+    hot_cache_size: int = int(os.getenv("EMB_HOT_CACHE_SIZE", "2048"))
     req_token_budget: int = int(os.getenv("EMB_REQ_TOKEN_BUDGET", "6000"))
     req_call_budget: int = int(os.getenv("EMB_REQ_CALL_BUDGET", "3"))
     normalize: bool = True
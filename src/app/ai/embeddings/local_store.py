@@ -0,0 +1,271 @@
+"""Process-local embedding tiers: a hot LRU of numpy vectors over a memmap-backed store."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+from collections import OrderedDict
+from collections.abc import Iterator, Mapping, Sequence
+from pathlib import Path
+from typing import Any, Literal
+
+import numpy as np
+from numpy.typing import NDArray
+
+from app.core.logging import get_logger
+
+try:
+    import fcntl
+except Exception:  # noqa: BLE001
+    fcntl = None  # type: ignore[assignment]
+
+logger = get_logger(__name__)
+
+Vector = NDArray[np.float32]
+
+_SLOT_DTYPE = np.dtype([("k0", "<u8"), ("k1", "<u8"), ("row", "<i8")])
+_META_COUNT = 0
+_META_CAPACITY = 1
+
+
+def _split_key(key: str) -> tuple[int, int]:
+    raw = bytes.fromhex(key)
+    if len(raw) != 16:
+        raw = raw.ljust(16, b"\0")[:16]
+    return int.from_bytes(raw[:8], "little"), int.from_bytes(raw[8:], "little")
+
+
+class HotVectorCache:
+    """Bounded in-process LRU of float32 vectors keyed by ``normkey``."""
+
+    def __init__(self, max_items: int = 2048) -> None:
+        self._max = max(1, int(max_items))
+        self._data: OrderedDict[str, Vector] = OrderedDict()
+
+    def get_many(self, keys: Sequence[str]) -> dict[str, Vector]:
+        out: dict[str, Vector] = {}
+        for k in keys:
+            v = self._data.get(k)
+            if v is not None:
+                self._data.move_to_end(k)
+                out[k] = v
+        return out
+
+    def put_many(self, items: Mapping[str, Vector]) -> None:
+        for k, v in items.items():
+            self._data[k] = v
+            self._data.move_to_end(k)
+        while len(self._data) > self._max:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class MemmapEmbeddingStore:
+    """Fixed-capacity float32 matrix on disk with an open-addressing hash index.
+
+    Keys are the 128-bit ``normkey`` digests. The vectors, the index and a two-slot
+    header (row count, capacity) are all memory-mapped ``MAP_SHARED``, so every worker
+    on the host sees rows appended by the others. Writers take an exclusive and readers
+    a shared ``flock`` where available, so a reader never sees a row another worker is
+    rewriting. When the store fills up it is reset rather than evicting rows. Methods
+    block on file locks and disk reads; async callers run them in a thread.
+    """
+
+    def __init__(self, directory: str | os.PathLike[str], dim: int, capacity: int = 100_000):
+        self.dim = int(dim)
+        self.capacity = int(capacity)
+        self._n_slots = 1 << max(4, (self.capacity * 2 - 1).bit_length())
+        self._mask = self._n_slots - 1
+        base = Path(directory)
+        base.mkdir(parents=True, exist_ok=True)
+        stem = f"embeddings-{self.dim}d-{self.capacity}"
+        self._lock_path = base / f"{stem}.lock"
+        meta_path = base / f"{stem}.meta"
+        index_path = base / f"{stem}.index"
+        vectors_path = base / f"{stem}.f32"
+        # Under the exclusive lock only one worker creates the files; the others wait and
+        # then open what it wrote instead of truncating it.
+        with self._file_lock(exclusive=True):
+            fresh = not meta_path.exists()
+            mode: Literal["w+", "r+"] = "w+" if fresh else "r+"
+            self._vectors = np.memmap(
+                vectors_path, dtype=np.float32, mode=mode, shape=(self.capacity, self.dim)
+            )
+            self._index = np.memmap(
+                index_path, dtype=_SLOT_DTYPE, mode=mode, shape=(self._n_slots,)
+            )
+            if fresh:
+                self._index["row"] = -1
+                self._index.flush()
+            # The header is created last, so once it exists the other files are complete.
+            self._meta = np.memmap(meta_path, dtype="<i8", mode=mode, shape=(2,))
+            if fresh:
+                self._meta[_META_CAPACITY] = self.capacity
+                self._meta.flush()
+        logger.info(
+            "Opened local embedding store",
+            path=str(vectors_path),
+            dim=self.dim,
+            capacity=self.capacity,
+            rows=int(self._meta[_META_COUNT]),
+        )
+
+    def __len__(self) -> int:
+        return int(self._meta[_META_COUNT])
+
+    def _find_slot(self, k0: int, k1: int) -> int:
+        index = self._index
+        slot = k0 & self._mask
+        while True:
+            entry = index[slot]
+            if entry["row"] < 0 or (entry["k0"] == k0 and entry["k1"] == k1):
+                return slot
+            slot = (slot + 1) & self._mask
+
+    def get_many(self, keys: Sequence[str]) -> dict[str, Vector]:
+        out: dict[str, Vector] = {}
+        with self._file_lock(exclusive=False):
+            for key in keys:
+                row = int(self._index[self._find_slot(*_split_key(key))]["row"])
+                if row >= 0:
+                    out[key] = np.array(self._vectors[row], dtype=np.float32)
+        return out
+
+    def put_many(self, items: Mapping[str, Vector]) -> int:
+        if not items:
+            return 0
+        written = 0
+        with self._file_lock(exclusive=True):
+            for key, vec in items.items():
+                arr = np.asarray(vec, dtype=np.float32).reshape(-1)
+                if arr.shape[0] != self.dim:
+                    continue
+                k0, k1 = _split_key(key)
+                slot = self._find_slot(k0, k1)
+                row = int(self._index[slot]["row"])
+                if row < 0:
+                    count = int(self._meta[_META_COUNT])
+                    if count >= self.capacity:
+                        self._reset()
+                        slot = self._find_slot(k0, k1)
+                        count = 0
+                    row = count
+                    self._vectors[row] = arr
+                    self._index[slot] = (k0, k1, row)
+                    self._meta[_META_COUNT] = count + 1
+                else:
+                    self._vectors[row] = arr
+                written += 1
+        return written
+
+    def _reset(self) -> None:
+        logger.info("Local embedding store full, resetting", capacity=self.capacity)
+        self._index["row"] = -1
+        self._meta[_META_COUNT] = 0
+
+    def flush(self) -> None:
+        self._vectors.flush()
+        self._index.flush()
+        self._meta.flush()
+
+    @contextlib.contextmanager
+    def _file_lock(self, exclusive: bool) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        with open(self._lock_path, "a+b") as fh:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+class LocalEmbeddingStore:
+    """Hot LRU in front of an optional memmap store, created once the dimension is known.
+
+    The memmap store is opened lazily, in a thread and at most once at a time: opening
+    waits on the exclusive file lock and creates or maps the store's files.
+    """
+
+    def __init__(
+        self,
+        directory: str | None,
+        capacity: int = 100_000,
+        hot_size: int = 2048,
+    ) -> None:
+        self._directory = directory
+        self._capacity = capacity
+        self._hot = HotVectorCache(hot_size)
+        self._disk: MemmapEmbeddingStore | None = None
+        self._disk_lock = asyncio.Lock()
+        self._probed = False
+
+    def _existing_dim(self) -> int | None:
+        if self._directory is None or not Path(self._directory).is_dir():
+            return None
+        metas = sorted(
+            Path(self._directory).glob(f"embeddings-*d-{self._capacity}.meta"),
+            key=lambda p: p.stat().st_mtime,
+        )
+        if not metas:
+            return None
+        dim = metas[-1].name.split("-")[1].rstrip("d")
+        return int(dim) if dim.isdigit() else None
+
+    def _opened(self, dim: int | None) -> bool:
+        disk = self._disk
+        return self._directory is None or (disk is not None and (dim is None or disk.dim == dim))
+
+    async def _disk_for(self, dim: int | None) -> MemmapEmbeddingStore | None:
+        """The store for ``dim``; with ``dim=None`` the newest one already on disk, if any."""
+        if self._opened(dim):
+            return self._disk
+        async with self._disk_lock:
+            if self._opened(dim):
+                return self._disk
+            if dim is None:
+                if self._probed:
+                    return None
+                self._probed = True
+                dim = await asyncio.to_thread(self._existing_dim)
+                if dim is None:
+                    return None
+            directory = self._directory
+            assert directory is not None
+            try:
+                self._disk = await asyncio.to_thread(
+                    MemmapEmbeddingStore, directory, dim, self._capacity
+                )
+            except OSError as exc:
+                logger.warning("Local embedding store unavailable", error=str(exc))
+                self._directory = None
+                self._disk = None
+            return self._disk
+
+    async def get_many(self, keys: Sequence[str]) -> dict[str, Vector]:
+        out = self._hot.get_many(keys)
+        if len(out) == len(keys):
+            return out
+        disk = await self._disk_for(None)
+        if disk is None:
+            return out
+        misses = [k for k in keys if k not in out]
+        disk_hits = await asyncio.to_thread(disk.get_many, misses)
+        if disk_hits:
+            self._hot.put_many(disk_hits)
+            out.update(disk_hits)
+        return out
+
+    async def put_many(self, items: Mapping[str, Any]) -> None:
+        if not items:
+            return
+        vecs = {k: np.asarray(v, dtype=np.float32) for k, v in items.items()}
+        self._hot.put_many(vecs)
+        dim = int(next(iter(vecs.values())).shape[-1])
+        disk = await self._disk_for(dim)
+        if disk is not None:
+            await asyncio.to_thread(disk.put_many, vecs)
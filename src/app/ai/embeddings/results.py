@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from enum import StrEnum
+
+
+class EmbeddingSource(StrEnum):
+    REQUEST = "request"
+    LOCAL = "local"
+    REDIS = "redis"
+    API = "api"
+    MISSING = "missing"
+
+
+@dataclass(frozen=True, slots=True)
+class EmbeddingItem:
+    vector: list[float] | None
+    source: EmbeddingSource
+
+    @property
+    def ok(self) -> bool:
+        return self.vector is not None
+
+
+MISSING_ITEM = EmbeddingItem(vector=None, source=EmbeddingSource.MISSING)
+
+
+class EmbeddingsIncompleteError(RuntimeError):
+    def __init__(self, result: EmbeddingBatchResult) -> None:
+        missing = result.missing_indices
+        super().__init__(f"{len(missing)} of {len(result.items)} embeddings unavailable")
+        self.result = result
+
+
+@dataclass(slots=True)
+class EmbeddingBatchResult:
+    """Per-input embedding outcome, aligned with the input texts (duplicates included)."""
+
+    items: list[EmbeddingItem] = field(default_factory=list)
+
+    @property
+    def vectors(self) -> list[list[float] | None]:
+        return [item.vector for item in self.items]
+
+    @property
+    def missing_indices(self) -> list[int]:
+        return [i for i, item in enumerate(self.items) if item.vector is None]
+
+    @property
+    def complete(self) -> bool:
+        return all(item.vector is not None for item in self.items)
+
+    def require_all(self) -> list[list[float]]:
+        out: list[list[float]] = []
+        for item in self.items:
+            if item.vector is None:
+                raise EmbeddingsIncompleteError(self)
+            out.append(item.vector)
+        return out
@@ -1,6 +1,10 @@
 from __future__ import annotations
 
+import hashlib
+from collections import OrderedDict
 from collections.abc import Iterable
+from functools import cache
+from typing import Any
 
 from app.core.logging import get_logger
 
@@ -11,15 +15,42 @@ except Exception:  # noqa: BLE001
 
 logger = get_logger(__name__)
 
+_COUNT_CACHE_SIZE = 4096
+_counts: OrderedDict[bytes, int] = OrderedDict()
 
-def estimate_tokens(texts: Iterable[str]) -> int:
-    text_list = list(texts)
+
+@cache
+def _encoding() -> Any:
     if tiktoken is None:
-        logger.debug("tiktoken not available, using fallback estimation", text_count=len(text_list))
-        return sum(max(1, len(t) // 4) for t in text_list)
+        logger.debug("tiktoken not available, using fallback estimation")
+        return None
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def _encode_len(text: str) -> int:
+    enc = _encoding()
+    if enc is None:
+        return max(1, len(text) // 4)
+    return len(enc.encode(text))
 
-    logger.debug("Estimating tokens with tiktoken", text_count=len(text_list))
-    enc = tiktoken.get_encoding("cl100k_base")
-    token_count = sum(len(enc.encode(t)) for t in text_list)
+
+def estimate_tokens(texts: Iterable[str]) -> int:
+    text_list = list(texts)
+    logger.debug("Estimating tokens", text_count=len(text_list))
+    token_count = sum(_encode_len(t) for t in text_list)
     logger.debug("Token estimation completed", total_tokens=token_count)
     return token_count
+
+
+def count_tokens(text: str) -> int:
+    """Token count of ``text``, memoized by content hash for repeatedly counted texts."""
+    key = hashlib.blake2b(text.encode(), digest_size=16).digest()
+    count = _counts.get(key)
+    if count is None:
+        count = _encode_len(text)
+        _counts[key] = count
+        if len(_counts) > _COUNT_CACHE_SIZE:
+            _counts.popitem(last=False)
+    else:
+        _counts.move_to_end(key)
+    return count
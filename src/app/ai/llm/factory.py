@@ -1,9 +1,5 @@
 from __future__ import annotations
 
-from collections.abc import Callable
-from threading import Lock
-from time import monotonic
-
 import httpx
 
 from app.ai.llm.adapters.gemini_adapter import GeminiAdapter
@@ -11,6 +7,8 @@ from app.ai.llm.adapters.ollama_adapter import OllamaAdapter
 from app.ai.llm.adapters.openai_adapter import OpenAIAdapter
 from app.ai.llm.base import LLMProvider
 from app.ai.llm.registry import ProviderAdapter, registry
+from app.ai.llm.semantic_cache import CachedLLMProvider, get_semantic_cache
+from app.ai.llm.transport import llm_transport
 from app.ai.llm.unified_provider import UnifiedLLMProvider
 from app.core.config import GEMINI_MODEL, LLM_PROVIDER, OLLAMA_MODEL, OPENAI_MODEL
 from app.core.logging import get_logger
@@ -19,83 +17,56 @@ logger = get_logger(__name__)
 
 _reg = registry()
 
-_TTL_SECONDS: float = 600.0
-_CACHE: dict[str, tuple[float, list[str]]] = {}
-_CACHE_LOCK = Lock()
-
-
-def _get_cached(key: str, fetch: Callable[[], list[str]]) -> list[str]:
-    now = monotonic()
-    with _CACHE_LOCK:
-        entry = _CACHE.get(key)
-        if entry and entry[0] > now:
-            return entry[1]
-    result = fetch()
-    with _CACHE_LOCK:
-        _CACHE[key] = (now + _TTL_SECONDS, result)
-    return result
-
-
-def invalidate_model_cache(provider: str | None = None) -> None:
-    with _CACHE_LOCK:
-        if provider:
-            _CACHE.pop(provider, None)
-        else:
-            _CACHE.clear()
-
-
-def _fetch_openai_models() -> list[str]:
-    fallback = ["gpt-4o-mini", "gpt-4o", "gpt-5"]
-    try:
-        from app.core.config import get_settings
-
-        s = get_settings()
-        api_key = s.llm.openai_api_key.get_secret_value() if s.llm.openai_api_key else None
-        if not api_key:
-            return fallback
-        base = s.llm.openai_api_base.rstrip("/")
-        with httpx.Client(timeout=httpx.Timeout(10.0, connect=5.0)) as c:
-            r = c.get(f"{base}/models", headers={"Authorization": f"Bearer {api_key}"})
-            if r.status_code != 200:
-                return fallback
-            data = r.json()
-            models = [m["id"] for m in data.get("data", []) if isinstance(m, dict) and m.get("id")]
-            return models or fallback
-    except Exception as e:
-        logger = get_logger(__name__)
-        logger.warning(
-            "Failed to fetch OpenAI models from API, using fallback list",
-            api_base=base,
-            fallback_models=fallback,
-            error=str(e),
-            error_type=type(e).__name__,
-        )
-        return fallback
+_OPENAI_FALLBACK = ["gpt-4o-mini", "gpt-4o", "gpt-5"]
 
 
-def _openai_list() -> list[str]:
-    return _get_cached("openai_models", _fetch_openai_models)
+async def invalidate_model_cache(provider: str | None = None) -> None:
+    await _reg.invalidate(provider)
 
 
-def _gemini_list() -> list[str]:
+async def _openai_list() -> list[str]:
+    from app.core.config import get_settings
+
+    s = get_settings()
+    api_key = s.llm.openai_api_key.get_secret_value() if s.llm.openai_api_key else None
+    if not api_key:
+        return _OPENAI_FALLBACK
+    base = s.llm.openai_api_base.rstrip("/")
+    client = llm_transport().client_for(base)
+    r = await client.get(
+        f"{base}/models",
+        headers={"Authorization": f"Bearer {api_key}"},
+        timeout=httpx.Timeout(10.0, connect=5.0),
+    )
+    r.raise_for_status()
+    data = r.json()
+    return [m["id"] for m in data.get("data", []) if isinstance(m, dict) and m.get("id")]
+
+
+async def _gemini_list() -> list[str]:
     return ["gemini-1.5-flash", "gemini-1.5-pro"]
 
 
-def _ollama_list() -> list[str]:
-    return _reg._ollama_models()
+async def _ollama_list() -> list[str]:
+    return await _reg._ollama_models()
 
 
-_reg.register(ProviderAdapter("openai", _openai_list, ["gpt-4o-mini", "gpt-4o", "gpt-5"]))
+_reg.register(ProviderAdapter("openai", _openai_list, _OPENAI_FALLBACK))
 _reg.register(ProviderAdapter("gemini", _gemini_list, ["gemini-1.5-pro", "gemini-1.5-flash"]))
 _reg.register(ProviderAdapter("ollama", _ollama_list, ["llama3.1", "mistral", "gemma"]))
 
 
+def _cached(provider: LLMProvider) -> LLMProvider:
+    semantic_cache = get_semantic_cache()
+    return CachedLLMProvider(provider, semantic_cache) if semantic_cache else provider
+
+
 def available_providers() -> list[str]:
     return ["openai", "gemini", "ollama"]
 
 
 async def available_models(provider: str) -> list[str]:
-    return _reg.available_models(provider)
+    return await _reg.available_models(provider)
 
 
 async def get_provider_and_model(
@@ -153,12 +124,18 @@ async def get_provider_and_model(
 
     if selected_provider == "openai":
         models = await available_models("openai")
-        return UnifiedLLMProvider(OpenAIAdapter()), select_model(models, OPENAI_MODEL, model)
+        return _cached(UnifiedLLMProvider(OpenAIAdapter())), select_model(
+            models, OPENAI_MODEL, model
+        )
     if selected_provider == "gemini":
         models = await available_models("gemini")
-        return UnifiedLLMProvider(GeminiAdapter()), select_model(models, GEMINI_MODEL, model)
+        return _cached(UnifiedLLMProvider(GeminiAdapter())), select_model(
+            models, GEMINI_MODEL, model
+        )
     if selected_provider == "ollama":
         models = await available_models("ollama")
-        return UnifiedLLMProvider(OllamaAdapter()), select_model(models, OLLAMA_MODEL, model)
+        return _cached(UnifiedLLMProvider(OllamaAdapter())), select_model(
+            models, OLLAMA_MODEL, model
+        )
 
     raise RuntimeError(f"Unsupported LLM provider: {selected_provider}")
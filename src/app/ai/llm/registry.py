@@ -1,60 +1,131 @@
 from __future__ import annotations
 
-import time
-from collections.abc import Callable
+import asyncio
+import contextlib
+from collections.abc import Awaitable, Callable
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
-import httpx
-
+from app.ai.llm.transport import llm_transport
 from app.core.config import OLLAMA_BASE_URL
 from app.core.logging import get_logger
 
+if TYPE_CHECKING:
+    from app.core.cache.hybrid_cache import HybridCache
+
 logger = get_logger(__name__)
 
 
 @dataclass
 class ProviderAdapter:
     name: str
-    list_models: Callable[[], list[str]]
+    list_models: Callable[[], Awaitable[list[str]]]
     fallback: list[str]
 
 
 class ModelRegistry:
     """
-    Dynamic model registry with TTL caching per provider.
-    Providers register a list_models() adapter; we fall back safely if discovery fails.
+    Async model catalog with stale-while-revalidate caching per provider.
+
+    Providers register an async list_models() adapter. Lists live in the shared hybrid
+    cache, so every worker process sees one worker's refresh. A list stays fresh for
+    ``ttl_seconds``; after that it is still served immediately while one background
+    refresh runs, and a failed refresh keeps serving the last known list for up to
+    ``stale_ttl_seconds``. Only a provider with no known list waits for discovery, and
+    falls back to the adapter's static list if that fails. The fallback is cached for
+    ``failure_ttl_seconds`` so a broken endpoint is not retried on every request.
     """
 
-    def __init__(self, ttl_seconds: int = 300) -> None:
+    def __init__(
+        self,
+        ttl_seconds: int = 300,
+        stale_ttl_seconds: int = 7 * 86400,
+        failure_ttl_seconds: int = 60,
+    ) -> None:
         self._ttl = ttl_seconds
-        self._cache: dict[str, tuple[list[str], float]] = {}
+        self._stale_ttl = stale_ttl_seconds
+        self._failure_ttl = failure_ttl_seconds
         self._adapters: dict[str, ProviderAdapter] = {}
+        self._cache: HybridCache | None = None
+        self._refresher: asyncio.Task[None] | None = None
 
     def register(self, adapter: ProviderAdapter) -> None:
         self._adapters[adapter.name] = adapter
 
-    def available_models(self, provider: str) -> list[str]:
+    async def available_models(self, provider: str) -> list[str]:
         key = provider.lower()
-        now = time.time()
-        cached = self._cache.get(key)
-        if cached and now - cached[1] < self._ttl:
-            return cached[0]
-        try:
-            adapter = self._adapters[key]
-        except KeyError:
+        adapter = self._adapters.get(key)
+        if adapter is None:
             return []
-        models: list[str] = adapter.fallback
         try:
-            discovered = adapter.list_models()
-            if discovered:
-                models = discovered
+            cache = await self._get_cache()
+            models = await cache.get_or_set(
+                self._key(key),
+                lambda: self._discover(adapter),
+                ttl=self._ttl,
+                stale_ttl=self._stale_ttl,
+            )
         except Exception as exc:
             logger.debug("Failed to list models for %s: %s", provider, exc)
-        self._cache[key] = (models, now)
+            if self._cache is not None:
+                # Stored without a refresh envelope, so it simply expires and the next
+                # read tries discovery again.
+                with contextlib.suppress(Exception):
+                    await self._cache.set(self._key(key), adapter.fallback, ttl=self._failure_ttl)
+            return adapter.fallback
+        return list(models) if models else adapter.fallback
+
+    async def warm(self) -> None:
+        """Load every provider's list concurrently."""
+        await asyncio.gather(*(self.available_models(name) for name in self._adapters))
+
+    async def start(self) -> None:
+        """Warm the catalog and keep it refreshed in the background until :meth:`stop`."""
+        if self._refresher is None:
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._refresher is not None:
+            self._refresher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._refresher
+            self._refresher = None
+
+    async def invalidate(self, provider: str | None = None) -> None:
+        names = [provider.lower()] if provider else list(self._adapters)
+        cache = await self._get_cache()
+        await cache.delete(*(self._key(n) for n in names))
+
+    async def _refresh_loop(self) -> None:
+        # Reading each list once per TTL is enough: a stale read starts the refresh, so
+        # idle processes keep the shared lists current too.
+        while True:
+            try:
+                await self.warm()
+            except Exception as exc:
+                logger.warning("Model catalog refresh failed: %s", exc)
+            await asyncio.sleep(self._ttl)
+
+    async def _get_cache(self) -> HybridCache:
+        if self._cache is None:
+            from app.core.cache.dependency import get_cache
+
+            self._cache = await get_cache()
+        return self._cache
+
+    @staticmethod
+    def _key(provider: str) -> str:
+        return f"llm:models:{provider}"
+
+    @staticmethod
+    async def _discover(adapter: ProviderAdapter) -> list[str]:
+        models = await adapter.list_models()
+        if not models:
+            raise ValueError(f"{adapter.name} returned no models")
         return models
 
     @staticmethod
-    def _ollama_models() -> list[str]:
+    async def _ollama_models() -> list[str]:
         """Fetch Ollama models - only call when actually needed."""
         defaults = ["llama3.1", "mistral", "gemma"]
 
@@ -64,20 +135,11 @@ class ModelRegistry:
             logger.debug("Ollama not selected as provider, returning defaults without HTTP call")
             return defaults
 
-        try:
-            with httpx.Client(timeout=5.0) as client:
-                resp = client.get(f"{OLLAMA_BASE_URL.rstrip('/')}/api/tags")
-                resp.raise_for_status()
-                data = resp.json()
-                items = data.get("models", [])
-                names: list[str] = []
-                for m in items:
-                    if isinstance(m, dict) and "name" in m:
-                        names.append(m["name"])
-                return names or defaults
-        except (httpx.HTTPError, ValueError) as exc:
-            logger.debug("Failed to fetch Ollama models: %s", exc)
-            return defaults
+        base = OLLAMA_BASE_URL.rstrip("/")
+        resp = await llm_transport().client_for(base).get(f"{base}/api/tags", timeout=5.0)
+        resp.raise_for_status()
+        items = resp.json().get("models", [])
+        return [m["name"] for m in items if isinstance(m, dict) and "name" in m]
 
 
 _registry = ModelRegistry(ttl_seconds=300)
@@ -0,0 +1,254 @@
+"""Opt-in semantic response cache in front of an LLM provider."""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass
+from functools import cache
+from typing import Any, cast
+
+import numpy as np
+from numpy.typing import NDArray
+from prometheus_client import Counter
+
+from app.ai.embeddings.tokenizer import estimate_tokens
+from app.ai.llm.base import LLMProvider
+from app.ai.types import Message
+from app.core.logging import get_logger
+from app.core.tenancy import current_tenant
+
+logger = get_logger(__name__)
+
+SEMANTIC_CACHE_REQUESTS = Counter(
+    "llm_semantic_cache_requests_total",
+    "LLM calls seen by the semantic cache",
+    ["result"],
+)
+SEMANTIC_CACHE_SAVED_TOKENS = Counter(
+    "llm_semantic_cache_saved_tokens_total", "LLM tokens not spent thanks to cache hits"
+)
+SEMANTIC_CACHE_SAVED_SECONDS = Counter(
+    "llm_semantic_cache_saved_seconds_total",
+    "LLM latency avoided by cache hits, from the original call durations",
+)
+
+Embedder = Callable[[list[str]], Awaitable[list[list[float]]]]
+
+
+@dataclass(frozen=True, slots=True)
+class SemanticCacheConfig:
+    enable: bool = os.getenv("LLM_SEMANTIC_CACHE", "0").lower() in {"1", "true", "yes"}
+    similarity_threshold: float = float(os.getenv("LLM_SEMANTIC_CACHE_THRESHOLD", "0.95"))
+    ttl_seconds: int = int(os.getenv("LLM_SEMANTIC_CACHE_TTL_SECONDS", "3600"))
+    max_entries: int = int(os.getenv("LLM_SEMANTIC_CACHE_MAX_ENTRIES", "512"))
+    max_partitions: int = int(os.getenv("LLM_SEMANTIC_CACHE_MAX_PARTITIONS", "1024"))
+
+
+@dataclass(slots=True)
+class CachedResponse:
+    response: Any
+    tokens: int
+    latency: float
+
+
+class _VectorIndex:
+    """Ring buffer of unit vectors searched with one matrix-vector product."""
+
+    def __init__(self, dim: int, capacity: int) -> None:
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._expires = np.zeros(capacity, dtype=np.float64)
+        self._values: list[CachedResponse | None] = [None] * capacity
+        self._next = 0
+
+    @property
+    def dim(self) -> int:
+        return int(self._vectors.shape[1])
+
+    def search(self, query: NDArray[np.float32], now: float) -> tuple[float, CachedResponse | None]:
+        scores = self._vectors @ query
+        scores[self._expires <= now] = -1.0
+        best = int(np.argmax(scores))
+        return float(scores[best]), self._values[best]
+
+    def add(self, vector: NDArray[np.float32], value: CachedResponse, expires: float) -> None:
+        slot = self._next
+        self._vectors[slot] = vector
+        self._expires[slot] = expires
+        self._values[slot] = value
+        self._next = (slot + 1) % len(self._values)
+
+
+class SemanticResponseCache:
+    """Per-partition vector indexes of prompt embeddings and the responses they got.
+
+    A partition is one tenant, model, call type, system prompt and earlier
+    conversation; only the last user message is compared by cosine similarity. Indexes
+    live in process memory, bounded to ``max_entries`` per partition and
+    ``max_partitions`` partitions, least recently used first out.
+    """
+
+    def __init__(self, embed: Embedder, config: SemanticCacheConfig | None = None) -> None:
+        self.config = config or SemanticCacheConfig()
+        self._embed = embed
+        self._indexes: OrderedDict[str, _VectorIndex] = OrderedDict()
+
+    async def embed(self, text: str) -> NDArray[np.float32]:
+        vec = np.asarray((await self._embed([text]))[0], dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm > 0 else vec
+
+    def lookup(self, partition: str, vector: NDArray[np.float32]) -> CachedResponse | None:
+        index = self._indexes.get(partition)
+        if index is None or index.dim != vector.shape[0]:
+            return None
+        self._indexes.move_to_end(partition)
+        score, value = index.search(vector, time.time())
+        return value if score >= self.config.similarity_threshold else None
+
+    def store(self, partition: str, vector: NDArray[np.float32], value: CachedResponse) -> None:
+        index = self._indexes.get(partition)
+        if index is None or index.dim != vector.shape[0]:
+            index = _VectorIndex(vector.shape[0], self.config.max_entries)
+            self._indexes[partition] = index
+            while len(self._indexes) > self.config.max_partitions:
+                self._indexes.popitem(last=False)
+        self._indexes.move_to_end(partition)
+        index.add(vector, value, time.time() + self.config.ttl_seconds)
+
+
+class CachedLLMProvider(LLMProvider):
+    """Serves ``chat`` and ``chat_raw`` from a :class:`SemanticResponseCache`.
+
+    Calls bypass the cache when there is no tenant to isolate by, when the last message
+    is not from the user, and on tool-calling turns: requests offering tools or carrying
+    tool results, whose answers depend on side effects rather than on the question.
+    Streaming is passed through uncached.
+    """
+
+    def __init__(self, inner: LLMProvider, cache: SemanticResponseCache) -> None:
+        self._inner = inner
+        self._cache = cache
+
+    async def chat(self, model: str, messages: list[Message]) -> str:
+        result: str = await self._cached("chat", model, messages, {}, self._inner.chat)
+        return result
+
+    async def chat_raw(
+        self,
+        model: str,
+        messages: list[Message],
+        tool_choice: str | dict[str, Any] | None = None,
+        response_format: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> Any:
+        async def call(model: str, messages: list[Message]) -> Any:
+            return await self._inner.chat_raw(
+                model, messages, tool_choice=tool_choice, response_format=response_format, **kwargs
+            )
+
+        options = {"tool_choice": tool_choice, "response_format": response_format, **kwargs}
+        return await self._cached("chat_raw", model, messages, options, call)
+
+    async def chat_stream(
+        self, model: str, messages: list[Message], **kwargs: Any
+    ) -> AsyncIterator[str]:
+        # Providers implement chat_stream as a coroutine that resolves to the iterator.
+        stream: Any = self._inner.chat_stream
+        return cast("AsyncIterator[str]", await stream(model, messages, **kwargs))
+
+    async def aclose(self) -> None:
+        close = getattr(self._inner, "aclose", None)
+        if close is not None:
+            await close()
+
+    async def _cached(
+        self,
+        kind: str,
+        model: str,
+        messages: list[Message],
+        options: dict[str, Any],
+        call: Callable[[str, list[Message]], Awaitable[Any]],
+    ) -> Any:
+        partition = self._partition(kind, model, messages, options)
+        if partition is None:
+            SEMANTIC_CACHE_REQUESTS.labels(result="bypass").inc()
+            return await call(model, messages)
+
+        question = messages[-1].get("content") or ""
+        try:
+            vector = await self._cache.embed(question)
+        except Exception as exc:
+            logger.debug("Semantic cache embedding failed: %s", exc)
+            SEMANTIC_CACHE_REQUESTS.labels(result="error").inc()
+            return await call(model, messages)
+
+        hit = self._cache.lookup(partition, vector)
+        if hit is not None:
+            SEMANTIC_CACHE_REQUESTS.labels(result="hit").inc()
+            SEMANTIC_CACHE_SAVED_TOKENS.inc(hit.tokens)
+            SEMANTIC_CACHE_SAVED_SECONDS.inc(hit.latency)
+            return copy.deepcopy(hit.response)
+
+        SEMANTIC_CACHE_REQUESTS.labels(result="miss").inc()
+        start = time.perf_counter()
+        response = await call(model, messages)
+        latency = time.perf_counter() - start
+        tokens = self._tokens(messages, response)
+        self._cache.store(partition, vector, CachedResponse(response, tokens, latency))
+        return response
+
+    @staticmethod
+    def _partition(
+        kind: str, model: str, messages: list[Message], options: dict[str, Any]
+    ) -> str | None:
+        tenant = current_tenant.get()
+        if not tenant or not messages or messages[-1].get("role") != "user":
+            return None
+        if options.get("tools") or options.get("functions"):
+            return None
+        if options.get("tool_choice") not in (None, "none"):
+            return None
+        if any(m.get("role") == "tool" or m.get("tool_calls") for m in messages):
+            return None
+        system = [m.get("content") for m in messages if m.get("role") == "system"]
+        history = [
+            (m.get("role"), m.get("content")) for m in messages[:-1] if m.get("role") != "system"
+        ]
+        digest = hashlib.sha256(
+            json.dumps([system, history, options], sort_keys=True, default=str).encode()
+        ).hexdigest()
+        return f"{tenant}:{model}:{kind}:{digest}"
+
+    @staticmethod
+    def _tokens(messages: list[Message], response: Any) -> int:
+        if isinstance(response, dict):
+            usage = response.get("usage") or {}
+            if usage.get("total_tokens"):
+                return int(usage["total_tokens"])
+            response = json.dumps(response.get("choices") or response, default=str)
+        texts = [str(m.get("content") or "") for m in messages]
+        return estimate_tokens([*texts, str(response)])
+
+
+@cache
+def get_semantic_cache() -> SemanticResponseCache | None:
+    """Process-wide cache, or None unless ``LLM_SEMANTIC_CACHE`` is enabled."""
+    config = SemanticCacheConfig()
+    if not config.enable:
+        return None
+    from app.ai.embeddings.client import EmbeddingsService
+    from app.ai.embeddings.config import EmbeddingsConfig
+
+    service = EmbeddingsService(EmbeddingsConfig())
+    logger.info(
+        "Semantic LLM response cache enabled",
+        threshold=config.similarity_threshold,
+        ttl_seconds=config.ttl_seconds,
+    )
+    return SemanticResponseCache(service.embed, config)
@@ -0,0 +1,162 @@
+"""Process-wide pooled HTTP clients for LLM provider endpoints."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import weakref
+from collections.abc import Awaitable, Callable
+from functools import cache
+from typing import Any
+
+import httpx
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+
+HTTP2_AVAILABLE: bool
+try:
+    import h2  # type: ignore[import-not-found,unused-ignore]  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional
+    HTTP2_AVAILABLE = False
+
+logger = get_logger(__name__)
+
+LLM_POOL_CONNECTIONS = Gauge(
+    "llm_http_pool_connections",
+    "Connections in the LLM HTTP pool",
+    ["host", "state"],
+)
+LLM_POOL_WAIT = Histogram(
+    "llm_http_pool_wait_seconds",
+    "Time a request waited for a pooled connection",
+    ["host"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+LLM_POOL_CONNECTS = Counter(
+    "llm_http_pool_connects_total",
+    "New connections opened by the LLM HTTP pool",
+    ["host"],
+)
+
+_Trace = Callable[[str, dict[str, Any]], Awaitable[None]]
+
+
+class _MeteredTransport(httpx.AsyncBaseTransport):
+    """Records pool wait, new connections and pool occupancy for one endpoint.
+
+    httpcore emits its first trace event once the request holds a connection, either
+    to open it (``connection.connect_tcp``) or to send headers on a reused one, so the
+    time until that first event is the wait for a free slot in the pool.
+    """
+
+    def __init__(self, host: str, inner: httpx.AsyncHTTPTransport) -> None:
+        self._host = host
+        self._inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        waited = False
+        outer: _Trace | None = request.extensions.get("trace")
+
+        async def trace(event: str, info: dict[str, Any]) -> None:
+            nonlocal waited
+            if not waited:
+                waited = True
+                LLM_POOL_WAIT.labels(host=self._host).observe(time.perf_counter() - start)
+            if event == "connection.connect_tcp.started":
+                LLM_POOL_CONNECTS.labels(host=self._host).inc()
+            if outer is not None:
+                await outer(event, info)
+
+        request.extensions = {**request.extensions, "trace": trace}
+        try:
+            return await self._inner.handle_async_request(request)
+        finally:
+            self.record_pool()
+
+    def record_pool(self) -> None:
+        pool = getattr(self._inner, "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is None:
+            return
+        idle = sum(1 for c in connections if c.is_idle())
+        LLM_POOL_CONNECTIONS.labels(host=self._host, state="idle").set(idle)
+        LLM_POOL_CONNECTIONS.labels(host=self._host, state="in_use").set(len(connections) - idle)
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+class LLMTransportManager:
+    """One long-lived ``httpx.AsyncClient`` per provider origin.
+
+    Providers used to build a client per request, paying a TCP and TLS handshake on
+    every call. Clients here are keyed by scheme, host and port, speak HTTP/2 when
+    ``h2`` is installed, keep connections alive between requests and cap connections
+    per host. Connections belong to the event loop that opened them, so each running
+    loop (the API's, a job worker's) gets its own clients. Call :meth:`aclose` on
+    shutdown from every loop that used the manager.
+    """
+
+    def __init__(
+        self,
+        *,
+        http2: bool = True,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 60.0,
+        timeout: httpx.Timeout | None = None,
+    ) -> None:
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = timeout or httpx.Timeout(60.0, connect=5.0)
+        self._clients: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[str, httpx.AsyncClient]
+        ] = weakref.WeakKeyDictionary()
+        if http2 and not HTTP2_AVAILABLE:
+            logger.info("h2 not installed, LLM clients will use HTTP/1.1")
+
+    @classmethod
+    def from_settings(cls) -> LLMTransportManager:
+        s = get_settings()
+        return cls(
+            http2=s.llm.http2,
+            max_connections=s.llm.max_connections_per_host,
+            max_keepalive_connections=s.llm.max_keepalive_connections,
+            keepalive_expiry=s.llm.keepalive_expiry_seconds,
+            timeout=httpx.Timeout(s.retry.request_timeout_seconds, connect=5.0),
+        )
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        """Pooled client for the origin of ``url`` on the running loop, created on first use."""
+        clients = self._clients.setdefault(asyncio.get_running_loop(), {})
+        parsed = httpx.URL(url)
+        key = f"{parsed.scheme}://{parsed.netloc.decode()}"
+        client = clients.get(key)
+        if client is None or client.is_closed:
+            transport = _MeteredTransport(
+                parsed.host,
+                httpx.AsyncHTTPTransport(http2=self.http2, limits=self.limits),
+            )
+            client = httpx.AsyncClient(transport=transport, timeout=self.timeout)
+            clients[key] = client
+            logger.debug("Created pooled LLM client", origin=key, http2=self.http2)
+        return client
+
+    async def aclose(self) -> None:
+        """Close the clients of the running loop."""
+        clients = self._clients.pop(asyncio.get_running_loop(), {})
+        await asyncio.gather(*(c.aclose() for c in clients.values()), return_exceptions=True)
+
+
+@cache
+def llm_transport() -> LLMTransportManager:
+    return LLMTransportManager.from_settings()
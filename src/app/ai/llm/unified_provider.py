@@ -10,6 +10,7 @@ from opentelemetry import trace
 from opentelemetry.trace import Status, StatusCode
 
 from app.ai.llm.base import LLMProvider
+from app.ai.llm.transport import llm_transport
 from app.ai.types import Message
 from app.ai.validation import LLMMessage, MessageRole, ValidationResult
 from app.core.exceptions import ExternalServiceException, retry_on_error
@@ -39,14 +40,24 @@ class LLMAdapter(Protocol):
 
 
 class UnifiedLLMProvider(LLMProvider):
-    def __init__(self, adapter: LLMAdapter | list[LLMAdapter] | tuple[LLMAdapter, ...]) -> None:
+    def __init__(
+        self,
+        adapter: LLMAdapter | list[LLMAdapter] | tuple[LLMAdapter, ...],
+        client: httpx.AsyncClient | None = None,
+    ) -> None:
         # ruff UP038
         self._adapters = tuple(adapter) if isinstance(adapter, list | tuple) else (adapter,)
         self._tracer = trace.get_tracer("llm.unified")
-        self._client = httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=5.0))
+        # Without an explicit client, requests go through the shared per-endpoint pools,
+        # which outlive this provider and are closed at application shutdown.
+        self._client = client
+
+    def _client_for(self, adapter: LLMAdapter) -> httpx.AsyncClient:
+        return self._client or llm_transport().client_for(adapter.endpoint())
 
     async def aclose(self) -> None:
-        await self._client.aclose()
+        if self._client is not None:
+            await self._client.aclose()
 
     async def __aenter__(self) -> UnifiedLLMProvider:
         return self
@@ -154,7 +165,7 @@ class UnifiedLLMProvider(LLMProvider):
                     )
                     try:
                         payload = adapter.build_payload(model, clean_messages)
-                        resp = await self._client.post(
+                        resp = await self._client_for(adapter).post(
                             adapter.endpoint(), json=payload, headers=adapter.headers()
                         )
                         resp.raise_for_status()
@@ -222,7 +233,9 @@ class UnifiedLLMProvider(LLMProvider):
                     )
                     agen: AsyncIterator[str] | None = None
                     try:
-                        agen = adapter.stream(self._client, model, clean_messages, **kwargs)
+                        agen = adapter.stream(
+                            self._client_for(adapter), model, clean_messages, **kwargs
+                        )
                         first = await agen.__anext__()
                         span.set_attribute("llm.provider.used", adapter.name())
                         span.set_attribute("llm.fallback_used", bool(idx > 0))
@@ -305,7 +318,9 @@ class UnifiedLLMProvider(LLMProvider):
                         f"Attempting raw chat with adapter {adapter.name()} (attempt {idx + 1})"
                     )
                     try:
-                        out = await adapter.chat_raw(self._client, model, clean, **kwargs)
+                        out = await adapter.chat_raw(
+                            self._client_for(adapter), model, clean, **kwargs
+                        )
                         span.set_attribute("llm.provider.used", adapter.name())
                         span.set_attribute("llm.fallback_used", bool(idx > 0))
                         logger.info(f"Successfully completed raw chat with {adapter.name()}")
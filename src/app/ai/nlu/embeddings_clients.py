@@ -67,6 +67,117 @@ def _get_tfidf_vectorizer() -> type[TfidfVectorizerProtocol] | None:
         return None
 
 
+_U64 = np.uint64
+_FNV_OFFSET = _U64(0xCBF29CE484222325)
+_FNV_PRIME = _U64(0x100000001B3)
+_MIX_1 = _U64(0xBF58476D1CE4E5B9)
+_MIX_2 = _U64(0x94D049BB133111EB)
+_GOLDEN = _U64(0x9E3779B97F4A7C15)
+# (strategy, seed) salts for the word, bigram and position features.
+_FEATURE_SALTS = tuple(_U64(0x5851F42D4C957F2D * (k + 1) & 0xFFFFFFFFFFFFFFFF) for k in range(6))
+
+
+def _mix64(x: NDArray[np.uint64]) -> NDArray[np.uint64]:
+    """splitmix64 finalizer, applied element-wise."""
+    x = (x ^ (x >> _U64(30))) * _MIX_1
+    x = (x ^ (x >> _U64(27))) * _MIX_2
+    return x ^ (x >> _U64(31))
+
+
+def _fnv1a64(words: Sequence[str]) -> NDArray[np.uint64]:
+    """64-bit FNV-1a of each word's UTF-8 bytes, vectorised across words."""
+    raw = [w.encode("utf-8") for w in words]
+    lengths = np.fromiter(map(len, raw), dtype=np.int64, count=len(raw))
+    h = np.full(len(raw), _FNV_OFFSET, dtype=np.uint64)
+    if not raw:
+        return h
+    # Words are padded only to the longest word of their power-of-two length class, so
+    # one very long token (a URL, a pasted blob) does not widen the table for all words.
+    length_class = np.frexp(lengths.astype(np.float64))[1]
+    for cls in np.unique(length_class).tolist():
+        idx = np.flatnonzero(length_class == cls)
+        group = lengths[idx]
+        width = int(group.max())
+        if width == 0:
+            continue
+        table = np.array([raw[i] for i in idx.tolist()], dtype=f"S{width}")
+        table = table.view(np.uint8).reshape(len(idx), width)
+        shortest = int(group.min())
+        g = h[idx]
+        for col in range(width):
+            stepped = (g ^ table[:, col].astype(np.uint64)) * _FNV_PRIME
+            g = stepped if col < shortest else np.where(group > col, stepped, g)
+        h[idx] = g
+    return _mix64(h ^ lengths.astype(np.uint64))
+
+
+def hash_embeddings(
+    texts: Sequence[str], dim: int = 384, max_words: int = 50
+) -> NDArray[np.float32]:
+    """Deterministic feature-hashing embeddings for a batch of texts.
+
+    Each of the first ``max_words`` words contributes a word, a next-word bigram and a
+    position (mod 10) feature under two seeds, weighted by ``1 / sqrt(position + 1)``.
+    Words are hashed once per batch with FNV-1a, features are derived by mixing the word
+    hashes, accumulated into one ``(len(texts), dim)`` matrix and L2-normalised.
+
+    Args:
+        texts: Texts to embed
+        dim: Embedding dimension
+        max_words: Number of leading words of each text that contribute features
+
+    Returns:
+        float32 array of shape ``(len(texts), dim)``; empty texts map to zero vectors
+    """
+    vocab: dict[str, int] = {}
+    rows: list[int] = []
+    word_ids: list[int] = []
+    next_ids: list[int] = []
+    counts: list[int] = []
+    for row, text in enumerate(texts):
+        ids = [vocab.setdefault(w, len(vocab)) for w in (text or "").lower().split()]
+        if not ids:
+            continue
+        k = min(len(ids), max_words)
+        rows.append(row)
+        counts.append(k)
+        word_ids.extend(ids[:k])
+        next_ids.extend(ids[1 : k + 1] if k < len(ids) else ids[1:] + ids[:1])
+
+    out = np.zeros((len(texts), dim), dtype=np.float32)
+    if not rows:
+        return out
+
+    word_hash = _fnv1a64(list(vocab))
+    seg = np.asarray(counts, dtype=np.int64)
+    token_rows = np.repeat(np.asarray(rows, dtype=np.int64), seg)
+    pos = np.arange(len(word_ids), dtype=np.int64) - np.repeat(np.cumsum(seg) - seg, seg)
+    weights = 1.0 / np.sqrt(pos + 1.0)
+
+    w = word_hash[np.asarray(word_ids, dtype=np.int64)]
+    nxt = word_hash[np.asarray(next_ids, dtype=np.int64)]
+    bases = (
+        w,
+        _mix64(w * _GOLDEN + nxt),
+        _mix64(w + (pos % 10 + 1).astype(np.uint64) * _GOLDEN),
+    )
+    features = np.concatenate(
+        [
+            _mix64(base ^ _FEATURE_SALTS[2 * s + seed])
+            for s, base in enumerate(bases)
+            for seed in (0, 1)
+        ]
+    )
+    cols = (features % _U64(dim)).astype(np.int64)
+    flat = np.tile(token_rows * dim, 6) + cols
+    acc = np.bincount(flat, weights=np.tile(weights, 6), minlength=len(texts) * dim)
+    out[:] = acc.reshape(len(texts), dim)
+
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    np.divide(out, norms, out=out, where=norms > 0)
+    return out
+
+
 class EmbeddingClient:
     def encode(self, texts: Sequence[str], batch_size: int = 256) -> NDArray[np.float32]:
         raise NotImplementedError
@@ -382,11 +493,7 @@ class LocalEmbeddingClient(EmbeddingClient):
             self._vectorizer = None
 
     def _simple_hash_embedding(self, text: str, dim: int = 384) -> list[float]:
-        """Ultra-lightweight hash-based embedding as fallback.
-
-        This method generates embeddings using a combination of hash functions
-        and positional weighting to create a reasonable approximation of semantic
-        similarity for basic text classification tasks.
+        """Ultra-lightweight hash-based embedding of a single text.
 
         Args:
             text: Input text to embed
@@ -395,89 +502,7 @@ class LocalEmbeddingClient(EmbeddingClient):
         Returns:
             Normalized embedding vector as list of floats
         """
-        import hashlib
-
-        if not text or not text.strip():
-            logger.debug("empty_text_provided_for_hash_embedding")
-            return [0.0] * dim
-
-        try:
-            # Create multiple hash features with different strategies
-            features = [0.0] * dim
-            text_cleaned = text.lower().strip()
-            words = text_cleaned.split()
-
-            if not words:
-                logger.debug("no_words_found_after_preprocessing", text_length=len(text))
-                return [0.0] * dim
-
-            # Multiple hash strategies for robustness
-            def word_hash(word: str, seed: int) -> str:
-                return f"{word}_{seed}"
-
-            def bigram_hash(word: str, seed: int) -> str:
-                try:
-                    next_word = words[(words.index(word) + 1) % len(words)]
-                    return f"{word}_{next_word}_{seed}"
-                except (ValueError, IndexError):
-                    return f"{word}_solo_{seed}"
-
-            def position_hash(word: str, seed: int) -> str:
-                try:
-                    pos = words.index(word) % 10
-                    return f"{word}_{pos}_{seed}"
-                except ValueError:
-                    return f"{word}_nopos_{seed}"
-
-            hash_strategies = [
-                ("word_hash", word_hash),
-                ("bigram_hash", bigram_hash),
-                ("position_hash", position_hash),
-            ]
-
-            for i, word in enumerate(words[:50]):  # Limit to first 50 words for performance
-                for strategy_name, hash_func in hash_strategies:
-                    for seed in range(2):  # Reduced seeds for performance
-                        try:
-                            hash_input = hash_func(word, seed)
-                            hash_val = int(hashlib.md5(hash_input.encode()).hexdigest(), 16)
-                            idx = hash_val % dim
-
-                            # Position-based weighting with decay
-                            weight = 1.0 / (i + 1) ** 0.5
-                            features[idx] += weight
-
-                        except (ValueError, IndexError) as e:
-                            logger.debug(
-                                "hash_computation_error_skipped",
-                                error=str(e),
-                                word=word,
-                                strategy=strategy_name,
-                            )
-                            continue
-
-            # L2 normalization for consistency with TF-IDF
-            norm = sum(f * f for f in features) ** 0.5
-            if norm > 0:
-                features = [f / norm for f in features]
-            else:
-                logger.debug("zero_norm_vector_using_uniform_fallback", text_length=len(text))
-                # Uniform fallback for zero vectors
-                uniform_value = 1.0 / (dim**0.5)
-                features = [uniform_value] * dim
-
-            return features
-
-        except Exception as e:
-            logger.error(
-                "hash_embedding_generation_failed",
-                error=str(e),
-                error_type=type(e).__name__,
-                text_length=len(text),
-                dimension=dim,
-            )
-            # Return zero vector on failure
-            return [0.0] * dim
+        return cast("list[float]", hash_embeddings([text], dim)[0].tolist())
 
     def encode(self, texts: Sequence[str], batch_size: int = 256) -> NDArray[np.float32]:
         """Encode texts to embeddings using TF-IDF or hash-based fallback.
@@ -551,32 +576,12 @@ class LocalEmbeddingClient(EmbeddingClient):
         )
 
         try:
-            embeddings = []
-            failed_count = 0
-
-            for i, text in enumerate(texts):
-                try:
-                    embedding = self._simple_hash_embedding(text, self._fallback_dim)
-                    embeddings.append(embedding)
-                except Exception as e:
-                    logger.debug(
-                        "individual_text_embedding_failed",
-                        text_index=i,
-                        error=str(e),
-                        text_preview=text[:50] if text else "empty",
-                    )
-                    failed_count += 1
-                    # Use zero vector for failed embeddings
-                    embeddings.append([0.0] * self._fallback_dim)
-
-            result = np.asarray(embeddings, dtype=np.float32)
+            result = hash_embeddings(texts, self._fallback_dim)
             duration_ms = (time.time() - start_time) * 1000
 
             logger.info(
                 "hash_based_encoding_completed",
                 text_count=text_count,
-                failed_count=failed_count,
-                success_rate=1.0 - (failed_count / text_count) if text_count > 0 else 1.0,
                 embedding_shape=result.shape,
                 duration_ms=duration_ms,
                 method="hash_based",
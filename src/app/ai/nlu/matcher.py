@@ -0,0 +1,164 @@
+"""Precompiled pattern matching for the rule-based NLU parser."""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from functools import cache
+from re import _constants as sre_constants  # type: ignore[attr-defined]
+from re import _parser as sre_parse  # type: ignore[attr-defined]
+from typing import Any
+
+from app.ai.nlu.patterns import NLUPatterns, get_nlu_patterns
+
+CREATE_VERBS = r"\b(?:create|make|new|provision|deploy|setup|add)\b"
+
+_REPEATS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT, sre_constants.POSSESSIVE_REPEAT)
+
+
+def _required_literals(items: Iterable[tuple[Any, Any]]) -> frozenset[str] | None:
+    """Most selective set of literals one of which occurs in every match, if any."""
+    candidates: list[frozenset[str]] = []
+    run: list[str] = []
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            run.append(chr(av))
+            continue
+        if run:
+            candidates.append(frozenset({"".join(run)}))
+            run = []
+        inner: frozenset[str] | None = None
+        if op is sre_constants.SUBPATTERN:
+            inner = _required_literals(av[-1])
+        elif op is sre_constants.BRANCH:
+            alts = [_required_literals(alt) for alt in av[1]]
+            if all(alts):
+                inner = frozenset().union(*alts)  # type: ignore[arg-type]
+        elif op in _REPEATS and av[0] >= 1:
+            inner = _required_literals(av[2])
+        if inner:
+            candidates.append(inner)
+    if run:
+        candidates.append(frozenset({"".join(run)}))
+    if not candidates:
+        return None
+    return min(candidates, key=lambda s: (len(s), -min(map(len, s))))
+
+
+def literal_anchors(pattern: str) -> frozenset[str] | None:
+    """Literals that must appear in any text ``pattern`` matches, or None if unknown."""
+    try:
+        return _required_literals(sre_parse.parse(pattern))
+    except Exception:  # noqa: BLE001
+        return None
+
+
+@dataclass(slots=True, eq=False)
+class _Rule:
+    key: str
+    pattern: re.Pattern[str]
+    anchors: frozenset[str] | None
+
+
+@dataclass(slots=True)
+class NLUMatches:
+    """Everything the NLU patterns found in one normalized text."""
+
+    intent_hits: dict[str, int] = field(default_factory=dict)
+    resource_matches: dict[str, list[re.Match[str]]] = field(default_factory=dict)
+    hint_positions: dict[str, list[tuple[str, int]]] = field(default_factory=dict)
+    location: str | None = None
+    in_context: bool = False
+    compliance: list[str] = field(default_factory=list)
+
+
+class NLUMatcher:
+    """Runs all NLU patterns over a text, skipping the ones that cannot match.
+
+    Every pattern is compiled once and tagged with the literals it requires. One pass
+    over the literal table finds which literals, keyword hints included, occur in the
+    text, and only patterns whose literals are present are searched. Texts must already
+    be normalized with ``str.lower``; patterns are compiled case-sensitively since the
+    normalized text makes ``IGNORECASE`` redundant.
+    """
+
+    def __init__(self, patterns: NLUPatterns) -> None:
+        def rules(items: Iterable[tuple[str, str]]) -> list[_Rule]:
+            return [_Rule(k, re.compile(p), literal_anchors(p)) for k, p in items]
+
+        self.intent_rules = rules(
+            (k, p) for k, pats in patterns.intent_patterns.items() for p in pats
+        )
+        self.resource_rules = rules(
+            (k, p) for k, pats in patterns.resource_patterns.items() for p in pats
+        )
+        self.location_rules = rules((loc, p) for p, loc in patterns.location_patterns)
+        self.in_context_rules = rules(("in_context", p) for p in patterns.in_context_patterns)
+        self.compliance_rules = rules((k, p) for k, p in patterns.compliance_patterns.items())
+        self.resource_types = tuple(patterns.resource_patterns)
+        self.keyword_hints = patterns.keyword_hints
+        self.contextual_resources = patterns.contextual_resources
+        self.create_verbs = re.compile(CREATE_VERBS)
+
+        self._unanchored: list[_Rule] = []
+        self._by_literal: dict[str, list[_Rule]] = {
+            h: [] for hints in patterns.keyword_hints.values() for h in hints
+        }
+        for group in (
+            self.intent_rules,
+            self.resource_rules,
+            self.location_rules,
+            self.in_context_rules,
+            self.compliance_rules,
+        ):
+            for rule in group:
+                if rule.anchors is None:
+                    self._unanchored.append(rule)
+                for lit in rule.anchors or ():
+                    self._by_literal.setdefault(lit, []).append(rule)
+        self._literals = tuple(sorted(self._by_literal))
+
+    def present_literals(self, text: str) -> set[str]:
+        """Every known literal that occurs somewhere in ``text``."""
+        return {lit for lit in self._literals if lit in text}
+
+    def scan(self, text: str) -> NLUMatches:
+        present = self.present_literals(text)
+        active = set(self._unanchored)
+        for lit in present:
+            active.update(self._by_literal[lit])
+        out = NLUMatches()
+
+        for rule in self.intent_rules:
+            if rule in active and rule.pattern.search(text):
+                out.intent_hits[rule.key] = out.intent_hits.get(rule.key, 0) + 1
+        for rule in self.resource_rules:
+            if rule in active and (m := rule.pattern.search(text)):
+                out.resource_matches.setdefault(rule.key, []).append(m)
+        for rtype, hints in self.keyword_hints.items():
+            found = [(h, text.find(h)) for h in hints if h in present]
+            if found:
+                out.hint_positions[rtype] = found
+        for rule in self.location_rules:
+            if rule in active and rule.pattern.search(text):
+                out.location = rule.key
+                break
+        out.in_context = any(
+            rule in active and rule.pattern.search(text) for rule in self.in_context_rules
+        )
+        out.compliance = [
+            rule.key
+            for rule in self.compliance_rules
+            if rule in active and rule.pattern.search(text)
+        ]
+        return out
+
+    def create_verb_before(self, text: str, end: int) -> bool:
+        """True if a create verb occurs in ``text[:end]``."""
+        return self.create_verbs.search(text, 0, end) is not None
+
+
+@cache
+def get_nlu_matcher() -> NLUMatcher:
+    return NLUMatcher(get_nlu_patterns())
@@ -1,15 +1,48 @@
 from __future__ import annotations
 
 import re
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from datetime import UTC, datetime
 from enum import Enum
 from typing import TYPE_CHECKING, Any, cast
 
+from prometheus_client import Counter
+
+from app.ai.nlu.matcher import NLUMatches, get_nlu_matcher
+from app.core.logging import get_logger
+
 if TYPE_CHECKING:
     from app.ai.nlu.embeddings_classifier import EmbeddingsClassifierService
 
 
+logger = get_logger(__name__)
+
+NLU_PARSE_CACHE = Counter(
+    "nlu_parse_cache_total", "Rule-based NLU parse cache lookups", labelnames=("result",)
+)
+
+PARSE_CACHE_SIZE = 2048
+
+_PATTERN_CONTEXTUAL = frozenset({"resource_group"})
+_NAME_PATTERNS = (
+    re.compile(r"(?:named|called|name)\s+([a-z0-9][\w-]{2,79})", re.IGNORECASE),
+    re.compile(r"([a-z0-9][\w-]{2,79})\s+(?:in|for|at)", re.IGNORECASE),
+)
+_RESOURCE_GROUP_PATTERNS = (
+    re.compile(r"resource\s+group\s+([a-z0-9][\w-]{0,89})", re.IGNORECASE),
+    re.compile(r"rg\s+([a-z0-9][\w-]{0,89})", re.IGNORECASE),
+    re.compile(r"in\s+(?:resource\s+group|rg)\s+([a-z0-9][\w-]{0,89})", re.IGNORECASE),
+    re.compile(r"group\s+([a-z0-9][\w-]{0,89})", re.IGNORECASE),
+    re.compile(r"\bin\s+([a-z0-9][\w-]{0,89})\s+in\s+", re.IGNORECASE),
+)
+_ENV_PATTERN = re.compile(
+    r"\b(dev|development|test|testing|staging|stage|prod|production|uat)\b", re.IGNORECASE
+)
+_SKU_PATTERN = re.compile(r"(?:sku|tier|size)\s+([a-z0-9_]+)", re.IGNORECASE)
+
+
 class DeploymentIntent(Enum):
     create = "create"
     update = "update"
@@ -49,9 +82,6 @@ class UnifiedParseResult:
         try:
             from app.common.envs import normalize_env
         except Exception as e:
-            from app.core.logging import get_logger
-
-            logger = get_logger(__name__)
             logger.warning(
                 "normalize_env_import_failed",
                 error=str(e),
@@ -113,11 +143,51 @@ class UnifiedParseResult:
         }
 
 
-def _to_scores_list(x: Any) -> list[float]:
-    from app.core.logging import get_logger
+@dataclass(frozen=True, slots=True)
+class _RuleParse:
+    intent: DeploymentIntent
+    resource_type: str
+    resource_name: str | None
+    parameters: dict[str, Any]
+    advanced: dict[str, Any]
+    confidence: float
+
+
+class _ParseCache:
+    """Thread-safe LRU of rule-based parse results keyed by normalized text."""
+
+    def __init__(self, max_items: int) -> None:
+        self._max = max(1, max_items)
+        self._data: OrderedDict[str, _RuleParse] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> _RuleParse | None:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: _RuleParse) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self._max:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_parse_cache = _ParseCache(PARSE_CACHE_SIZE)
 
-    logger = get_logger(__name__)
 
+def clear_parse_cache() -> None:
+    _parse_cache.clear()
+
+
+def _to_scores_list(x: Any) -> list[float]:
     try:
         import numpy as np
 
@@ -197,28 +267,9 @@ class unified_nlu_parser:
         dimensions: int | None = None,
         local_model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
     ) -> None:
-        from app.ai.nlu.patterns import get_nlu_patterns
-
-        patterns = get_nlu_patterns()
-        self.location_patterns: list[tuple[re.Pattern[str], str]] = [
-            (re.compile(p, re.IGNORECASE), loc) for p, loc in patterns.location_patterns
-        ]
-        self.resource_patterns: dict[str, list[re.Pattern[str]]] = {
-            k: [re.compile(p, re.IGNORECASE) for p in v]
-            for k, v in patterns.resource_patterns.items()
-        }
-        self.intent_patterns: dict[DeploymentIntent, list[re.Pattern[str]]] = {
-            DeploymentIntent(k): [re.compile(p, re.IGNORECASE) for p in v]
-            for k, v in patterns.intent_patterns.items()
-        }
-        self.keyword_hints = patterns.keyword_hints
-        self.contextual_resources = patterns.contextual_resources
-        self.in_context_patterns = [
-            re.compile(p, re.IGNORECASE) for p in patterns.in_context_patterns
-        ]
-        self.compliance_patterns = {
-            k: re.compile(v, re.IGNORECASE) for k, v in patterns.compliance_patterns.items()
-        }
+        self._matcher = get_nlu_matcher()
+        self.keyword_hints = self._matcher.keyword_hints
+        self.contextual_resources = self._matcher.contextual_resources
 
         self._emb: EmbeddingsClassifierService | None = None
         if use_embeddings:
@@ -245,10 +296,6 @@ class unified_nlu_parser:
         )
 
     def parse(self, text: str) -> UnifiedParseResult:
-        from app.core.logging import get_logger
-
-        logger = get_logger(__name__)
-
         try:
             t = text.lower().strip()
 
@@ -259,18 +306,20 @@ class unified_nlu_parser:
                 has_embeddings=self._emb is not None,
             )
 
-            intent = self._detect_intent(t)
-            rtype = self._detect_resource_type(t)
-            rname = self._extract_resource_name(t, rtype)
-            params = self._extract_parameters(t, rtype)
-
-            if rname and "name" not in params:
-                params["name"] = rname
-                logger.debug("nlu_resource_name_added", resource_name=rname)
-
+            rules = _parse_cache.get(t)
+            cached = rules is not None
+            NLU_PARSE_CACHE.labels(result="hit" if cached else "miss").inc()
+            if rules is None:
+                rules = self._rule_parse(t)
+                _parse_cache.put(t, rules)
+
+            intent = rules.intent
+            rtype = rules.resource_type
+            rname = rules.resource_name
+            params = dict(rules.parameters)
             ctx = self._build_context(t, params)
-            adv = self._build_advanced_context(t, intent, rtype)
-            conf = self._confidence(t, intent, rtype, bool(rname))
+            adv = {k: list(v) if isinstance(v, list) else v for k, v in rules.advanced.items()}
+            conf = rules.confidence
 
             emb_scores: list[float] | None = None
             if self._emb:
@@ -317,6 +366,7 @@ class unified_nlu_parser:
                 parameters_count=len(params),
                 context_keys=len(ctx),
                 advanced_context_keys=len(adv),
+                cached=cached,
             )
 
             return result
@@ -347,58 +397,54 @@ class unified_nlu_parser:
         r = self.parse(text)
         return r.action, r.parameters
 
-    def _detect_intent(self, text: str) -> DeploymentIntent:
-        scores: dict[DeploymentIntent, int] = {}
-        for k, pats in self.intent_patterns.items():
-            s = 0
-            for pat in pats:
-                if pat.search(text):
-                    s += 2
-            if s > 0:
-                scores[k] = s
-        if not scores:
-            return DeploymentIntent.create
-        return max(scores, key=lambda k: scores[k])
-
-    def _detect_resource_type(self, text: str) -> str:
-        from app.core.logging import get_logger
-
-        logger = get_logger(__name__)
+    def _rule_parse(self, text: str) -> _RuleParse:
+        matches = self._matcher.scan(text)
+        intent = self._detect_intent(matches)
+        rtype = self._detect_resource_type(text, matches)
+        rname = self._extract_resource_name(text, rtype, matches)
+        params = self._extract_parameters(text, rtype, matches)
+
+        if rname and "name" not in params:
+            params["name"] = rname
+            logger.debug("nlu_resource_name_added", resource_name=rname)
+
+        return _RuleParse(
+            intent=intent,
+            resource_type=rtype,
+            resource_name=rname,
+            parameters=params,
+            advanced=self._build_advanced_context(text, intent, rtype, matches),
+            confidence=self._confidence(text, intent, rtype, bool(rname)),
+        )
 
-        scores: dict[str, int] = {}
-        contextual_resources = {"resource_group"}
+    def _detect_intent(self, matches: NLUMatches) -> DeploymentIntent:
+        if not matches.intent_hits:
+            return DeploymentIntent.create
+        best = max(matches.intent_hits, key=lambda k: matches.intent_hits[k])
+        return DeploymentIntent(best)
 
+    def _detect_resource_type(self, text: str, matches: NLUMatches) -> str:
         logger.debug("NLU resource type detection", text=text[:100])
 
-        for rtype, pats in self.resource_patterns.items():
+        verb_before = self._matcher.create_verb_before
+        scores: dict[str, int] = {}
+        for rtype in self._matcher.resource_types:
             s = 0
-            for pat in pats:
-                match = pat.search(text)
-                if match:
-                    s += 2
-                    if rtype not in contextual_resources:
-                        start_pos = match.start()
-                        create_verbs = r"\b(?:create|make|new|provision|deploy|setup|add)\b"
-                        text_before_match = text[: start_pos + 50]
-                        if re.search(create_verbs, text_before_match):
-                            s += 10
-
-            for hint in self.keyword_hints.get(rtype, []):
-                if hint in text:
-                    hint_score = 1
-                    if rtype not in self.contextual_resources:
-                        create_verbs = r"\b(?:create|make|new|provision|deploy|setup|add)\b"
-                        hint_pos = text.find(hint)
-                        text_before_hint = text[: hint_pos + len(hint) + 50]
-                        if re.search(create_verbs, text_before_hint):
-                            hint_score += 5
-                    s += hint_score
-
-            if rtype in self.contextual_resources:
-                for pattern in self.in_context_patterns:
-                    if pattern.search(text):
-                        s = min(s, 3)
-                        break
+            for match in matches.resource_matches.get(rtype, ()):
+                s += 2
+                if rtype not in _PATTERN_CONTEXTUAL and verb_before(text, match.start() + 50):
+                    s += 10
+
+            for hint, hint_pos in matches.hint_positions.get(rtype, ()):
+                hint_score = 1
+                if rtype not in self.contextual_resources and verb_before(
+                    text, hint_pos + len(hint) + 50
+                ):
+                    hint_score += 5
+                s += hint_score
+
+            if rtype in self.contextual_resources and matches.in_context:
+                s = min(s, 3)
 
             if s > 0:
                 scores[rtype] = s
@@ -418,16 +464,11 @@ class unified_nlu_parser:
         )
         return best_type
 
-    def _extract_resource_name(self, text: str, rtype: str) -> str | None:
-        if rtype in self.resource_patterns:
-            for pat in self.resource_patterns[rtype]:
-                m = pat.search(text)
-                if m and m.groups():
-                    return m.group(m.lastindex or 1)
-        for pat2 in [
-            re.compile(r"(?:named|called|name)\s+([a-z0-9][\w-]{2,79})", re.IGNORECASE),
-            re.compile(r"([a-z0-9][\w-]{2,79})\s+(?:in|for|at)", re.IGNORECASE),
-        ]:
+    def _extract_resource_name(self, text: str, rtype: str, matches: NLUMatches) -> str | None:
+        for m in matches.resource_matches.get(rtype, ()):
+            if m.groups():
+                return m.group(m.lastindex or 1)
+        for pat2 in _NAME_PATTERNS:
             m2 = pat2.search(text)
             if m2:
                 c = m2.group(1)
@@ -435,29 +476,19 @@ class unified_nlu_parser:
                     return c
         return None
 
-    def _extract_parameters(self, text: str, rtype: str) -> dict[str, Any]:
+    def _extract_parameters(self, text: str, rtype: str, matches: NLUMatches) -> dict[str, Any]:
         params: dict[str, Any] = {}
-        for pat, loc in self.location_patterns:
-            if pat.search(text):
-                params["location"] = loc
-                break
-        for pat in [
-            re.compile(r"resource\s+group\s+([a-z0-9][\w-]{0,89})", re.IGNORECASE),
-            re.compile(r"rg\s+([a-z0-9][\w-]{0,89})", re.IGNORECASE),
-            re.compile(r"in\s+(?:resource\s+group|rg)\s+([a-z0-9][\w-]{0,89})", re.IGNORECASE),
-            re.compile(r"group\s+([a-z0-9][\w-]{0,89})", re.IGNORECASE),
-            re.compile(r"\bin\s+([a-z0-9][\w-]{0,89})\s+in\s+", re.IGNORECASE),
-        ]:
+        if matches.location:
+            params["location"] = matches.location
+        for pat in _RESOURCE_GROUP_PATTERNS:
             m = pat.search(text)
             if m:
                 params["resource_group"] = m.group(1)
                 break
-        m_env = re.compile(
-            r"\b(dev|development|test|testing|staging|stage|prod|production|uat)\b", re.IGNORECASE
-        ).search(text)
+        m_env = _ENV_PATTERN.search(text)
         if m_env:
             params["environment"] = m_env.group(1).lower()
-        m_sku = re.compile(r"(?:sku|tier|size)\s+([a-z0-9_]+)", re.IGNORECASE).search(text)
+        m_sku = _SKU_PATTERN.search(text)
         if m_sku:
             params["sku"] = m_sku.group(1).upper()
         if rtype == "storage":
@@ -486,15 +517,11 @@ class unified_nlu_parser:
         return ctx
 
     def _build_advanced_context(
-        self, text: str, intent: DeploymentIntent, rtype: str
+        self, text: str, intent: DeploymentIntent, rtype: str, matches: NLUMatches
     ) -> dict[str, Any]:
         adv: dict[str, Any] = {}
-        comp: list[str] = []
-        for name, pat in self.compliance_patterns.items():
-            if pat.search(text):
-                comp.append(name)
-        if comp:
-            adv["compliance_requirements"] = comp
+        if matches.compliance:
+            adv["compliance_requirements"] = list(matches.compliance)
         if any(s in text for s in ["encrypt", "secure", "private", "isolated"]):
             adv["security_enhanced"] = True
         if intent in {DeploymentIntent.update, DeploymentIntent.migrate}:
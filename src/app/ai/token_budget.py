@@ -0,0 +1,77 @@
+"""Running token accounting for chat message lists."""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+from app.ai.embeddings.tokenizer import count_tokens
+from app.ai.types import Message
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Role and separator tokens the chat format adds around every message.
+_MESSAGE_OVERHEAD = 4
+
+
+def message_tokens(message: Mapping[str, Any]) -> int:
+    content = message.get("content")
+    if content is None or isinstance(content, str):
+        text = content or ""
+    else:
+        text = json.dumps(content, ensure_ascii=False, default=str)
+    total = _MESSAGE_OVERHEAD + (count_tokens(text) if text else 0)
+    for call in message.get("tool_calls") or []:
+        fn = call.get("function") or {}
+        total += count_tokens(f"{fn.get('name', '')}{fn.get('arguments', '')}")
+    return total
+
+
+class MessageBudget:
+    """Token total of a chat that grows by appending, kept under ``limit``.
+
+    Each message is counted once, when :meth:`fit` first sees it. Over the limit, the
+    oldest messages other than ``keep`` (typically the system prompt and the current
+    request) are dropped, an assistant tool-call message together with its tool results
+    so the history stays valid for the provider. The newest turn is never dropped.
+    """
+
+    def __init__(self, messages: list[Message], limit: int, keep: Sequence[Message] = ()) -> None:
+        self.messages = messages
+        self.limit = limit
+        self.total = 0
+        self._keep = {id(m) for m in keep}
+        self._counts: list[int] = []
+
+    def fit(self) -> bool:
+        """Count new messages, trim if needed, and report whether the chat fits."""
+        for m in self.messages[len(self._counts) :]:
+            n = message_tokens(m)
+            self._counts.append(n)
+            self.total += n
+
+        dropped = 0
+        while self.total >= self.limit and (span := self._oldest_droppable()) is not None:
+            start, end = span
+            self.total -= sum(self._counts[start:end])
+            del self.messages[start:end]
+            del self._counts[start:end]
+            dropped += end - start
+        if dropped:
+            logger.info(
+                "chat_history_trimmed", dropped=dropped, tokens=self.total, limit=self.limit
+            )
+        return self.total < self.limit
+
+    def _oldest_droppable(self) -> tuple[int, int] | None:
+        for start, m in enumerate(self.messages):
+            if id(m) in self._keep:
+                continue
+            end = start + 1
+            if m.get("tool_calls"):
+                while end < len(self.messages) and self.messages[end].get("role") == "tool":
+                    end += 1
+            return (start, end) if end < len(self.messages) else None
+        return None
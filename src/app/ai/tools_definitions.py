@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 import copy
+import hashlib
+import json
+from dataclasses import dataclass
 
 from app.core.logging import get_logger
-from app.tools.registry import list_tools
+from app.tools.registry import add_registry_listener, list_tools
 
 logger = get_logger(__name__)
 
@@ -55,3 +58,44 @@ def build_openai_tools() -> list[dict[str, object]]:
 
     logger.info(f"Built {len(tools)} OpenAI tool schemas")
     return tools
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledTools:
+    """OpenAI tool definitions built once per registry state.
+
+    Tools are sorted by name and round-tripped through canonical JSON, so every process
+    sends byte-identical definitions whatever order tools were registered in, which
+    keeps the request prefix stable for provider-side prompt caching. Treat ``tools``
+    as read-only; it is shared by all callers.
+    """
+
+    tools: list[dict[str, object]]
+
+
+_compiled: CompiledTools | None = None
+
+
+def compiled_openai_tools() -> CompiledTools:
+    global _compiled
+    if _compiled is None:
+        built = sorted(build_openai_tools(), key=_tool_name)
+        tools_json = json.dumps(built, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        _compiled = CompiledTools(tools=json.loads(tools_json))
+        # Equal digests across processes confirm they send identical definitions.
+        digest = hashlib.sha256(tools_json.encode()).hexdigest()[:16]
+        logger.info("Compiled OpenAI tool schemas", count=len(built), digest=digest)
+    return _compiled
+
+
+def invalidate_compiled_tools() -> None:
+    global _compiled
+    _compiled = None
+
+
+def _tool_name(tool: dict[str, object]) -> str:
+    fn = tool.get("function")
+    return str(fn.get("name", "")) if isinstance(fn, dict) else ""
+
+
+add_registry_listener(invalidate_compiled_tools)
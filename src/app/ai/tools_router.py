@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import asyncio
+import inspect
 import json
 import re
-from collections.abc import Mapping, Sequence
+from collections.abc import Callable, Mapping, Sequence
 from dataclasses import dataclass
+from functools import cache
 from typing import Any, NotRequired, Protocol, TypedDict, cast, runtime_checkable
 
 from app.ai.arg_mapper import map_args_with_function_call
@@ -11,7 +14,8 @@ from app.ai.generator import generate_response
 from app.ai.llm.factory import get_provider_and_model
 from app.ai.nlu import maybe_map_provision, maybe_map_provision_async
 from app.ai.nlu.embeddings_classifier import EmbeddingsClassifierService
-from app.ai.tools_definitions import build_openai_tools
+from app.ai.token_budget import MessageBudget
+from app.ai.tools_definitions import compiled_openai_tools
 from app.ai.types import ChatHistory
 from app.ai.types import Message as AIMessage
 from app.common.envs import Env
@@ -52,6 +56,7 @@ class ToolExecutionContext:
     audit_logger: AuditLogger | None = None
     tool_execution_count: int = 0
     max_tool_executions: int = 10
+    max_parallel_tools: int = 4
     executed_tools: set[str] | None = None
     last_tool_output: str | None = None
 
@@ -140,109 +145,6 @@ async def _log_error(error: Exception, context: ToolExecutionContext | None) ->
     await context.audit_logger.log_event(event)
 
 
-def _estimate_tokens(messages: Sequence[dict[str, object]]) -> int:
-    from app.core.logging import get_logger
-
-    logger = get_logger(__name__)
-    total = 0
-
-    try:
-        for m in messages:
-            try:
-                c = m.get("content")
-                if isinstance(c, str):
-                    total += max(1, len(c) // 4)
-                elif isinstance(c, dict):
-                    total += max(1, len(json.dumps(c)) // 4)
-                else:
-                    logger.debug(
-                        "message_content_unknown_type",
-                        content_type=type(c).__name__,
-                        message_keys=list(m.keys()) if isinstance(m, dict) else [],
-                    )
-            except Exception as e:
-                logger.warning(
-                    "message_processing_failed",
-                    error=str(e),
-                    error_type=type(e).__name__,
-                    message_preview=str(m)[:100] if m else "None",
-                )
-    except Exception as e:
-        logger.error(
-            "token_estimation_failed", error=str(e), error_type=type(e).__name__, fallback_zero=True
-        )
-        return 0
-
-    return total
-
-
-def _within_budget(messages: Sequence[dict[str, object]], limit: int) -> bool:
-    try:
-        return _estimate_tokens(messages) < limit
-    except Exception as e:
-        from app.core.logging import get_logger
-
-        logger = get_logger(__name__)
-        logger.warning(
-            "budget_check_failed",
-            error=str(e),
-            error_type=type(e).__name__,
-            limit=limit,
-            fallback_false=True,
-        )
-        return False
-
-
-def _within_budget_ai_messages(messages: list[AIMessage], limit: int) -> bool:
-    from app.core.logging import get_logger
-
-    logger = get_logger(__name__)
-
-    try:
-        converted_messages: list[dict[str, object]] = []
-
-        for msg in messages:
-            try:
-                converted_msg: dict[str, object] = {
-                    "role": msg.get("role", ""),
-                    "content": msg.get("content", ""),
-                }
-
-                if "tool_calls" in msg and msg["tool_calls"]:
-                    converted_msg["tool_calls"] = msg["tool_calls"]
-
-                if "tool_call_id" in msg and msg["tool_call_id"]:
-                    converted_msg["tool_call_id"] = msg["tool_call_id"]
-
-                if "name" in msg and msg["name"]:
-                    converted_msg["name"] = msg["name"]
-
-                converted_messages.append(converted_msg)
-
-            except Exception as e:
-                logger.warning(
-                    "message_conversion_failed",
-                    error=str(e),
-                    error_type=type(e).__name__,
-                    message_keys=list(msg.keys()) if isinstance(msg, dict) else [],
-                    skipping_message=True,
-                )
-                continue
-
-        return _within_budget(converted_messages, limit)
-
-    except Exception as e:
-        logger.error(
-            "ai_message_budget_check_failed",
-            error=str(e),
-            error_type=type(e).__name__,
-            limit=limit,
-            messages_count=len(messages) if hasattr(messages, "__len__") else "unknown",
-            fallback_false=True,
-        )
-        return False
-
-
 def _pick_args(raw_args: object) -> dict[str, object]:
     from app.core.logging import get_logger
 
@@ -445,6 +347,55 @@ async def _run_tool(
     return result
 
 
+def _has_side_effects(name: str, args: Mapping[str, object]) -> bool:
+    tool = get_tool(name)
+    return bool(tool.has_side_effects(args)) if tool else False
+
+
+def _tool_batches[T](
+    calls: Sequence[tuple[str, T]], args_of: Callable[[T], Mapping[str, object]]
+) -> list[list[tuple[str, T]]]:
+    """Split calls into runs of read-only calls and single calls that have side effects."""
+    batches: list[list[tuple[str, T]]] = []
+    batch_read_only = False
+    for name, payload in calls:
+        read_only = not _has_side_effects(name, args_of(payload))
+        if read_only and batch_read_only:
+            batches[-1].append((name, payload))
+        else:
+            batches.append([(name, payload)])
+        batch_read_only = read_only
+    return batches
+
+
+async def _run_tools_concurrently(
+    calls: Sequence[tuple[str, dict[str, object]]],
+    context: ToolExecutionContext | None = None,
+) -> list[dict[str, object]]:
+    """Run tool calls concurrently, up to ``context.max_parallel_tools``, results in order.
+
+    Tasks are created in call order and ``_run_tool`` updates the execution count and
+    duplicate check before its first await, so ``max_tool_executions`` is enforced
+    exactly as when the calls run one after another.
+    """
+    if len(calls) == 1:
+        name, args = calls[0]
+        return [await _run_tool(name, args, context)]
+    sem = asyncio.Semaphore(max(1, context.max_parallel_tools if context else 4))
+
+    async def run(name: str, args: dict[str, object]) -> dict[str, object]:
+        async with sem:
+            return await _run_tool(name, args, context)
+
+    tasks = [asyncio.create_task(run(name, args)) for name, args in calls]
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
 class ToolFunction(TypedDict, total=False):
     name: str
     arguments: object
@@ -482,6 +433,46 @@ class SupportsOpenAIToolsAPI(Protocol):
     ) -> ChatResponse: ...
 
 
+# Kept byte-identical across calls so providers can cache the prompt prefix.
+_ORCHESTRATOR_SYSTEM_PROMPT = (
+    "You are a DevOps assistant, an expert in infrastructure, "
+    "CI/CD, Kubernetes, Terraform, cloud platforms, monitoring, and automation. "
+    "Provide accurate, concise, production-ready guidance.\n\n"
+    "CRITICAL: You have access to powerful tools for Azure resource provisioning. "
+    "When users request Azure resource deployments, infrastructure changes, "
+    "or cloud operations, "
+    "you MUST use the available tools rather than just providing text explanations.\n\n"
+    "Available tools:\n"
+    "- azure_provision: For creating, modifying, or managing Azure resources "
+    "using AVM modules\n"
+    "- azure_costs: For cost analysis and optimization recommendations\n"
+    "- azure_quota_check: For checking subscription limits and quotas\n\n"
+    "IMPORTANT: When a tool execution succeeds "
+    "(status='created', 'deployed', or 'exists'), "
+    "the task is COMPLETE. Do NOT call the same tool again. "
+    "If a resource already exists, that means the request was fulfilled successfully."
+)
+
+
+@cache
+def _supports_tools(provider_type: type) -> bool:
+    """Whether ``provider_type.chat_raw`` can take ``tools``, probed once per class."""
+    chat_raw = getattr(provider_type, "chat_raw", None)
+    if chat_raw is None:
+        return False
+    try:
+        params = inspect.signature(chat_raw).parameters
+    except (TypeError, ValueError) as e:
+        # Let the actual call fail if incompatible
+        logger.warning(
+            "openai_orchestrator_compatibility_check_failed",
+            error=str(e),
+            provider_type=provider_type.__name__,
+        )
+        return True
+    return "tools" in params or any(p.kind is p.VAR_KEYWORD for p in params.values())
+
+
 async def _openai_tools_orchestrator(
     user_input: str,
     memory: Sequence[Mapping[str, str]] | None,
@@ -497,7 +488,7 @@ async def _openai_tools_orchestrator(
     logger = get_logger(__name__)
 
     ensure_tools_loaded()
-    tools = build_openai_tools()
+    tools = compiled_openai_tools().tools
     if not tools:
         logger.debug("openai_orchestrator_no_tools", provider=provider, model=model)
         return None
@@ -510,71 +501,15 @@ async def _openai_tools_orchestrator(
         tools_count=len(tools),
     )
 
-    if not hasattr(llm, "chat_raw"):
+    if not _supports_tools(type(llm)):
         logger.warning(
-            "openai_orchestrator_no_chat_raw_method",
+            "openai_orchestrator_no_tools_support",
             provider=provider,
             provider_type=type(llm).__name__,
         )
         return None
 
-    try:
-        # Check method signature compatibility for tools API
-        import inspect
-
-        sig = inspect.signature(llm.chat_raw)
-        params = list(sig.parameters.keys())
-        has_tools_param = "tools" in params or "kwargs" in params
-
-        if not has_tools_param:
-            logger.warning(
-                "openai_orchestrator_no_tools_support",
-                provider=provider,
-                provider_type=type(llm).__name__,
-                chat_raw_params=params,
-            )
-            return None
-
-        logger.debug(
-            "openai_orchestrator_tools_compatibility_verified",
-            provider=provider,
-            provider_type=type(llm).__name__,
-            has_tools_param=has_tools_param,
-        )
-
-    except Exception as e:
-        logger.warning(
-            "openai_orchestrator_compatibility_check_failed",
-            error=str(e),
-            error_type=type(e).__name__,
-            provider=provider,
-            provider_type=type(llm).__name__,
-            fallback_continue=True,
-        )
-        # Continue anyway - let the actual call fail if incompatible
-    messages: list[AIMessage] = [
-        {
-            "role": "system",
-            "content": (
-                "You are a DevOps assistant, an expert in infrastructure, "
-                "CI/CD, Kubernetes, Terraform, cloud platforms, monitoring, and automation. "
-                "Provide accurate, concise, production-ready guidance.\n\n"
-                "CRITICAL: You have access to powerful tools for Azure resource provisioning. "
-                "When users request Azure resource deployments, infrastructure changes, "
-                "or cloud operations, "
-                "you MUST use the available tools rather than just providing text explanations.\n\n"
-                "Available tools:\n"
-                "- azure_provision: For creating, modifying, or managing Azure resources "
-                "using AVM modules\n"
-                "- azure_costs: For cost analysis and optimization recommendations\n"
-                "- azure_quota_check: For checking subscription limits and quotas\n\n"
-                "IMPORTANT: When a tool execution succeeds "
-                "(status='created', 'deployed', or 'exists'), "
-                "the task is COMPLETE. Do NOT call the same tool again. "
-                "If a resource already exists, that means the request was fulfilled successfully."
-            ),
-        }
-    ]
+    messages: list[AIMessage] = [{"role": "system", "content": _ORCHESTRATOR_SYSTEM_PROMPT}]
     if memory:
         from app.core.logging import get_logger
 
@@ -726,7 +661,8 @@ async def _openai_tools_orchestrator(
             body = json.dumps(body, ensure_ascii=False, indent=2)
         return f"{tname} • {result.get('summary', '')}\n\njson\n{body}\n"
     steps = 0
-    while steps < max_chain_steps and _within_budget_ai_messages(messages, token_budget):
+    budget = MessageBudget(messages, token_budget, keep=(messages[0], messages[-1]))
+    while steps < max_chain_steps and budget.fit():
         try:
             resp = await llm.chat_raw(
                 model=selected_model,
@@ -803,121 +739,135 @@ async def _openai_tools_orchestrator(
                 },
             )
         )
+        planned: list[tuple[str, tuple[Mapping[str, Any], dict[str, object]]]] = []
         for call in tool_calls:
-            if steps >= max_chain_steps or not _within_budget_ai_messages(messages, token_budget):
-                break
             if call.get("type") != "function":
                 continue
             fn = call.get("function") or {}
-            tname = (fn.get("name") or "").strip()
-            args = _pick_args(fn.get("arguments") or {})
-            result = await _run_tool(tname, args, context)
+            planned.append(
+                ((fn.get("name") or "").strip(), (call, _pick_args(fn.get("arguments") or {})))
+            )
+        for batch in _tool_batches(
+            planned[: max(0, max_chain_steps - steps)], lambda payload: payload[1]
+        ):
+            if not budget.fit():
+                break
+            results = await _run_tools_concurrently(
+                [(tname, args) for tname, (_, args) in batch], context
+            )
+            for (tname, (call, _)), result in zip(batch, results, strict=True):
+                if isinstance(result, dict) and isinstance(result.get("output"), str):
+                    output = result.get("output")
+                    if "## Bicep Infrastructure Code" in str(
+                        output
+                    ) or "## Terraform Infrastructure Code" in str(output):
+                        last_rich_response = str(output)
 
-            if isinstance(result, dict) and isinstance(result.get("output"), str):
-                output = result.get("output")
-                if "## Bicep Infrastructure Code" in str(
-                    output
-                ) or "## Terraform Infrastructure Code" in str(output):
-                    last_rich_response = str(output)
+                        if context:
+                            context.last_tool_output = str(output)
+                        logger.info(f"Captured rich infrastructure response from {tname}")
 
-                    if context:
-                        context.last_tool_output = str(output)
-                    logger.info(f"Captured rich infrastructure response from {tname}")
+                result_summary_raw = result.get("summary", "") if isinstance(result, dict) else ""
+                result_summary = str(result_summary_raw).lower() if result_summary_raw else ""
+                result_output = result.get("output", "") if isinstance(result, dict) else ""
+                result_ok = result.get("ok") if isinstance(result, dict) else False
 
-            result_summary_raw = result.get("summary", "") if isinstance(result, dict) else ""
-            result_summary = str(result_summary_raw).lower() if result_summary_raw else ""
-            result_output = result.get("output", "") if isinstance(result, dict) else ""
-            result_ok = result.get("ok") if isinstance(result, dict) else False
+                output_length = len(str(result_output)) if result_output else 0
 
-            output_length = len(str(result_output)) if result_output else 0
+                logger.info(
+                    "completion_detection_debug",
+                    tool=tname,
+                    result_type=type(result).__name__,
+                    ok=result_ok,
+                    summary=result.get("summary", "") if isinstance(result, dict) else "N/A",
+                    output_length=output_length,
+                    has_bicep_code="## Bicep Infrastructure Code" in str(result_output),
+                    has_terraform_code="## Terraform Infrastructure Code" in str(result_output),
+                )
 
-            logger.info(
-                "completion_detection_debug",
-                tool=tname,
-                result_type=type(result).__name__,
-                ok=result_ok,
-                summary=result.get("summary", "") if isinstance(result, dict) else "N/A",
-                output_length=output_length,
-                has_bicep_code="## Bicep Infrastructure Code" in str(result_output),
-                has_terraform_code="## Terraform Infrastructure Code" in str(result_output),
-            )
+                is_successful_completion = (
+                    isinstance(result, dict)
+                    and result_ok is True
+                    and (
+                        any(
+                            keyword in result_summary
+                            for keyword in [
+                                "success",
+                                "deployed",
+                                "created",
+                                "completed",
+                                "executed",
+                            ]
+                        )
+                        or (
+                            "## Bicep Infrastructure Code" in str(result_output)
+                            or "## Terraform Infrastructure Code" in str(result_output)
+                        )
+                        or (tname == "azure_provision" and result_ok is True)
+                    )
+                )
 
-            is_successful_completion = (
-                isinstance(result, dict)
-                and result_ok is True
-                and (
-                    any(
-                        keyword in result_summary
-                        for keyword in ["success", "deployed", "created", "completed", "executed"]
+                if is_successful_completion:
+                    logger.info(
+                        f"SUCCESS DETECTED: {tname} - Breaking tool chain after execution #{steps}"
                     )
-                    or (
-                        "## Bicep Infrastructure Code" in str(result_output)
-                        or "## Terraform Infrastructure Code" in str(result_output)
+                else:
+                    logger.info(
+                        f"SUCCESS NOT DETECTED: {tname} - "
+                        f"Continuing tool chain (execution #{steps})"
                     )
-                    or (tname == "azure_provision" and result_ok is True)
-                )
-            )
 
-            if is_successful_completion:
-                logger.info(
-                    f"SUCCESS DETECTED: {tname} - Breaking tool chain after execution #{steps}"
-                )
-            else:
-                logger.info(
-                    f"SUCCESS NOT DETECTED: {tname} - Continuing tool chain (execution #{steps})"
+                messages.append(
+                    cast(
+                        AIMessage,
+                        {
+                            "role": "tool",
+                            "tool_call_id": call.get("id"),
+                            "name": tname,
+                            "content": json.dumps(result, ensure_ascii=False),
+                        },
+                    )
                 )
+                steps += 1
+                if is_successful_completion and tname in [
+                    "azure_provision",
+                    "terraform_apply",
+                    "kubectl_apply",
+                ]:
+                    logger.info(
+                        f"BREAKING TOOL CHAIN: {tname} completed successfully "
+                        f"(execution #{steps}), preventing further repetitions"
+                    )
 
-            messages.append(
-                cast(
-                    AIMessage,
-                    {
-                        "role": "tool",
-                        "tool_call_id": call.get("id"),
-                        "name": tname,
-                        "content": json.dumps(result, ensure_ascii=False),
-                    },
-                )
-            )
-            steps += 1
-            if is_successful_completion and tname in [
-                "azure_provision",
-                "terraform_apply",
-                "kubectl_apply",
-            ]:
-                logger.info(
-                    f"BREAKING TOOL CHAIN: {tname} completed successfully (execution #{steps}), "
-                    f"preventing further repetitions"
-                )
+                    # Always return rich response if available for infrastructure tools
+                    if last_rich_response:
+                        logger.info(
+                            "Returning rich infrastructure response, chain terminated successfully"
+                        )
+                        return last_rich_response
 
-                # Always return rich response if available for infrastructure tools
-                if last_rich_response:
                     logger.info(
-                        "Returning rich infrastructure response, chain terminated successfully"
+                        "No rich response available, constructing response from successful result"
+                    )
+                    output = result.get("output", str(result))
+                    return output if isinstance(output, str) else json.dumps(result, indent=2)
+
+                if (
+                    tname == "azure_provision"
+                    and steps >= 2
+                    and isinstance(result, dict)
+                    and result.get("ok") is True
+                ):
+                    logger.info(
+                        f"SAFETY BREAK: azure_provision executed {steps} times successfully, "
+                        f"terminating to prevent loops"
                     )
-                    return last_rich_response
-
-                logger.info(
-                    "No rich response available, constructing response from successful result"
-                )
-                output = result.get("output", str(result))
-                return output if isinstance(output, str) else json.dumps(result, indent=2)
-
-            if (
-                tname == "azure_provision"
-                and steps >= 2
-                and isinstance(result, dict)
-                and result.get("ok") is True
-            ):
-                logger.info(
-                    f"SAFETY BREAK: azure_provision executed {steps} times successfully, "
-                    f"terminating to prevent loops"
-                )
 
-                if last_rich_response:
-                    return last_rich_response
+                    if last_rich_response:
+                        return last_rich_response
 
-                output = result.get("output", str(result))
-                return output if isinstance(output, str) else json.dumps(result, indent=2)
+                    output = result.get("output", str(result))
+                    return output if isinstance(output, str) else json.dumps(result, indent=2)
     try:
         final = await llm.chat_raw(
             model=selected_model,
@@ -9,8 +9,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.routing import APIRoute
 from starlette.routing import Mount, Route, WebSocketRoute
 
+from app.ai.llm.registry import registry as model_registry
+from app.ai.llm.transport import llm_transport
 from app.api.error_handlers import install_error_handlers
 from app.api.middleware.authentication import install_auth_middleware
+from app.api.middleware.idempotency import install_idempotency_middleware
 from app.api.middleware.rate_limiter import RateLimitConfig, RateLimiter
 from app.api.middleware.telemetry import install_telemetry_middleware
 from app.api.routes.agents import router as agents_router
@@ -68,6 +71,7 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     logger.info("API starting up", version=settings.app_version, environment=settings.environment)
     app_insights.initialize()
     cleanup_task = asyncio.create_task(_limiter_cleanup_loop())
+    await model_registry().start()
     try:
         yield
     finally:
@@ -77,6 +81,8 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
         rb = limiter.redis_backend
         if rb and rb._client:
             await rb._client.aclose()
+        await model_registry().stop()
+        await llm_transport().aclose()
         logger.info("API shutting down")
 
 
@@ -105,6 +111,7 @@ app.add_middleware(
 install_error_handlers(app)
 install_correlation_middleware(app)
 install_telemetry_middleware(app)
+install_idempotency_middleware(app)
 install_auth_middleware(app)
 install_embeddings_budget_middleware(app)
 
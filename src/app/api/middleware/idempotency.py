@@ -1,33 +1,195 @@
+from __future__ import annotations
+
 import asyncio
 import hashlib
-from collections.abc import Awaitable, Callable
-from typing import Any
-
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import JSONResponse, Response
-
-
-class IdempotencyMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app: Any, window_seconds: int = 30) -> None:
-        super().__init__(app)
-        self._window = window_seconds
-        self._inflight: dict[str, float] = {}
-        self._lock = asyncio.Lock()
-
-    async def dispatch(
-        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
-        if request.method == "POST" and request.url.path == "/api/chat":
-            body = await request.body()
-            digest = hashlib.blake2b(body, digest_size=16).hexdigest()
-            async with self._lock:
-                if digest in self._inflight:
-                    return JSONResponse({"status": "duplicate"}, status_code=202)
-                self._inflight[digest] = asyncio.get_event_loop().time()
-            try:
-                return await call_next(request)
-            finally:
-                async with self._lock:
-                    self._inflight.pop(digest, None)
-        return await call_next(request)
+
+from fastapi import FastAPI, Request
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.idempotency import (
+    ClaimState,
+    IdempotencyConfig,
+    IdempotencyStore,
+    InMemoryIdempotencyStore,
+    RedisIdempotencyStore,
+    StoredResponse,
+)
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+_NO_STORE = "idempotency_no_store"
+
+
+def skip_idempotent_replay(request: Request) -> None:
+    """Release the request's idempotency key instead of storing its response.
+
+    For routes that report a failure inside a 2xx response, so a retry runs again.
+    """
+    setattr(request.state, _NO_STORE, True)
+
+
+class _InProgress(Exception):
+    pass
+
+
+class IdempotencyMiddleware:
+    """Runs a POST at most once per ``Idempotency-Key`` header, or per body digest.
+
+    The first request takes a lease in the shared store and its response is stored
+    there; duplicates on any replica wait for that response and get a copy of it, marked
+    with an ``Idempotent-Replayed`` header. Failed (5xx), interrupted or
+    ``skip_idempotent_replay`` requests release the lease, so a waiting duplicate runs in
+    their place. If the store is unreachable
+    requests are served without deduplication.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        config: IdempotencyConfig | None = None,
+        store: IdempotencyStore | None = None,
+    ) -> None:
+        self.app = app
+        self.config = config or IdempotencyConfig()
+        self._paths = {p.rstrip("/") for p in self.config.paths}
+        self._store = store
+
+    @property
+    def store(self) -> IdempotencyStore:
+        if self._store is None:
+            if self.config.backend == "memory":
+                self._store = InMemoryIdempotencyStore()
+            else:
+                self._store = RedisIdempotencyStore()
+        return self._store
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"].rstrip("/") not in self._paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (scope["path"].encode(), scope.get("query_string", b"")):
+            digest.update(part + b"\0")
+        digest.update(headers.get("authorization", "").encode() + b"\0")
+        buffered: list[Message] = []
+        if explicit := headers.get("idempotency-key"):
+            digest.update(b"key\0" + explicit.encode())
+            ttl = self.config.key_ttl_seconds
+        else:
+            # Hash the body as it arrives and keep the chunks to hand on to the app.
+            digest.update(b"body\0")
+            while True:
+                message = await receive()
+                buffered.append(message)
+                digest.update(message.get("body", b""))
+                if message["type"] != "http.request" or not message.get("more_body"):
+                    break
+            ttl = self.config.digest_ttl_seconds
+        key = digest.hexdigest()
+
+        async def replay_receive() -> Message:
+            return buffered.pop(0) if buffered else await receive()
+
+        try:
+            stored = await self._claim(key)
+        except _InProgress:
+            logger.info("idempotent_request_still_running", path=scope["path"])
+            busy = JSONResponse(
+                {"status": "in_progress"}, status_code=409, headers={"Retry-After": "5"}
+            )
+            await busy(scope, replay_receive, send)
+            return
+        except Exception as exc:
+            logger.warning("idempotency_store_unavailable", error=str(exc))
+            await self.app(scope, replay_receive, send)
+            return
+
+        if stored is not None:
+            logger.info("idempotent_request_replayed", path=scope["path"])
+            await self._replay(stored, send)
+            return
+
+        await self._run_once(key, ttl, scope, replay_receive, send)
+
+    async def _claim(self, key: str) -> StoredResponse | None:
+        """None once this request holds the lease, else the original's response."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.config.wait_seconds
+        while True:
+            state, stored = await self.store.claim(key, self.config.lease_seconds)
+            if state is ClaimState.ACQUIRED:
+                return None
+            if state is ClaimState.DONE:
+                return stored
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise _InProgress(key)
+            await self.store.wait(key, min(remaining, 5.0))
+
+    async def _run_once(
+        self, key: str, ttl: int, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        status = 0
+        headers: list[tuple[bytes, bytes]] = []
+        body: list[bytes] = []
+        size = 0
+        complete = False
+
+        async def capture(message: Message) -> None:
+            nonlocal status, headers, size, complete
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if size <= self.config.max_body_bytes:
+                    body.append(chunk)
+                complete = not message.get("more_body", False)
+            await send(message)
+
+        # Routes flag responses that must not be replayed on the request state.
+        state = scope.setdefault("state", {})
+        stored: StoredResponse | None = None
+        try:
+            await self.app(scope, receive, capture)
+            replayable = not state.get(_NO_STORE)
+            if replayable and complete and 0 < status < 500 and size <= self.config.max_body_bytes:
+                stored = StoredResponse(status, headers, b"".join(body))
+        finally:
+            await asyncio.shield(self._settle(key, stored, ttl))
+
+    async def _settle(self, key: str, stored: StoredResponse | None, ttl: int) -> None:
+        try:
+            if stored is not None:
+                await self.store.complete(key, stored, ttl)
+            else:
+                await self.store.release(key)
+        except Exception as exc:
+            logger.warning("idempotency_store_update_failed", error=str(exc))
+
+    @staticmethod
+    async def _replay(stored: StoredResponse, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": stored.status,
+                "headers": [*stored.headers, (b"idempotent-replayed", b"true")],
+            }
+        )
+        await send({"type": "http.response.body", "body": stored.body})
+
+
+def install_idempotency_middleware(app: FastAPI) -> None:
+    config = IdempotencyConfig()
+    if config.enable:
+        app.add_middleware(IdempotencyMiddleware, config=config)
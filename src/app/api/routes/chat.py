@@ -13,11 +13,13 @@ from opentelemetry.trace import Status, StatusCode
 
 from app.ai.llm.factory import get_provider_and_model
 from app.ai.types import Message
+from app.api.middleware.idempotency import skip_idempotent_replay
 from app.api.schemas import ChatRequest, ChatRequestV2, ChatResponse
 from app.api.services import run_chat
 from app.core.config import settings
 from app.core.exceptions import AuthenticationException, BaseApplicationException
 from app.core.logging import get_logger
+from app.core.tenancy import current_tenant
 
 router = APIRouter()
 logger = get_logger(__name__)
@@ -50,6 +52,8 @@ async def get_optional_user(request: Request) -> dict[str, Any]:
             }
     if AUTH_AVAILABLE and auth_module is not None:
         token_data = await auth_module.auth_required(request)
+        # Only a verified token decides whose cached LLM answers this request may see.
+        current_tenant.set(token_data.user_id)
         return {
             "email": token_data.email,
             "roles": token_data.roles,
@@ -91,7 +95,7 @@ async def chat(
         try:
             if stream and not req.enable_tools:
                 return StreamingResponse(
-                    _stream_plain_chat(req, current_user),
+                    _stream_plain_chat(req, current_user, request),
                     media_type="text/event-stream",
                     headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
                 )
@@ -119,10 +123,12 @@ async def chat(
             msg = exc.user_message or "Failed to process request."
             span.set_status(Status(StatusCode.ERROR, msg))
             logger.exception("chat failed user=%s msg=%s", user_email, msg)
+            skip_idempotent_replay(request)
             return JSONResponse(content=ChatResponse(output=msg).model_dump())
         except Exception as exc:
             span.set_status(Status(StatusCode.ERROR, str(exc)))
             logger.exception("chat failed user=%s", user_email)
+            skip_idempotent_replay(request)
             return JSONResponse(
                 content=ChatResponse(output="Failed to process request.").model_dump()
             )
@@ -187,7 +193,9 @@ async def chat_v2(
             }
 
 
-async def _stream_plain_chat(req: ChatRequest, user: dict[str, Any]) -> AsyncGenerator[bytes, None]:
+async def _stream_plain_chat(
+    req: ChatRequest, user: dict[str, Any], request: Request
+) -> AsyncGenerator[bytes, None]:
     with tracer.start_as_current_span("api.chat.stream") as span:
         user_email = get_user_email(user)
         span.set_attribute("auth.user", user_email)
@@ -228,10 +236,12 @@ async def _stream_plain_chat(req: ChatRequest, user: dict[str, Any]) -> AsyncGen
             msg = exc.user_message or "Failed to process request."
             span.set_status(Status(StatusCode.ERROR, msg))
             logger.exception("chat stream failed user=%s msg=%s", user_email, msg)
+            skip_idempotent_replay(request)
             yield f"data: {msg}\n\n".encode()
             yield b"data: [DONE]\n\n"
         except Exception:
             span.set_status(Status(StatusCode.ERROR, "stream.error"))
             logger.exception("chat stream failed user=%s", user_email)
+            skip_idempotent_replay(request)
             yield b"data: Failed to process request.\n\n"
             yield b"data: [DONE]\n\n"
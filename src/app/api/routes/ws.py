@@ -15,7 +15,7 @@ from app.ai.llm.factory import get_provider_and_model
 from app.ai.types import Message
 from app.core.logging import get_logger
 from app.core.schemas.domains.deployment import DeploymentEvent
-from app.core.streams import streaming_handler
+from app.core.streams import SlowConsumerError, streaming_handler
 
 router = APIRouter()
 logger = get_logger(__name__)
@@ -103,18 +103,27 @@ async def chat_ws(ws: WebSocket) -> None:
 
 
 @router.websocket("/ws/deploy/{deployment_id}")
-async def deployment_stream(ws: WebSocket, deployment_id: str) -> None:
+async def deployment_stream(ws: WebSocket, deployment_id: str, batch: bool = False) -> None:
+    """Log events, one ``log`` per line, or one ``log_batch`` per batch with ``?batch=true``."""
     if not await _accept(ws):
         return
     with tracer.start_as_current_span("ws.deploy") as span:
         span.set_attribute("deployment.id", deployment_id)
         logger.info("ws_deploy_stream_start", deployment_id=deployment_id)
         try:
-            async for line in streaming_handler.stream_logs(deployment_id):
-                evt = DeploymentEvent(
-                    type="log", payload={"line": line}, timestamp=datetime.now(tz=UTC)
-                )
-                await ws.send_text(evt.model_dump_json())
+            async for lines in streaming_handler.stream_batches(deployment_id):
+                now = datetime.now(tz=UTC)
+                if batch:
+                    events = [
+                        DeploymentEvent(type="log_batch", payload={"lines": lines}, timestamp=now)
+                    ]
+                else:
+                    events = [
+                        DeploymentEvent(type="log", payload={"line": line}, timestamp=now)
+                        for line in lines
+                    ]
+                for evt in events:
+                    await ws.send_text(evt.model_dump_json())
             complete = DeploymentEvent(
                 type="complete",
                 payload={"deployment_id": deployment_id},
@@ -125,6 +134,9 @@ async def deployment_stream(ws: WebSocket, deployment_id: str) -> None:
             logger.info("ws_deploy_stream_complete", deployment_id=deployment_id)
         except WebSocketDisconnect:
             logger.info("ws_deploy_stream_disconnected", deployment_id=deployment_id)
+        except SlowConsumerError:
+            logger.warning("ws_deploy_stream_slow_consumer", deployment_id=deployment_id)
+            await ws.close(code=status.WS_1013_TRY_AGAIN_LATER)
         except Exception as e:
             span.record_exception(e)
             span.set_status(Status(StatusCode.ERROR, str(e)))
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+
+import numpy as np
+from numpy.typing import NDArray
+from sklearn.linear_model import LinearRegression  # type: ignore[import-untyped]
+from sklearn.preprocessing import PolynomialFeatures  # type: ignore[import-untyped]
+
+from app.tools.finops.batch_forecast import BatchForecaster
+
+
+def _series(n: int, days: int, seed: int) -> NDArray[np.float64]:
+    """Daily costs with a trend, a weekend dip, noise and a few spikes."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(days)
+    base = rng.uniform(5, 500, (n, 1))
+    slope = rng.normal(0, 0.002, (n, 1)) * base
+    weekend = np.where(t % 7 >= 5, -0.3, 0.0) * base * rng.uniform(0, 1, (n, 1))
+    y = base + slope * t + weekend + rng.normal(0, 0.05, (n, days)) * base
+    spikes = rng.random((n, days)) < 0.01
+    return np.maximum(y + spikes * base * 2, 0.0)
+
+
+def _per_series(y: NDArray[np.float64], horizon: int) -> int:
+    """The existing single-series path: cubic ``LinearRegression`` fitted per series."""
+    days = y.shape[1]
+    X = np.arange(days, dtype=float).reshape(-1, 1)
+    future = np.arange(days, days + horizon, dtype=float).reshape(-1, 1)
+    flagged = 0
+    for row in y:
+        poly = PolynomialFeatures(degree=3)
+        model = LinearRegression().fit(poly.fit_transform(X), row)
+        model.predict(poly.transform(future))
+        residuals = row - model.predict(poly.transform(X))
+        std = float(np.std(residuals, ddof=1))
+        if std > 0:
+            flagged += int((np.abs(residuals - residuals.mean()) / std > 2.0).sum())
+    return flagged
+
+
+def main(series: int, days: int, horizon: int, loop_max: int, rounds: int) -> None:
+    logging.disable(logging.CRITICAL)
+    y = _series(series, days, seed=7)
+    print(f"{series} series x {days} days, forecasting {horizon} days")
+    print(f"{'engine':<28} {'seconds':>9} {'series/s':>12}")
+
+    looped = y[: min(loop_max, series)]
+    start = time.perf_counter()
+    _per_series(looped, horizon)
+    per_series = (time.perf_counter() - start) / len(looped)
+    label = "sklearn per series" + (" (est.)" if len(looped) < series else "")
+    print(f"{label:<28} {per_series * series:>9.2f} {1 / per_series:>12,.0f}")
+
+    forecaster = BatchForecaster()
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = forecaster.fit(y, horizon)
+        best = min(best, time.perf_counter() - start)
+    print(f"{'batched lstsq':<28} {best:>9.3f} {series / best:>12,.0f}")
+    print(
+        f"anomalous days flagged: {int(result.anomalies.sum())}, "
+        f"seasonal series: {int(result.seasonal.sum())}, "
+        f"median R^2: {float(np.median(result.r2)):.3f}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batched cost forecasting benchmark")
+    parser.add_argument("--series", type=int, default=10_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--horizon", type=int, default=30)
+    parser.add_argument("--loop-max", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    main(args.series, args.days, args.horizon, args.loop_max, args.rounds)
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+
+from app.core.cache.backends.inmemory import InMemoryCache
+from app.core.cache.backends.sharded_inmemory import ShardedInMemoryCache
+from app.core.cache.base import CacheBackend
+
+
+async def _run(
+    cache: CacheBackend, keys: list[str], ops: int, concurrency: int
+) -> tuple[float, float]:
+    payload = {"id": "x" * 64, "tags": ["a", "b", "c"], "cost": 1.25}
+    per_worker = ops // concurrency
+    hits = 0
+    reads = 0
+
+    async def worker(seed: int) -> None:
+        nonlocal hits, reads
+        rng = random.Random(seed)
+        for _ in range(per_worker):
+            key = keys[int(len(keys) * rng.random() ** 3)]
+            if rng.random() < 0.9:
+                reads += 1
+                if await cache.get(key) is None:
+                    await cache.set(key, payload, ttl=60)
+                else:
+                    hits += 1
+            else:
+                await cache.set(key, payload, ttl=60)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return per_worker * concurrency / elapsed, hits / max(1, reads)
+
+
+async def main(ops: int, keyspace: int, concurrency: int, capacity: int) -> None:
+    keys = [f"bench:{i}" for i in range(keyspace)]
+    entry_bytes = 800
+    backends: dict[str, CacheBackend] = {
+        "inmemory": InMemoryCache(max_size=capacity),
+        "sharded-lru": ShardedInMemoryCache(max_bytes=capacity * entry_bytes, policy="lru"),
+        "sharded-tinylfu": ShardedInMemoryCache(
+            max_bytes=capacity * entry_bytes, policy="tinylfu", expected_entries=capacity
+        ),
+    }
+    print(f"{'backend':<18} {'ops/s':>12} {'hit ratio':>10}")
+    for name, cache in backends.items():
+        rate, hit_ratio = await _run(cache, keys, ops, concurrency)
+        print(f"{name:<18} {rate:>12,.0f} {hit_ratio:>10.3f}")
+        await cache.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="L1 cache backend microbenchmark")
+    parser.add_argument("--ops", type=int, default=200_000)
+    parser.add_argument("--keyspace", type=int, default=50_000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--capacity", type=int, default=5_000, help="entries that fit in L1")
+    args = parser.parse_args()
+    asyncio.run(main(args.ops, args.keyspace, args.concurrency, args.capacity))
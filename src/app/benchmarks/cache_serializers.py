@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+from app.core.cache.serializers import decode, dumps, encode, loads
+
+
+def _payloads() -> dict[str, Any]:
+    rng = random.Random(7)
+    resource = {
+        "id": "/subscriptions/0000/resourceGroups/rg-app/providers/Microsoft.Web/sites/app",
+        "location": "westeurope",
+        "tags": {"env": "prod", "owner": "platform"},
+        "cost": 12.5,
+    }
+    return {
+        "small-dict (200B)": {"user": "u-1", "ok": True, "count": 3, "model": "gpt-4o-mini"},
+        "resources (20KB)": [dict(resource, idx=i) for i in range(100)],
+        "resources (2MB)": [dict(resource, idx=i, cost=rng.random()) for i in range(10_000)],
+        "embedding list[float] 1536": [rng.random() for _ in range(1536)],
+        "embedding ndarray f32 1536": np.random.default_rng(7).random(1536, dtype=np.float32),
+    }
+
+
+def _legacy_roundtrip(obj: Any) -> tuple[int, Any]:
+    data = dumps(obj).decode("utf-8")
+    return len(data.encode("utf-8")), loads(data.encode("utf-8"))
+
+
+def _binary_roundtrip(obj: Any) -> tuple[int, Any]:
+    data = encode(obj)
+    return len(data), decode(memoryview(data))
+
+
+def _time(fn: Callable[[Any], tuple[int, Any]], obj: Any, rounds: int) -> tuple[float, int]:
+    size = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        size, _ = fn(obj)
+    return (time.perf_counter() - start) / rounds * 1e6, size
+
+
+def main(rounds: int) -> None:
+    print(f"{'payload':<28} {'legacy us':>10} {'legacy B':>10} {'binary us':>10} {'binary B':>10}")
+    for name, obj in _payloads().items():
+        n = max(1, rounds // 100) if "2MB" in name else rounds
+        legacy_obj = obj.tolist() if isinstance(obj, np.ndarray) else obj
+        legacy_us, legacy_size = _time(_legacy_roundtrip, legacy_obj, n)
+        binary_us, binary_size = _time(_binary_roundtrip, obj, n)
+        print(
+            f"{name:<28} {legacy_us:>10.1f} {legacy_size:>10,} "
+            f"{binary_us:>10.1f} {binary_size:>10,}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cache value serialization benchmark")
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.rounds)
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, cast
+from urllib.parse import parse_qs, urlparse
+
+from azure.core.exceptions import HttpResponseError
+from azure.core.rest import HttpRequest
+from azure.mgmt.costmanagement import CostManagementClient
+from azure.mgmt.costmanagement.models import QueryDefinition, QueryResult
+
+from app.tools.finops.bulk_costs import BulkCostEngine
+from app.tools.finops.cost_ingestion import ResourceCost
+
+
+class _Response:
+    def __init__(self, status_code: int, body: dict[str, Any] | None = None) -> None:
+        self.status_code = status_code
+        self.reason = "Too Many Requests" if status_code == 429 else "OK"
+        self.headers = {"retry-after": "0.05"} if status_code == 429 else {}
+        self._body = body or {}
+
+    def json(self) -> dict[str, Any]:
+        return self._body
+
+    def text(self) -> str:
+        return ""
+
+
+class _FakeCostClient:
+    """Stand-in for ``CostManagementClient`` answering ``query.usage`` from memory.
+
+    Every call sleeps ``latency`` seconds, results are paged ``page_size`` rows at a
+    time behind ``nextLink``, and calls beyond ``max_concurrent`` in flight get a 429.
+    """
+
+    def __init__(self, latency: float, page_size: int = 1000, max_concurrent: int = 6) -> None:
+        self.latency = latency
+        self.page_size = page_size
+        self.max_concurrent = max_concurrent
+        self.calls = 0
+        self.throttled = 0
+        self.query = self
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def usage(self, scope: str, parameters: QueryDefinition) -> QueryResult:
+        return self._answer(parameters.as_dict(), 0)
+
+    def send_request(self, request: HttpRequest) -> _Response:
+        offset = int(parse_qs(urlparse(request.url).query)["$skiptoken"][0])
+        try:
+            result = self._answer(json.loads(request.content), offset)
+        except HttpResponseError as exc:
+            return cast("_Response", exc.response)
+        return _Response(200, result.as_dict())
+
+    def _answer(self, query: dict[str, Any], offset: int) -> QueryResult:
+        with self._lock:
+            self.calls += 1
+            if self._active >= self.max_concurrent:
+                self.throttled += 1
+                raise HttpResponseError(response=_Response(429))  # type: ignore[arg-type]
+            self._active += 1
+        try:
+            time.sleep(self.latency)
+            dataset = query["dataset"]
+            ids: list[str] = dataset["filter"]["dimensions"]["values"]
+            if not dataset.get("grouping"):
+                cost = sum(self._cost(rid) for rid in ids)
+                columns = ["PreTaxCost", "PreTaxCostUSD", "Currency"]
+                rows: list[list[Any]] = [[cost, cost, "USD"]]
+            else:
+                columns = ["PreTaxCost", "PreTaxCostUSD", "ResourceId", "Currency"]
+                rows = [[self._cost(r), self._cost(r), r.lower(), "USD"] for r in ids]
+            page = rows[offset : offset + self.page_size]
+            next_offset = offset + self.page_size
+            props: dict[str, Any] = {
+                "columns": [{"name": c, "type": "String"} for c in columns],
+                "rows": page,
+            }
+            if next_offset < len(rows):
+                props["nextLink"] = f"https://fake.invalid/query?$skiptoken={next_offset}"
+            return QueryResult({"properties": props})
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    @staticmethod
+    def _cost(resource_id: str) -> float:
+        return float(len(resource_id) % 17)
+
+
+async def _per_resource(
+    client: _FakeCostClient, ids: list[str], start: datetime, end: datetime, pause: float
+) -> dict[str, ResourceCost]:
+    """The replaced loop: one filtered query per resource, ``pause`` seconds apart."""
+    engine = BulkCostEngine(cast("CostManagementClient", client))
+    out: dict[str, ResourceCost] = {}
+    for rid in ids:
+        query = engine._query([rid], start, end)
+        query.dataset.grouping = None
+        result = await asyncio.to_thread(client.usage, "/subscriptions/bench", query)
+        row = result.rows[0]
+        out[rid] = {"cost": float(row[0]), "cost_usd": float(row[1]), "currency": "USD"}
+        await asyncio.sleep(pause)
+    return out
+
+
+async def _run(
+    resources: int, latency: float, legacy_max: int, pause: float, page_size: int, throttle: int
+) -> list[tuple[str, int, int, float]]:
+    ids = [f"/subscriptions/bench/resourceGroups/rg/providers/x/vm{i}" for i in range(resources)]
+    end = datetime(2024, 2, 1)
+    start = end - timedelta(days=30)
+    rows: list[tuple[str, int, int, float]] = []
+
+    if resources <= legacy_max:
+        client = _FakeCostClient(latency, page_size, throttle)
+        t0 = time.perf_counter()
+        legacy = await _per_resource(client, ids, start, end, pause)
+        rows.append(("per resource", client.calls, client.throttled, time.perf_counter() - t0))
+    else:
+        legacy = None
+        rows.append(("per resource (est.)", resources, 0, resources * (latency + pause)))
+
+    for chunk in (1000, 100):
+        client = _FakeCostClient(latency, page_size, throttle)
+        engine = BulkCostEngine(cast("CostManagementClient", client), chunk_size=chunk)
+        t0 = time.perf_counter()
+        costs = await engine.resource_costs("/subscriptions/bench", ids, start, end)
+        elapsed = time.perf_counter() - t0
+        assert len(costs) == resources and not any("error" in c for c in costs.values())
+        if legacy is not None:
+            assert all(costs[r]["cost"] == legacy[r]["cost"] for r in ids)
+        rows.append((f"grouped, chunk {chunk}", client.calls, client.throttled, elapsed))
+    return rows
+
+
+def main(
+    sizes: list[int],
+    latency_ms: float,
+    legacy_max: int,
+    pause_ms: float,
+    page_size: int,
+    throttle: int,
+) -> None:
+    logging.disable(logging.CRITICAL)
+    print(
+        f"simulated call latency={latency_ms} ms, per-resource pause={pause_ms} ms, "
+        f"page size={page_size}, 429 above {throttle} concurrent calls"
+    )
+    print(f"{'resources':>9} {'engine':<22} {'api calls':>9} {'429s':>5} {'seconds':>9}")
+    for n in sizes:
+        for name, calls, throttled, seconds in asyncio.run(
+            _run(n, latency_ms / 1000, legacy_max, pause_ms / 1000, page_size, throttle)
+        ):
+            print(f"{n:>9} {name:<22} {calls:>9} {throttled:>5} {seconds:>9.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resource cost ingestion benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 3000])
+    parser.add_argument("--latency-ms", type=float, default=30.0)
+    parser.add_argument("--pause-ms", type=float, default=100.0)
+    parser.add_argument("--legacy-max", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--throttle-above", type=int, default=3)
+    args = parser.parse_args()
+    main(
+        args.sizes,
+        args.latency_ms,
+        args.legacy_max,
+        args.pause_ms,
+        args.page_size,
+        args.throttle_above,
+    )
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+from typing import Any
+
+from app.ai.embeddings.cache import normkey
+from app.ai.embeddings.client import EmbeddingsService
+from app.ai.embeddings.config import EmbeddingsConfig
+from app.ai.embeddings.context import EmbeddingsBudget, budget_var, req_cache_var
+
+
+class _FakeEmbeddings:
+    def __init__(self, dim: int) -> None:
+        self._dim = dim
+
+    async def create(self, model: str, input: list[str], **_: Any) -> Any:
+        data = [SimpleNamespace(embedding=[float(len(t))] * self._dim) for t in input]
+        return SimpleNamespace(data=data)
+
+
+def _legacy_partition(texts: list[str], hits: dict[str, list[float]]) -> list[tuple[str, str]]:
+    """The pre-rework miss partitioning, kept for comparison."""
+    keys = [normkey(t) for t in texts]
+    miss_keys = [k for k in keys if k not in hits]
+    miss_texts = [t for t, k in zip(texts, keys, strict=False) if k in set(miss_keys)]
+    return list(zip(miss_keys, miss_texts, strict=False))
+
+
+def _texts(n: int, unique_ratio: float) -> list[str]:
+    rng = random.Random(11)
+    pool = [f"storage account {i} in westeurope" for i in range(max(1, int(n * unique_ratio)))]
+    return [rng.choice(pool) for _ in range(n)]
+
+
+async def main(n: int, dim: int, unique_ratio: float) -> None:
+    texts = _texts(n, unique_ratio)
+    cfg = EmbeddingsConfig(
+        enable_dynamic_batching=False,
+        redis_url=None,
+        local_store_path=None,
+        azure_base_url="http://localhost",
+        azure_api_key="bench",
+        max_concurrency=8,
+    )
+    service = EmbeddingsService(cfg)
+    service._client = SimpleNamespace(embeddings=_FakeEmbeddings(dim))  # type: ignore[assignment]
+    budget_var.set(EmbeddingsBudget(token_limit=10**9, call_limit=10**6))
+
+    half = {normkey(t): [0.0] for t in texts[: n // 2]}
+    start = time.perf_counter()
+    _legacy_partition(texts, half)
+    legacy = time.perf_counter() - start
+
+    req_cache_var.set({})
+    start = time.perf_counter()
+    cold = await service.embed_detailed(texts)
+    cold_s = time.perf_counter() - start
+    start = time.perf_counter()
+    warm = await service.embed_detailed(texts)
+    warm_s = time.perf_counter() - start
+
+    print(f"texts={n} unique={len(set(texts))} dim={dim}")
+    print(f"legacy partition only      {legacy * 1000:>10.1f} ms")
+    missing = len(cold.missing_indices)
+    print(f"pipeline, cold (API tier)  {cold_s * 1000:>10.1f} ms  missing={missing}")
+    print(f"pipeline, warm (request)   {warm_s * 1000:>10.1f} ms  complete={warm.complete}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EmbeddingsService lookup pipeline benchmark")
+    parser.add_argument("--texts", type=int, default=10_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--unique-ratio", type=float, default=0.6)
+    args = parser.parse_args()
+    asyncio.run(main(args.texts, args.dim, args.unique_ratio))
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib.util
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, cast
+
+from app.core.cache.backends.inmemory import InMemoryCache
+from app.core.cache.backends.redis_backend import RedisCache
+from app.core.cache.base import CacheBackend
+from app.jobs.queue import Job, JobQueue
+from app.jobs.redis_queue import RedisJobQueue
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover - optional
+    fakeredis = None  # type: ignore[assignment]
+
+
+class _RoundTrip:
+    """Adds a fixed delay to every cache call, standing in for the network hop to Redis."""
+
+    def __init__(self, inner: CacheBackend, rtt: float):
+        self._inner = inner
+        self._rtt = rtt
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._inner, name)
+        if not asyncio.iscoroutinefunction(attr):
+            return attr
+
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            await asyncio.sleep(self._rtt)
+            return await attr(*args, **kwargs)
+
+        return call
+
+
+def _memory_queue(workers: int, prefetch: int, rtt: float) -> JobQueue:
+    cache = cast("CacheBackend", _RoundTrip(InMemoryCache(max_size=10**7), rtt))
+    return JobQueue(cache, queue_name="bench", max_workers=workers, prefetch=prefetch)
+
+
+def _fakeredis_queue(workers: int, prefetch: int, rtt: float) -> JobQueue:
+    cache = RedisCache("redis://localhost:6379/0")
+    cache._client = fakeredis.FakeAsyncRedis()
+    return RedisJobQueue(
+        cache, queue_name="bench", max_workers=workers, prefetch=prefetch, block_timeout=0.05
+    )
+
+
+async def _run(
+    make: Callable[[int, int, float], JobQueue],
+    jobs: int,
+    workers: int,
+    prefetch: int,
+    batch: bool,
+    rtt: float,
+) -> tuple[float, float]:
+    queue = make(workers, prefetch, rtt)
+    done = asyncio.Event()
+    finished = 0
+
+    async def handler(job: Job) -> None:
+        nonlocal finished
+        finished += 1
+        if finished == jobs:
+            done.set()
+
+    queue.register_handler("noop", handler)
+    payloads = [{"i": i} for i in range(jobs)]
+
+    start = time.perf_counter()
+    if batch:
+        for i in range(0, jobs, 500):
+            await queue.enqueue_many("noop", payloads[i : i + 500])
+    else:
+        for payload in payloads:
+            await queue.enqueue("noop", payload)
+    enqueue_s = time.perf_counter() - start
+
+    # Workers log and swallow handler-side failures, so a broken engine would otherwise
+    # leave this waiting forever. Allow generously for the slowest case, one worker paying
+    # a few round trips per job.
+    timeout = 30.0 + jobs * (0.01 + 4 * rtt)
+    start = time.perf_counter()
+    await queue.start()
+    try:
+        await asyncio.wait_for(cast("Awaitable[bool]", done.wait()), timeout)
+        drain_s = time.perf_counter() - start
+    except TimeoutError:
+        raise TimeoutError(
+            f"only {finished} of {jobs} jobs finished within {timeout:.0f} s"
+        ) from None
+    finally:
+        await queue.stop()
+    return jobs / enqueue_s, jobs / drain_s
+
+
+def main(jobs: int, rtt_ms: float) -> None:
+    logging.disable(logging.CRITICAL)
+    backends: dict[str, Callable[[int, int, float], JobQueue]] = {"in-memory": _memory_queue}
+    if fakeredis is not None:
+        # The Redis engine runs Lua scripts; fakeredis only executes them through lupa.
+        if importlib.util.find_spec("lupa") is None:
+            raise SystemExit(
+                "fakeredis is installed without Lua support, which the Redis job queue "
+                "needs: pip install 'fakeredis[lua]'"
+            )
+        backends["fakeredis"] = _fakeredis_queue
+    else:
+        print("fakeredis not installed, skipping the Redis engine")
+
+    print(f"jobs={jobs} simulated rtt={rtt_ms} ms (in-memory only)")
+    print(f"{'backend':<10} {'workers':>7} {'mode':<22} {'enqueue/s':>11} {'drain/s':>11}")
+    for name, make in backends.items():
+        for workers in (1, 10, 100):
+            for mode, prefetch, batch in (
+                ("one by one", 1, False),
+                ("batched, prefetch 8", 8, True),
+            ):
+                enq, drain = asyncio.run(_run(make, jobs, workers, prefetch, batch, rtt_ms / 1000))
+                print(f"{name:<10} {workers:>7} {mode:<22} {enq:>11,.0f} {drain:>11,.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Job queue enqueue and drain throughput")
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--rtt-ms", type=float, default=0.2)
+    args = parser.parse_args()
+    main(args.jobs, args.rtt_ms)
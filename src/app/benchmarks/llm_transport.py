@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+
+import httpx
+
+from app.ai.llm.transport import LLMTransportManager
+
+
+class _MockCompletionServer:
+    """Minimal HTTP/1.1 server that streams OpenAI-style SSE chunks.
+
+    ``handshake`` is slept once per accepted connection to stand in for the TCP and TLS
+    setup a real provider endpoint costs; keep-alive connections skip it.
+    """
+
+    def __init__(self, handshake: float, chunks: int = 5) -> None:
+        self.handshake = handshake
+        self.chunks = chunks
+        self.connections = 0
+        self._server: asyncio.Server | None = None
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        await asyncio.sleep(self.handshake)
+        try:
+            while head := await reader.readuntil(b"\r\n\r\n"):
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                await reader.readexactly(length)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\ncontent-type: text/event-stream\r\n"
+                    b"transfer-encoding: chunked\r\nconnection: keep-alive\r\n\r\n"
+                )
+                for i in range(self.chunks):
+                    delta = {"choices": [{"delta": {"content": f"tok{i} "}}]}
+                    self._chunk(writer, f"data: {json.dumps(delta)}\n\n".encode())
+                    await writer.drain()
+                self._chunk(writer, b"data: [DONE]\n\n")
+                writer.write(b"0\r\n\r\n")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _chunk(writer: asyncio.StreamWriter, data: bytes) -> None:
+        writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+
+async def _first_token(client: httpx.AsyncClient, url: str) -> float:
+    start = time.perf_counter()
+    payload = {"model": "mock", "messages": [{"role": "user", "content": "hi"}], "stream": True}
+    ttft = 0.0
+    async with client.stream("POST", url, json=payload) as r:
+        async for line in r.aiter_lines():
+            if line.startswith("data:") and not ttft:
+                ttft = time.perf_counter() - start
+    return ttft
+
+
+async def _per_request_client(url: str, requests: int, concurrency: int) -> list[float]:
+    """Old behaviour: a fresh client, and so a fresh connection, for every call."""
+
+    async def one() -> float:
+        async with httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=5.0)) as client:
+            return await _first_token(client, url)
+
+    return await _batches(one, requests, concurrency)
+
+
+async def _pooled(url: str, requests: int, concurrency: int) -> list[float]:
+    manager = LLMTransportManager(max_connections=max(concurrency, 1))
+    try:
+        return await _batches(
+            lambda: _first_token(manager.client_for(url), url), requests, concurrency
+        )
+    finally:
+        await manager.aclose()
+
+
+async def _batches(
+    fn: Callable[[], Awaitable[float]], requests: int, concurrency: int
+) -> list[float]:
+    out: list[float] = []
+    for _ in range(0, requests, concurrency):
+        out.extend(await asyncio.gather(*(fn() for _ in range(concurrency))))
+    return out
+
+
+def _row(name: str, samples: list[float], connections: int) -> str:
+    ms = sorted(s * 1000 for s in samples)
+    p95 = ms[int(len(ms) * 0.95) - 1]
+    return f"{name:<22} {statistics.median(ms):>9.2f} {p95:>9.2f} {connections:>12}"
+
+
+async def _main(requests: int, concurrency: int, handshake_ms: float) -> None:
+    print(f"requests={requests} concurrency={concurrency} handshake={handshake_ms} ms")
+    print(f"{'client':<22} {'p50 ms':>9} {'p95 ms':>9} {'connections':>12}")
+    for name, run in (("client per request", _per_request_client), ("pooled manager", _pooled)):
+        server = _MockCompletionServer(handshake_ms / 1000)
+        url = await server.start()
+        try:
+            samples = await run(url, requests, concurrency)
+        finally:
+            await server.stop()
+        print(_row(name, samples, server.connections))
+
+
+def main(requests: int, concurrency: int, handshake_ms: float) -> None:
+    logging.disable(logging.CRITICAL)
+    asyncio.run(_main(requests, concurrency, handshake_ms))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLM transport time-to-first-token benchmark")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--handshake-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    main(args.requests, args.concurrency, args.handshake_ms)
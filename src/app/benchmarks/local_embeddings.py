@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import random
+import time
+
+import numpy as np
+
+from app.ai.nlu.embeddings_clients import hash_embeddings
+
+_VOCAB = (
+    "create deploy storage account web app vm cluster kubernetes resource group in west "
+    "europe production staging dev cost budget alert monitor delete scale backup restore "
+    "network vnet subnet key vault secret sql database server container registry the a my "
+    "please with for to and of on high availability private endpoint premium standard sku"
+).split()
+
+
+def _legacy_hash_embedding(text: str, dim: int = 384) -> list[float]:
+    """Per-text MD5 implementation the batched embedder replaced, kept for comparison."""
+    words = text.lower().strip().split()
+    if not words:
+        return [0.0] * dim
+    features = [0.0] * dim
+
+    def word_hash(word: str, seed: int) -> str:
+        return f"{word}_{seed}"
+
+    def bigram_hash(word: str, seed: int) -> str:
+        next_word = words[(words.index(word) + 1) % len(words)]
+        return f"{word}_{next_word}_{seed}"
+
+    def position_hash(word: str, seed: int) -> str:
+        return f"{word}_{words.index(word) % 10}_{seed}"
+
+    for i, word in enumerate(words[:50]):
+        for hash_func in (word_hash, bigram_hash, position_hash):
+            for seed in range(2):
+                hash_val = int(hashlib.md5(hash_func(word, seed).encode()).hexdigest(), 16)
+                features[hash_val % dim] += 1.0 / (i + 1) ** 0.5
+    norm = sum(f * f for f in features) ** 0.5
+    return [f / norm for f in features] if norm > 0 else features
+
+
+def _texts(n: int, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(_VOCAB, k=rng.randint(4, 60))) for _ in range(n)]
+
+
+def main(n: int, dim: int) -> None:
+    texts = _texts(n)
+
+    start = time.perf_counter()
+    legacy = np.asarray([_legacy_hash_embedding(t, dim) for t in texts], dtype=np.float32)
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = hash_embeddings(texts, dim)
+    batched_s = time.perf_counter() - start
+
+    repeat = hash_embeddings(texts[::-1], dim)[::-1]
+    print(f"texts={n} dim={dim}")
+    print(f"legacy per-text md5   {n / legacy_s:>12,.0f} texts/s")
+    print(f"batched feature hash  {n / batched_s:>12,.0f} texts/s  ({legacy_s / batched_s:.1f}x)")
+    print(f"deterministic across batch order: {bool(np.array_equal(batched, repeat))}")
+    print(f"shapes legacy={legacy.shape} batched={batched.shape}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hash-embedding fallback throughput benchmark")
+    parser.add_argument("--texts", type=int, default=20_000)
+    parser.add_argument("--dim", type=int, default=384)
+    args = parser.parse_args()
+    main(args.texts, args.dim)
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import re
+import time
+from collections.abc import Callable
+
+from app.ai.nlu.matcher import get_nlu_matcher
+from app.ai.nlu.patterns import get_nlu_patterns
+from app.ai.nlu.unified_parser import clear_parse_cache, unified_nlu_parser
+
+# Prompts recorded from chat sessions, lightly anonymised.
+RECORDED_PROMPTS = [
+    "create a storage account named mystore123 in west europe in resource group rg-prod",
+    "please resize the vm web01 in rg dev to standard_d4s_v3 for production",
+    "deploy a new aks cluster called k8s-main in uk south with high availability",
+    "what's the cost forecast for my subscription this month",
+    "delete the key vault kv-test in resource group core",
+    "how do I check configuration drift on my webapp shop-frontend?",
+    "spin up a web app named checkout-api in rg payments in north europe, sku p1v3",
+    "create resource group rg-analytics in east us for staging",
+    "provision a sql server named orders-db in rg data with gdpr compliance",
+    "set up a container registry acrplatform01 in west europe",
+    "rollback the previous version of the website marketing-site",
+    "scale the aks cluster k8s-main to 5 nodes",
+    "backup the database orders-db before the migration",
+    "migrate the vm legacy-app to uk south using blue-green",
+    "encrypt the storage account logsarchive and make it private",
+    "monitor cpu on vm batch-worker-02 and alert me when it exceeds 80%",
+    "add a vnet called hub-network in rg networking in westeurope",
+    "can you optimize costs for the prod subscription?",
+    "restore the keyvault kv-shared from yesterday's snapshot",
+    "tear down everything in resource group rg-sandbox",
+    "validate the bicep template for the app service portal-web",
+    "new kubernetes cluster for team data in dev, hipaa workloads",
+    "create a cool tier blob storage archive2024 in rg backups",
+    "why is my deployment failing?",
+    "list all the resources in my subscription",
+    "make a website called docs-portal in west europe for production with dr",
+    "upgrade the sql server reporting-sql to a higher tier",
+    "check pci compliance for the payment app service",
+    "i need a new virtual machine named jumpbox in rg ops with size standard_b2s",
+    "show me the budget and cost analysis for last quarter",
+]
+
+
+def _legacy_scan(text: str, compiled: list[re.Pattern[str]]) -> int:
+    return sum(1 for pat in compiled if pat.search(text))
+
+
+def _timeit(fn: Callable[[str], object], prompts: list[str], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for p in prompts:
+            fn(p)
+    return (time.perf_counter() - start) / (rounds * len(prompts)) * 1e6
+
+
+def main(rounds: int) -> None:
+    logging.disable(logging.CRITICAL)
+    prompts = [p.lower().strip() for p in RECORDED_PROMPTS]
+    patterns = get_nlu_patterns()
+    legacy = [
+        re.compile(p, re.IGNORECASE)
+        for group in (
+            *patterns.intent_patterns.values(),
+            *patterns.resource_patterns.values(),
+            [p for p, _ in patterns.location_patterns],
+            patterns.in_context_patterns,
+            list(patterns.compliance_patterns.values()),
+        )
+        for p in group
+    ]
+    matcher = get_nlu_matcher()
+    parser = unified_nlu_parser()
+
+    def parse_uncached(text: str) -> object:
+        clear_parse_cache()
+        return parser.parse(text)
+
+    results = {
+        "all patterns, one by one": _timeit(lambda t: _legacy_scan(t, legacy), prompts, rounds),
+        "matcher scan": _timeit(matcher.scan, prompts, rounds),
+        "parse, cache cold": _timeit(parse_uncached, prompts, rounds),
+        "parse, cache warm": _timeit(parser.parse, prompts, rounds),
+        "parser construction": _timeit(lambda _: unified_nlu_parser(), prompts, rounds),
+    }
+    print(f"prompts={len(prompts)} rounds={rounds}")
+    for name, us in results.items():
+        print(f"{name:<28} {us:>10.1f} us/op")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rule-based NLU parser benchmark")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    main(args.rounds)
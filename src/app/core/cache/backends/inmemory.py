@@ -3,6 +3,7 @@ from __future__ import annotations
 import asyncio
 import time
 from collections import OrderedDict
+from collections.abc import Mapping, Sequence
 from typing import Any
 
 from app.core.cache.base import CacheBackend
@@ -21,39 +22,79 @@ class InMemoryCache(CacheBackend):
 
     async def get(self, key: str) -> Any | None:
         async with self._lock:
-            item = self._data.get(key)
-            if item is None:
-                return None
-            value, expiry = item
-            if expiry and expiry < time.time():
-                del self._data[key]
-                return None
-            self._data.move_to_end(key)
-            return value
+            return self._get_locked(key)
 
     async def set(self, key: str, value: Any, ttl: int | None = None) -> bool:
+        async with self._lock:
+            return self._set_locked(key, value, ttl)
+
+    def _get_locked(self, key: str) -> Any | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expiry = item
+        if expiry and expiry < time.time():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def _set_locked(self, key: str, value: Any, ttl: int | None) -> bool:
+        seconds = ttl if ttl is not None else self.default_ttl
+        expiry = time.time() + seconds if seconds > 0 else 0.0
+        is_update = key in self._data
+        if is_update:
+            self._data.move_to_end(key)
+        self._data[key] = (value, expiry)
+        evicted = 0
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            evicted += 1
+        if evicted > 0:
+            logger.debug("Cache eviction occurred", evicted_count=evicted)
+        logger.debug(
+            "Cache set operation",
+            key=key[:32],
+            is_update=is_update,
+            ttl=seconds,
+            cache_size=len(self._data),
+        )
+        return True
+
+    async def get_many(self, keys: Sequence[str]) -> dict[str, Any]:
+        async with self._lock:
+            now = time.time()
+            out: dict[str, Any] = {}
+            for key in keys:
+                item = self._data.get(key)
+                if item is None:
+                    continue
+                value, expiry = item
+                if expiry and expiry < now:
+                    del self._data[key]
+                    continue
+                self._data.move_to_end(key)
+                out[key] = value
+            return out
+
+    async def set_many(self, items: Mapping[str, Any], ttl: int | None = None) -> bool:
         async with self._lock:
             seconds = ttl if ttl is not None else self.default_ttl
             expiry = time.time() + seconds if seconds > 0 else 0.0
-            is_update = key in self._data
-            if is_update:
+            for key, value in items.items():
+                self._data[key] = (value, expiry)
                 self._data.move_to_end(key)
-            self._data[key] = (value, expiry)
             evicted = 0
             while len(self._data) > self.max_size:
                 self._data.popitem(last=False)
                 evicted += 1
             if evicted > 0:
                 logger.debug("Cache eviction occurred", evicted_count=evicted)
-            logger.debug(
-                "Cache set operation",
-                key=key[:32],
-                is_update=is_update,
-                ttl=seconds,
-                cache_size=len(self._data),
-            )
             return True
 
+    async def delete_many(self, keys: Sequence[str]) -> int:
+        return await self.delete(*keys)
+
     async def delete(self, *keys: str) -> int:
         async with self._lock:
             count = 0
@@ -79,9 +120,8 @@ class InMemoryCache(CacheBackend):
 
     async def incr(self, key: str, amount: int = 1) -> int:
         async with self._lock:
-            current = await self.get(key)
-            v = int(current or 0) + amount
-            await self.set(key, v, ttl=self.default_ttl)
+            v = int(self._get_locked(key) or 0) + amount
+            self._set_locked(key, v, self.default_ttl)
             return v
 
     async def decr(self, key: str, amount: int = 1) -> int:
@@ -89,9 +129,9 @@ class InMemoryCache(CacheBackend):
 
     async def hset(self, name: str, key: str, value: Any) -> int:
         async with self._lock:
-            mapping = await self.get(name) or {}
+            mapping = self._get_locked(name) or {}
             mapping[str(key)] = value
-            await self.set(name, mapping, ttl=self.default_ttl)
+            self._set_locked(name, mapping, self.default_ttl)
             return 1
 
     async def hget(self, name: str, key: str) -> Any | None:
@@ -103,22 +143,19 @@ class InMemoryCache(CacheBackend):
 
     async def lpush(self, key: str, *values: Any) -> int:
         async with self._lock:
-            lst = await self.get(key) or []
-            lst = list(values) + list(lst)
-            await self.set(key, lst, ttl=self.default_ttl)
+            lst = [*reversed(values), *(self._get_locked(key) or [])]
+            self._set_locked(key, lst, self.default_ttl)
             return len(lst)
 
     async def rpop(self, key: str, count: int | None = None) -> Any:
         async with self._lock:
-            lst = await self.get(key) or []
+            lst = self._get_locked(key) or []
             if not lst:
                 return None
             if count is None:
-                return lst.pop() if lst else None
-            out = []
-            for _ in range(min(count, len(lst))):
-                out.append(lst.pop())
-            await self.set(key, lst, ttl=self.default_ttl)
+                return lst.pop()
+            out = [lst.pop() for _ in range(min(count, len(lst)))]
+            self._set_locked(key, lst, self.default_ttl)
             return out
 
     async def invalidate(self, pattern: str | None = None) -> int:
@@ -1,13 +1,13 @@
 from __future__ import annotations
 
-from collections.abc import Awaitable
+from collections.abc import Awaitable, Mapping, Sequence
 from typing import Any, cast
 
 from redis.asyncio import ConnectionPool, Redis
 from redis.exceptions import RedisError
 
 from app.core.cache.base import CacheBackend
-from app.core.cache.serializers import dumps, loads
+from app.core.cache.serializers import decode, encode
 
 
 class RedisCache(CacheBackend):
@@ -21,45 +21,83 @@ class RedisCache(CacheBackend):
         self._pool = ConnectionPool.from_url(
             url,
             max_connections=max_connections,
-            decode_responses=True,
+            decode_responses=False,
         )
         self._client: Redis | None = None
 
     async def _client_or_init(self) -> Redis:
         if self._client is None:
             self._client = Redis(connection_pool=self._pool)
-            fut = cast("Awaitable[bool]", self._client.ping())
+            fut = self._client.ping()
             await fut
         return self._client
 
+    async def client(self) -> Redis:
+        """Underlying client, for callers that need Redis-native commands."""
+        return await self._client_or_init()
+
     async def get(self, key: str) -> Any | None:
         try:
             cli = await self._client_or_init()
-            fut = cast("Awaitable[str | None]", cli.get(key))
+            fut = cast("Awaitable[bytes | None]", cli.get(key))
             raw = await fut
             if raw is None:
                 return None
-            return loads(raw.encode("utf-8"))
+            return decode(raw)
         except RedisError:
             raise
 
     async def set(self, key: str, value: Any, ttl: int | None = None) -> bool:
         try:
             cli = await self._client_or_init()
-            data = dumps(value).decode("utf-8")
+            data = encode(value)
             seconds = ttl if ttl is not None else self.default_ttl
             if seconds > 0:
-                fut = cast("Awaitable[bool]", cli.setex(key, seconds, data))
+                fut = cli.setex(key, seconds, data)
                 return await fut
             fut = cast("Awaitable[bool]", cli.set(key, data))
             return await fut
         except RedisError:
             raise
 
+    async def get_many(self, keys: Sequence[str]) -> dict[str, Any]:
+        if not keys:
+            return {}
+        try:
+            cli = await self._client_or_init()
+            fut = cast("Awaitable[list[bytes | None]]", cli.mget(list(keys)))
+            raws = await fut
+            return {k: decode(raw) for k, raw in zip(keys, raws, strict=True) if raw is not None}
+        except RedisError:
+            raise
+
+    async def set_many(self, items: Mapping[str, Any], ttl: int | None = None) -> bool:
+        if not items:
+            return True
+        try:
+            cli = await self._client_or_init()
+            seconds = ttl if ttl is not None else self.default_ttl
+            if seconds <= 0:
+                payload = {k: encode(v) for k, v in items.items()}
+                fut = cli.mset(payload)
+                return bool(await fut)
+            async with cli.pipeline(transaction=False) as pipe:
+                for k, v in items.items():
+                    pipe.setex(k, seconds, encode(v))
+                results = await pipe.execute()
+            return all(bool(r) for r in results)
+        except RedisError:
+            raise
+
+    async def delete_many(self, keys: Sequence[str]) -> int:
+        if not keys:
+            return 0
+        return await self.delete(*keys)
+
     async def delete(self, *keys: str) -> int:
         try:
             cli = await self._client_or_init()
-            fut = cast("Awaitable[int]", cli.delete(*keys))
+            fut = cli.delete(*keys)
             return await fut
         except RedisError:
             raise
@@ -67,7 +105,7 @@ class RedisCache(CacheBackend):
     async def exists(self, *keys: str) -> int:
         try:
             cli = await self._client_or_init()
-            fut = cast("Awaitable[int]", cli.exists(*keys))
+            fut = cli.exists(*keys)
             return await fut
         except RedisError:
             raise
@@ -75,7 +113,7 @@ class RedisCache(CacheBackend):
     async def expire(self, key: str, seconds: int) -> bool:
         try:
             cli = await self._client_or_init()
-            fut = cast("Awaitable[bool]", cli.expire(key, seconds))
+            fut = cli.expire(key, seconds)
             return await fut
         except RedisError:
             raise
@@ -83,7 +121,7 @@ class RedisCache(CacheBackend):
     async def incr(self, key: str, amount: int = 1) -> int:
         try:
             cli = await self._client_or_init()
-            fut = cast("Awaitable[int]", cli.incrby(key, amount))
+            fut = cli.incrby(key, amount)
             return await fut
         except RedisError:
             raise
@@ -91,7 +129,7 @@ class RedisCache(CacheBackend):
     async def decr(self, key: str, amount: int = 1) -> int:
         try:
             cli = await self._client_or_init()
-            fut = cast("Awaitable[int]", cli.decrby(key, amount))
+            fut = cli.decrby(key, amount)
             return await fut
         except RedisError:
             raise
@@ -99,8 +137,8 @@ class RedisCache(CacheBackend):
     async def hset(self, name: str, key: str, value: Any) -> int:
         try:
             cli = await self._client_or_init()
-            serialized_value = dumps(value).decode("utf-8")
-            fut = cast("Awaitable[int]", cli.hset(name, key, serialized_value))
+            serialized_value = encode(value)
+            fut = cli.hset(name, key, serialized_value)
             return await fut
         except RedisError:
             raise
@@ -108,11 +146,11 @@ class RedisCache(CacheBackend):
     async def hget(self, name: str, key: str) -> Any | None:
         try:
             cli = await self._client_or_init()
-            fut = cast("Awaitable[str | None]", cli.hget(name, key))
+            fut = cast("Awaitable[bytes | None]", cli.hget(name, key))
             raw = await fut
             if raw is None:
                 return None
-            return loads(raw.encode("utf-8"))
+            return decode(raw)
         except RedisError:
             raise
 
@@ -123,7 +161,7 @@ class RedisCache(CacheBackend):
             data = await fut
             out: dict[str, Any] = {}
             for k, v in data.items():
-                out[(k.decode() if isinstance(k, bytes) else str(k))] = loads(v)
+                out[(k.decode() if isinstance(k, bytes) else str(k))] = decode(v)
             return out
         except RedisError:
             raise
@@ -131,8 +169,8 @@ class RedisCache(CacheBackend):
     async def lpush(self, key: str, *values: Any) -> int:
         try:
             cli = await self._client_or_init()
-            payload = [dumps(v) for v in values]
-            fut = cast("Awaitable[int]", cli.lpush(key, *payload))
+            payload = [encode(v) for v in values]
+            fut = cli.lpush(key, *payload)
             return await fut
         except RedisError:
             raise
@@ -143,12 +181,12 @@ class RedisCache(CacheBackend):
             if count is None:
                 fut_one = cast("Awaitable[bytes | None]", cli.rpop(key))
                 raw = await fut_one
-                return loads(raw) if raw is not None else None
+                return decode(raw) if raw is not None else None
             fut_many = cast("Awaitable[list[bytes] | None]", cli.rpop(key, count))
             raw_list = await fut_many
             if raw_list is None:
                 return None
-            return [loads(b) for b in raw_list]
+            return [decode(b) for b in raw_list]
         except RedisError:
             raise
 
@@ -163,7 +201,7 @@ class RedisCache(CacheBackend):
                 keys = await fut_keys
             if not keys:
                 return 0
-            fut_del = cast("Awaitable[int]", cli.delete(*keys))
+            fut_del = cli.delete(*keys)
             return await fut_del
         except RedisError:
             raise
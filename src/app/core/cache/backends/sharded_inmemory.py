@@ -0,0 +1,444 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import sys
+import time
+from collections import OrderedDict
+from collections.abc import Iterator, Mapping, Sequence
+from typing import Any, Literal
+
+from prometheus_client import Counter, Gauge
+
+from app.core.cache.base import CacheBackend
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+L1_EVICTIONS = Counter(
+    "cache_l1_evictions_total", "Sharded L1 entries removed", labelnames=("reason",)
+)
+L1_BYTES = Gauge("cache_l1_bytes", "Estimated bytes held by the sharded L1 cache")
+_EVICTED_SIZE = L1_EVICTIONS.labels(reason="size")
+_EVICTED_REJECTED = L1_EVICTIONS.labels(reason="rejected")
+_EVICTED_OVERSIZE = L1_EVICTIONS.labels(reason="oversize")
+_EVICTED_EXPIRED = L1_EVICTIONS.labels(reason="expired")
+
+AdmissionPolicy = Literal["tinylfu", "lru"]
+
+# Entry layout: (value, expiry_monotonic_or_0, size_bytes)
+_Entry = tuple[Any, float, int]
+
+_MASK64 = (1 << 64) - 1
+_SKETCH_SEEDS = (
+    0x9E3779B97F4A7C15,
+    0xC2B2AE3D27D4EB4F,
+    0x165667B19E3779F9,
+    0xD6E8FEB86659FD93,
+)
+_HALVE = bytes(i >> 1 for i in range(256))
+
+
+def _next_pow2(n: int) -> int:
+    return 1 << max(0, int(n) - 1).bit_length()
+
+
+def _estimate_size(value: Any) -> int:
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(map(sys.getsizeof, value)) + sum(map(sys.getsizeof, value.values()))
+    elif isinstance(value, list | tuple | set | frozenset):
+        size += sum(map(sys.getsizeof, value))
+    return size
+
+
+class _FrequencySketch:
+    """Count-min sketch with 4-bit saturating counters and periodic halving."""
+
+    __slots__ = ("_rows", "_shift", "_additions", "_sample_size")
+
+    def __init__(self, width: int) -> None:
+        width = _next_pow2(max(64, width))
+        self._rows = [bytearray(width) for _ in _SKETCH_SEEDS]
+        self._shift = 64 - (width.bit_length() - 1)
+        self._additions = 0
+        self._sample_size = width * 10
+
+    def increment(self, key: str) -> None:
+        h = hash(key) & _MASK64
+        shift = self._shift
+        r0, r1, r2, r3 = self._rows
+        i0 = ((h * _SKETCH_SEEDS[0]) & _MASK64) >> shift
+        i1 = ((h * _SKETCH_SEEDS[1]) & _MASK64) >> shift
+        i2 = ((h * _SKETCH_SEEDS[2]) & _MASK64) >> shift
+        i3 = ((h * _SKETCH_SEEDS[3]) & _MASK64) >> shift
+        if r0[i0] < 15:
+            r0[i0] += 1
+        if r1[i1] < 15:
+            r1[i1] += 1
+        if r2[i2] < 15:
+            r2[i2] += 1
+        if r3[i3] < 15:
+            r3[i3] += 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            for row in self._rows:
+                row[:] = row.translate(_HALVE)
+            self._additions //= 2
+
+    def frequency(self, key: str) -> int:
+        h = hash(key) & _MASK64
+        shift = self._shift
+        r0, r1, r2, r3 = self._rows
+        return min(
+            r0[((h * _SKETCH_SEEDS[0]) & _MASK64) >> shift],
+            r1[((h * _SKETCH_SEEDS[1]) & _MASK64) >> shift],
+            r2[((h * _SKETCH_SEEDS[2]) & _MASK64) >> shift],
+            r3[((h * _SKETCH_SEEDS[3]) & _MASK64) >> shift],
+        )
+
+
+class _Shard:
+    __slots__ = (
+        "window",
+        "main",
+        "window_bytes",
+        "main_bytes",
+        "window_budget",
+        "main_budget",
+        "sketch",
+    )
+
+    def __init__(self, budget: int, policy: AdmissionPolicy, sketch_width: int) -> None:
+        self.window: OrderedDict[str, _Entry] = OrderedDict()
+        self.main: OrderedDict[str, _Entry] = OrderedDict()
+        self.window_bytes = 0
+        self.main_bytes = 0
+        if policy == "tinylfu":
+            self.window_budget = max(1, budget // 100)
+            self.sketch: _FrequencySketch | None = _FrequencySketch(sketch_width)
+        else:
+            self.window_budget = 0
+            self.sketch = None
+        self.main_budget = budget - self.window_budget
+
+    def lookup(self, key: str) -> _Entry | None:
+        if self.sketch is not None:
+            self.sketch.increment(key)
+        entry = self.window.get(key)
+        if entry is not None:
+            self.window.move_to_end(key)
+            return entry
+        entry = self.main.get(key)
+        if entry is not None:
+            self.main.move_to_end(key)
+        return entry
+
+    def peek(self, key: str) -> _Entry | None:
+        entry = self.window.get(key)
+        return entry if entry is not None else self.main.get(key)
+
+    def remove(self, key: str) -> _Entry | None:
+        entry = self.window.pop(key, None)
+        if entry is not None:
+            self.window_bytes -= entry[2]
+            return entry
+        entry = self.main.pop(key, None)
+        if entry is not None:
+            self.main_bytes -= entry[2]
+        return entry
+
+    def replace_expiry(self, key: str, expiry: float) -> bool:
+        for segment in (self.window, self.main):
+            entry = segment.get(key)
+            if entry is not None:
+                segment[key] = (entry[0], expiry, entry[2])
+                return True
+        return False
+
+    def insert(self, key: str, entry: _Entry) -> bool:
+        """Insert ``entry``, evicting as needed; return whether it is still resident."""
+        self.remove(key)
+        if self.sketch is None:
+            return self._admit_main(key, entry, force=True)
+        self.sketch.increment(key)
+        self.window[key] = entry
+        self.window_bytes += entry[2]
+        while self.window_bytes > self.window_budget and self.window:
+            cand_key, cand = self.window.popitem(last=False)
+            self.window_bytes -= cand[2]
+            self._admit_main(cand_key, cand, force=False)
+        return key in self.window or key in self.main
+
+    def _admit_main(self, key: str, entry: _Entry, force: bool) -> bool:
+        if entry[2] > self.main_budget:
+            _EVICTED_OVERSIZE.inc()
+            return False
+        main = self.main
+        # Pick every victim and compare it with the candidate before evicting any, so a
+        # rejected candidate never costs the entries that would have made room for it.
+        victims: list[str] = []
+        freed = 0
+        for victim_key, victim in main.items():
+            if self.main_bytes - freed + entry[2] <= self.main_budget:
+                break
+            if (
+                not force
+                and self.sketch is not None
+                and self.sketch.frequency(key) <= self.sketch.frequency(victim_key)
+            ):
+                _EVICTED_REJECTED.inc()
+                return False
+            victims.append(victim_key)
+            freed += victim[2]
+        for victim_key in victims:
+            self.main_bytes -= main.pop(victim_key)[2]
+            _EVICTED_SIZE.inc()
+        main[key] = entry
+        self.main_bytes += entry[2]
+        return True
+
+    def clear(self) -> int:
+        n = len(self.window) + len(self.main)
+        self.window.clear()
+        self.main.clear()
+        self.window_bytes = 0
+        self.main_bytes = 0
+        return n
+
+    def keys(self) -> list[str]:
+        return [*self.window, *self.main]
+
+    def __len__(self) -> int:
+        return len(self.window) + len(self.main)
+
+
+class _TimerWheel:
+    """Hashed timer wheel; keys may sit in a slot for several rotations."""
+
+    __slots__ = ("_tick", "_slots", "_cursor")
+
+    def __init__(self, tick: float, n_slots: int) -> None:
+        self._tick = tick
+        self._slots: list[set[str]] = [set() for _ in range(n_slots)]
+        self._cursor = int(time.monotonic() / tick)
+
+    def schedule(self, key: str, expiry: float) -> None:
+        due = max(int(expiry / self._tick), self._cursor + 1)
+        self._slots[due % len(self._slots)].add(key)
+
+    def advance(self, now: float) -> Iterator[str]:
+        target = int(now / self._tick)
+        steps = min(target - self._cursor, len(self._slots))
+        start = self._cursor
+        self._cursor = target
+        for step in range(1, steps + 1):
+            idx = (start + step) % len(self._slots)
+            due, self._slots[idx] = self._slots[idx], set()
+            yield from due
+
+    def clear(self) -> None:
+        for slot in self._slots:
+            slot.clear()
+
+
+class ShardedInMemoryCache(CacheBackend):
+    """Byte-budgeted L1 cache split over independent shards.
+
+    Every operation completes without awaiting, so no lock is needed on the event loop.
+    Expired entries are removed lazily on read and proactively by a timer-wheel sweeper.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 128 * 1024 * 1024,
+        default_ttl: int = 300,
+        shards: int = 16,
+        policy: AdmissionPolicy = "tinylfu",
+        expected_entries: int = 20000,
+        sweep_interval: float = 1.0,
+        wheel_slots: int = 512,
+    ) -> None:
+        n_shards = _next_pow2(max(1, shards))
+        logger.info(
+            "Initializing sharded in-memory cache",
+            max_bytes=max_bytes,
+            shards=n_shards,
+            policy=policy,
+            default_ttl=default_ttl,
+        )
+        self.max_bytes = int(max_bytes)
+        self.default_ttl = default_ttl
+        self.policy: AdmissionPolicy = policy
+        self._mask = n_shards - 1
+        per_shard = max(1, self.max_bytes // n_shards)
+        width = max(1, expected_entries // n_shards)
+        self._shards = [_Shard(per_shard, policy, width) for _ in range(n_shards)]
+        self._wheel = _TimerWheel(sweep_interval, wheel_slots)
+        self._sweep_interval = sweep_interval
+        self._sweeper: asyncio.Task[None] | None = None
+
+    def _shard(self, key: str) -> _Shard:
+        return self._shards[hash(key) & self._mask]
+
+    def _expiry(self, ttl: int | None) -> float:
+        seconds = ttl if ttl is not None else self.default_ttl
+        return time.monotonic() + seconds if seconds > 0 else 0.0
+
+    def _read(self, key: str) -> Any | None:
+        shard = self._shard(key)
+        entry = shard.lookup(key)
+        if entry is None:
+            return None
+        expiry = entry[1]
+        if expiry and expiry < time.monotonic():
+            self._drop(shard, key)
+            _EVICTED_EXPIRED.inc()
+            return None
+        return entry[0]
+
+    def _write(self, key: str, value: Any, expiry: float) -> bool:
+        size = sys.getsizeof(key) + _estimate_size(value)
+        resident = self._shard(key).insert(key, (value, expiry, size))
+        if expiry and resident:
+            self._wheel.schedule(key, expiry)
+            self._ensure_sweeper()
+        return resident
+
+    def _drop(self, shard: _Shard, key: str) -> bool:
+        return shard.remove(key) is not None
+
+    def _ensure_sweeper(self) -> None:
+        if self._sweeper is not None and not self._sweeper.done():
+            return
+
+        async def _run() -> None:
+            while True:
+                await asyncio.sleep(self._sweep_interval)
+                self.sweep_expired()
+
+        self._sweeper = asyncio.create_task(_run())
+
+    def sweep_expired(self, now: float | None = None) -> int:
+        current = time.monotonic() if now is None else now
+        removed = 0
+        for key in self._wheel.advance(current):
+            shard = self._shard(key)
+            entry = shard.peek(key)
+            if entry is None or not entry[1]:
+                continue
+            if entry[1] <= current:
+                removed += int(self._drop(shard, key))
+            else:
+                self._wheel.schedule(key, entry[1])
+        if removed:
+            _EVICTED_EXPIRED.inc(removed)
+        L1_BYTES.set(self.size_bytes)
+        return removed
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self._shards)
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(s.window_bytes + s.main_bytes for s in self._shards)
+
+    async def get(self, key: str) -> Any | None:
+        return self._read(key)
+
+    async def set(self, key: str, value: Any, ttl: int | None = None) -> bool:
+        return self._write(key, value, self._expiry(ttl))
+
+    async def get_many(self, keys: Sequence[str]) -> dict[str, Any]:
+        out: dict[str, Any] = {}
+        for key in keys:
+            value = self._read(key)
+            if value is not None:
+                out[key] = value
+        return out
+
+    async def set_many(self, items: Mapping[str, Any], ttl: int | None = None) -> bool:
+        expiry = self._expiry(ttl)
+        ok = True
+        for key, value in items.items():
+            ok &= self._write(key, value, expiry)
+        return ok
+
+    async def delete_many(self, keys: Sequence[str]) -> int:
+        return await self.delete(*keys)
+
+    async def delete(self, *keys: str) -> int:
+        return sum(1 for k in keys if self._drop(self._shard(k), k))
+
+    async def exists(self, *keys: str) -> int:
+        return sum(1 for k in keys if self._read(k) is not None)
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        if self._read(key) is None:
+            return False
+        expiry = time.monotonic() + seconds if seconds > 0 else 0.0
+        self._shard(key).replace_expiry(key, expiry)
+        if expiry:
+            self._wheel.schedule(key, expiry)
+            self._ensure_sweeper()
+        return True
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        v = int(self._read(key) or 0) + amount
+        self._write(key, v, self._expiry(None))
+        return v
+
+    async def decr(self, key: str, amount: int = 1) -> int:
+        return await self.incr(key, -amount)
+
+    async def hset(self, name: str, key: str, value: Any) -> int:
+        mapping = dict(self._read(name) or {})
+        mapping[str(key)] = value
+        self._write(name, mapping, self._expiry(None))
+        return 1
+
+    async def hget(self, name: str, key: str) -> Any | None:
+        mapping = self._read(name) or {}
+        return mapping.get(str(key))
+
+    async def hgetall(self, name: str) -> dict[str, Any]:
+        return dict(self._read(name) or {})
+
+    async def lpush(self, key: str, *values: Any) -> int:
+        lst = [*reversed(values), *(self._read(key) or [])]
+        self._write(key, lst, self._expiry(None))
+        return len(lst)
+
+    async def rpop(self, key: str, count: int | None = None) -> Any:
+        lst = list(self._read(key) or [])
+        if not lst:
+            return None
+        if count is None:
+            out: Any = lst.pop()
+        else:
+            out = [lst.pop() for _ in range(min(count, len(lst)))]
+        self._write(key, lst, self._expiry(None))
+        return out
+
+    async def invalidate(self, pattern: str | None = None) -> int:
+        if pattern is None:
+            n = sum(s.clear() for s in self._shards)
+            self._wheel.clear()
+            L1_BYTES.set(0)
+            logger.info("Clearing entire cache", cleared_count=n)
+            return n
+        n = 0
+        for shard in self._shards:
+            for k in shard.keys():
+                if pattern in k:
+                    n += int(self._drop(shard, k))
+        logger.info("Pattern-based cache invalidation", pattern=pattern, cleared_count=n)
+        return n
+
+    async def aclose(self) -> None:
+        task = self._sweeper
+        self._sweeper = None
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections.abc import Mapping, Sequence
 from typing import Any, Protocol, runtime_checkable
 
 
@@ -11,6 +12,9 @@ class CacheError(Exception):
 class CacheBackend(Protocol):
     async def get(self, key: str) -> Any | None: ...
     async def set(self, key: str, value: Any, ttl: int | None = None) -> bool: ...
+    async def get_many(self, keys: Sequence[str]) -> dict[str, Any]: ...
+    async def set_many(self, items: Mapping[str, Any], ttl: int | None = None) -> bool: ...
+    async def delete_many(self, keys: Sequence[str]) -> int: ...
 
     async def delete(self, *keys: str) -> int: ...
     async def exists(self, *keys: str) -> int: ...
@@ -6,8 +6,15 @@ import os
 from app.ai.nlu.embeddings_classifier import EmbeddingsClassifierService
 from app.core.cache.backends.inmemory import InMemoryCache
 from app.core.cache.backends.redis_backend import RedisCache
+from app.core.cache.backends.sharded_inmemory import ShardedInMemoryCache
+from app.core.cache.base import CacheBackend
 from app.core.cache.hybrid_cache import HybridCache
-from app.core.cache.ml_optimizer import EmbeddingsTierOptimizer
+from app.core.cache.ml_optimizer import (
+    BatchedEmbeddingsTierOptimizer,
+    CacheTierOptimizer,
+    EmbeddingsTierOptimizer,
+    EwmaOptimizer,
+)
 
 _lock = asyncio.Lock()
 _instance: HybridCache | None = None
@@ -21,9 +28,30 @@ async def get_cache() -> HybridCache:
         if _instance is not None:
             return _instance
         redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-        l1 = InMemoryCache(max_size=int(os.getenv("CACHE_L1_MAX", "20000")))
+        l1_max = int(os.getenv("CACHE_L1_MAX", "20000"))
+        l1: CacheBackend
+        if os.getenv("CACHE_L1_BACKEND", "memory").lower() == "sharded":
+            l1 = ShardedInMemoryCache(
+                max_bytes=int(os.getenv("CACHE_L1_MAX_BYTES", str(128 * 1024 * 1024))),
+                policy="lru" if os.getenv("CACHE_L1_POLICY", "").lower() == "lru" else "tinylfu",
+                expected_entries=l1_max,
+            )
+        else:
+            l1 = InMemoryCache(max_size=l1_max)
         l2 = RedisCache(url=redis_url, default_ttl=int(os.getenv("CACHE_TTL", "3600")))
-        model = EmbeddingsClassifierService(num_labels=2, ckpt=os.getenv("CACHE_TIER_CKPT"))
-        optimizer = EmbeddingsTierOptimizer(model=model, label_to_index=[0, 1])
+        mode = os.getenv("CACHE_TIER_OPTIMIZER", "batched").lower()
+        optimizer: CacheTierOptimizer
+        if mode == "ewma":
+            optimizer = EwmaOptimizer()
+        else:
+            model = EmbeddingsClassifierService(num_labels=2, ckpt=os.getenv("CACHE_TIER_CKPT"))
+            if mode == "embeddings":
+                optimizer = EmbeddingsTierOptimizer(model=model, label_to_index=[0, 1])
+            else:
+                optimizer = BatchedEmbeddingsTierOptimizer(
+                    model=model,
+                    label_to_index=[0, 1],
+                    latency_budget_ms=float(os.getenv("CACHE_TIER_BUDGET_MS", "2")),
+                )
         _instance = HybridCache([l1, l2], optimizer=optimizer)
         return _instance
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import asyncio
+import math
 import time
-from collections.abc import Sequence
+from collections.abc import Awaitable, Callable, Mapping, Sequence
 from typing import Any
 
 from opentelemetry import trace
@@ -24,6 +25,15 @@ CACHE_LATENCY = Histogram(
     labelnames=("op", "level", "success"),
     buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
 )
+CACHE_COALESCED = Counter(
+    "cache_coalesced_waiters_total", "Callers that joined an in-flight cache load"
+)
+CACHE_STALE_SERVED = Counter("cache_stale_served_total", "Stale values served while refreshing")
+CACHE_REFRESH = Counter(
+    "cache_background_refresh_total", "Background cache refreshes", labelnames=("success",)
+)
+
+_SWR_MARKER = "__swr__"
 
 
 class HybridCache:
@@ -34,6 +44,7 @@ class HybridCache:
             raise ValueError("levels required")
         self.levels = list(levels)
         self._optimizer: CacheTierOptimizer = optimizer or EwmaOptimizer()
+        self._inflight: dict[str, asyncio.Task[Any]] = {}
 
     async def get(self, key: str) -> Any | None:
         start = time.perf_counter()
@@ -68,18 +79,19 @@ class HybridCache:
                     time.perf_counter() - start
                 )
                 return None
-            if hit_index > 0:
+            promote_ttl = _local_ttl(value)
+            if hit_index > 0 and promote_ttl != 0:
                 try:
                     async with asyncio.TaskGroup() as tg:
                         for j in range(hit_index):
-                            tg.create_task(self.levels[j].set(key, value))
+                            tg.create_task(self.levels[j].set(key, value, promote_ttl))
                 except Exception as exc:
                     logger.debug(
                         "cache.promote.error",
                         extra={"key_hash": hash(key), "from": hit_index, "error": str(exc)},
                         exc_info=True,
                     )
-            await self._optimizer.observe_hit(key)
+            await self._optimizer.observe_hit(key, hit_index)
             CACHE_HITS.labels(level=str(hit_index)).inc()
             CACHE_OPS.labels(op="get", success="true").inc()
             CACHE_LATENCY.labels(op="get", level=str(hit_index), success="true").observe(
@@ -118,18 +130,186 @@ class HybridCache:
             )
             return ok
 
+    async def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int,
+        stale_ttl: int = 0,
+    ) -> Any | None:
+        """Return the cached value for ``key`` or compute it once via ``loader``.
+
+        Concurrent misses for the same key share a single in-flight ``loader`` call.
+        With ``stale_ttl > 0`` the value stays servable for ``stale_ttl`` seconds after
+        it goes stale; stale reads return immediately and trigger one background refresh.
+        """
+        with tracer.start_as_current_span("cache.get_or_set") as span:
+            span.set_attribute("cache.key_len", len(key))
+            cached = await self.get(key)
+            if cached is not None:
+                if not _is_swr_envelope(cached):
+                    return cached
+                fresh_until = float(cached.get("fresh_until") or 0.0)
+                if not fresh_until or fresh_until > time.time():
+                    return cached["value"]
+                if key not in self._inflight:
+                    self._start_load(key, loader, ttl, stale_ttl, background=True)
+                CACHE_STALE_SERVED.inc()
+                span.set_attribute("cache.stale", True)
+                return cached["value"]
+            task = self._inflight.get(key)
+            if task is not None:
+                CACHE_COALESCED.inc()
+                span.set_attribute("cache.coalesced", True)
+            else:
+                task = self._start_load(key, loader, ttl, stale_ttl, background=False)
+            return await asyncio.shield(task)
+
+    def _start_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int,
+        stale_ttl: int,
+        background: bool,
+    ) -> asyncio.Task[Any]:
+        task = asyncio.create_task(self._load_and_store(key, loader, ttl, stale_ttl))
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._on_load_done(key, t, background))
+        return task
+
+    async def _load_and_store(
+        self, key: str, loader: Callable[[], Awaitable[Any]], ttl: int, stale_ttl: int
+    ) -> Any | None:
+        value = await loader()
+        if value is None:
+            return None
+        if stale_ttl > 0:
+            envelope = {
+                _SWR_MARKER: 1,
+                "value": value,
+                "fresh_until": time.time() + ttl if ttl > 0 else 0.0,
+            }
+            if ttl > 0 and len(self.levels) > 1:
+                # Upper levels are per process. They hold the envelope only while it is
+                # fresh, so a stale read falls through to the shared last level and picks
+                # up a refresh another process has already stored there.
+                await asyncio.gather(
+                    self.set(key, envelope, ttl=ttl, tier_index=len(self.levels) - 2),
+                    self._set_level(len(self.levels) - 1, key, envelope, ttl + stale_ttl),
+                )
+            else:
+                await self.set(key, envelope, ttl=ttl + stale_ttl if ttl > 0 else 0)
+        else:
+            await self.set(key, value, ttl=ttl)
+        return value
+
+    async def _set_level(self, index: int, key: str, value: Any, ttl: int) -> bool:
+        try:
+            return bool(await self.levels[index].set(key, value, ttl))
+        except Exception as exc:
+            logger.warning(
+                "cache.set.error",
+                extra={"key_hash": hash(key), "level": index, "error": str(exc)},
+                exc_info=True,
+            )
+            return False
+
+    def _on_load_done(self, key: str, task: asyncio.Task[Any], background: bool) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if background:
+            CACHE_REFRESH.labels(success=str(exc is None).lower()).inc()
+        if exc is not None:
+            logger.warning(
+                "cache.load.error",
+                extra={"key_hash": hash(key), "background": background, "error": str(exc)},
+            )
+
+    async def get_many(self, keys: Sequence[str]) -> dict[str, Any]:
+        start = time.perf_counter()
+        with tracer.start_as_current_span("cache.get_many") as span:
+            span.set_attribute("cache.key_count", len(keys))
+            remaining = list(dict.fromkeys(keys))
+            found: dict[str, Any] = {}
+            found_at: list[dict[str, Any]] = []
+            for idx, lvl in enumerate(self.levels):
+                hits: dict[str, Any] = {}
+                if remaining:
+                    try:
+                        hits = await lvl.get_many(remaining)
+                    except Exception as exc:
+                        logger.warning(
+                            "cache.get_many.error",
+                            extra={"level": idx, "error": str(exc)},
+                            exc_info=True,
+                        )
+                found_at.append(hits)
+                if hits:
+                    found.update(hits)
+                    CACHE_HITS.labels(level=str(idx)).inc(len(hits))
+                    remaining = [k for k in remaining if k not in hits]
+            if remaining:
+                CACHE_MISSES.labels(reason="not_found").inc(len(remaining))
+            for idx, hits in enumerate(found_at):
+                for key in hits:
+                    await self._optimizer.observe_hit(key, idx)
+            for key in remaining:
+                await self._optimizer.observe_miss(key)
+            backfill: dict[str, Any] = {}
+            tasks: list[asyncio.Task[bool]] = []
+            for j in range(len(self.levels) - 1, 0, -1):
+                backfill.update(found_at[j])
+                if backfill:
+                    tasks.append(asyncio.create_task(self.levels[j - 1].set_many(dict(backfill))))
+            for t in tasks:
+                try:
+                    await t
+                except Exception as exc:
+                    logger.debug("cache.promote.error", extra={"error": str(exc)}, exc_info=True)
+            CACHE_OPS.labels(op="get_many", success="true").inc()
+            CACHE_LATENCY.labels(op="get_many", level="all", success="true").observe(
+                time.perf_counter() - start
+            )
+            return found
+
+    async def set_many(self, items: Mapping[str, Any], ttl: int | None = None) -> bool:
+        start = time.perf_counter()
+        with tracer.start_as_current_span("cache.set_many") as span:
+            span.set_attribute("cache.key_count", len(items))
+            results = await asyncio.gather(
+                *(lvl.set_many(items, ttl) for lvl in self.levels), return_exceptions=True
+            )
+            ok = False
+            for r in results:
+                if isinstance(r, BaseException):
+                    logger.warning("cache.set_many.error", extra={"error": str(r)})
+                    continue
+                ok |= bool(r)
+            CACHE_OPS.labels(op="set_many", success=str(ok).lower()).inc()
+            CACHE_LATENCY.labels(op="set_many", level="all", success=str(ok).lower()).observe(
+                time.perf_counter() - start
+            )
+            return ok
+
+    async def delete_many(self, keys: Sequence[str]) -> int:
+        return await self.delete(*keys)
+
     async def delete(self, *keys: str) -> int:
         start = time.perf_counter()
         with tracer.start_as_current_span("cache.delete"):
-            async with asyncio.TaskGroup() as tg:
-                for lvl in self.levels:
-                    tg.create_task(lvl.delete(*keys))
+            results = await asyncio.gather(
+                *(lvl.delete_many(keys) for lvl in self.levels), return_exceptions=True
+            )
             count = 0
-            for lvl in self.levels:
-                try:
-                    count += await lvl.exists(*keys)
-                except Exception as exc:
-                    logger.warning("cache.delete.error", extra={"error": str(exc)}, exc_info=True)
+            for r in results:
+                if isinstance(r, BaseException):
+                    logger.warning("cache.delete.error", extra={"error": str(r)})
+                    continue
+                count = max(count, int(r))
             CACHE_OPS.labels(op="delete", success="true").inc()
             CACHE_LATENCY.labels(op="delete", level="all", success="true").observe(
                 time.perf_counter() - start
@@ -146,15 +326,15 @@ class HybridCache:
         return 1 if total > 0 else 0
 
     async def expire(self, key: str, seconds: int) -> bool:
+        results = await asyncio.gather(
+            *(lvl.expire(key, seconds) for lvl in self.levels), return_exceptions=True
+        )
         ok = False
-        async with asyncio.TaskGroup() as tg:
-            for lvl in self.levels:
-                tg.create_task(lvl.expire(key, seconds))
-        for lvl in self.levels:
-            try:
-                ok |= await lvl.exists(key) > 0
-            except Exception as exc:
-                logger.debug("cache.expire.error", extra={"error": str(exc)}, exc_info=True)
+        for r in results:
+            if isinstance(r, BaseException):
+                logger.debug("cache.expire.error", extra={"error": str(r)})
+                continue
+            ok |= bool(r)
         return ok
 
     async def incr(self, key: str, amount: int = 1) -> int:
@@ -241,3 +421,21 @@ class HybridCache:
         async with asyncio.TaskGroup() as tg:
             for lvl in self.levels:
                 tg.create_task(lvl.aclose())
+
+
+def _is_swr_envelope(value: Any) -> bool:
+    return isinstance(value, dict) and value.get(_SWR_MARKER) == 1 and "value" in value
+
+
+def _local_ttl(value: Any) -> int | None:
+    """TTL for copying ``value`` into an upper level; 0 means do not copy it.
+
+    Stale-while-revalidate envelopes are only copied for the rest of their fresh window,
+    so upper levels never keep serving a stale copy the shared level has since replaced.
+    """
+    if not _is_swr_envelope(value):
+        return None
+    fresh_until = float(value.get("fresh_until") or 0.0)
+    if not fresh_until:
+        return None
+    return max(math.ceil(fresh_until - time.time()), 0)
@@ -1,18 +1,36 @@
 from __future__ import annotations
 
+import asyncio
+import time
 from collections import OrderedDict
 from collections.abc import Sequence
 from typing import Any, Protocol
 
 import numpy as np
 from numpy.typing import NDArray
+from prometheus_client import Counter
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+TIER_PREDICTIONS = Counter(
+    "cache_tier_predictions_total",
+    "Tier predictions checked against the level that actually served the hit",
+    labelnames=("tier", "outcome"),
+)
+TIER_PREDICTION_SOURCE = Counter(
+    "cache_tier_prediction_source_total",
+    "Where a tier prediction came from",
+    labelnames=("source",),
+)
 
 
 class CacheTierOptimizer(Protocol):
     async def predict_index(self, key: str, n_levels: int) -> int: ...
     async def recommend_index(self, key: str, value: Any, n_levels: int) -> int: ...
 
-    async def observe_hit(self, key: str) -> None: ...
+    async def observe_hit(self, key: str, level: int | None = None) -> None: ...
     async def observe_miss(self, key: str) -> None: ...
 
 
@@ -30,7 +48,7 @@ class EwmaOptimizer:
         if len(self._scores) > self._max:
             self._scores.popitem(last=False)
 
-    async def observe_hit(self, key: str) -> None:
+    async def observe_hit(self, key: str, level: int | None = None) -> None:
         self._bump(key, 1.0)
 
     async def observe_miss(self, key: str) -> None:
@@ -57,21 +75,15 @@ class EmbeddingsTierOptimizer:
         self._model = model
         self._map = list(label_to_index)
 
-    async def observe_hit(self, key: str) -> None:
+    async def observe_hit(self, key: str, level: int | None = None) -> None:
         return None
 
     async def observe_miss(self, key: str) -> None:
         return None
 
     async def _predict_label(self, key: str) -> int:
-        probs = self._model.predict_proba([key])
-        if not probs or not probs[0]:
-            return 0
-        row = probs[0]
-        j = max(range(len(row)), key=row.__getitem__)
-        if j >= len(self._map):
-            return self._map[-1]
-        return self._map[j]
+        labels = _labels_from_proba(self._model.predict_proba([key]), self._map)
+        return labels[0] if labels else 0
 
     async def predict_index(self, key: str, n_levels: int) -> int:
         idx = await self._predict_label(key)
@@ -79,3 +91,185 @@ class EmbeddingsTierOptimizer:
 
     async def recommend_index(self, key: str, value: Any, n_levels: int) -> int:
         return await self.predict_index(key, n_levels)
+
+
+def _labels_from_proba(probs: Any, label_map: Sequence[int]) -> list[int]:
+    arr = np.asarray(probs)
+    if arr.ndim != 2 or arr.shape[0] == 0 or arr.shape[1] == 0:
+        return []
+    cols = np.minimum(np.argmax(arr, axis=1), len(label_map) - 1)
+    return [int(v) for v in np.asarray(label_map, dtype=np.int64)[cols]]
+
+
+def _key_prefix(key: str) -> str:
+    head, sep, _ = key.rpartition(":")
+    return head if sep else key
+
+
+class BatchedEmbeddingsTierOptimizer:
+    """Embeddings tier prediction that never blocks a cache lookup for long.
+
+    Predictions are memoized per key prefix (the key without its last ``:`` segment).
+    Unknown prefixes are queued and scored together in one ``predict_proba`` call on a
+    worker thread. Lookups wait at most ``latency_budget_ms`` and otherwise use the EWMA
+    score, so the first request for a new prefix costs no more than the plain optimizer.
+    Prefixes the model failed to score use the EWMA for ``failure_ttl_s`` before the
+    model is asked again. Prefixes being scored are joined rather than queued again,
+    and at most ``max_concurrent_flushes`` batches are scored at once; later batches
+    keep collecting prefixes while they wait.
+    """
+
+    def __init__(
+        self,
+        model: ProbaModel,
+        label_to_index: Sequence[int],
+        latency_budget_ms: float = 2.0,
+        batch_window_ms: float = 5.0,
+        max_batch: int = 64,
+        memo_size: int = 4096,
+        fallback: EwmaOptimizer | None = None,
+        failure_ttl_s: float = 30.0,
+        max_concurrent_flushes: int = 2,
+    ) -> None:
+        self._model = model
+        self._map = list(label_to_index)
+        self._budget = max(0.0, latency_budget_ms) / 1000.0
+        self._window = max(0.0, batch_window_ms) / 1000.0
+        self._max_batch = max(1, int(max_batch))
+        self._memo_size = max(1, int(memo_size))
+        self._fallback = fallback or EwmaOptimizer()
+        self._failure_ttl = max(0.0, failure_ttl_s)
+        self._memo: OrderedDict[str, int] = OrderedDict()
+        self._failed: OrderedDict[str, float] = OrderedDict()
+        self._pending: dict[str, asyncio.Future[int | None]] = {}
+        self._inflight: dict[str, asyncio.Future[int | None]] = {}
+        self._flush_slots = asyncio.Semaphore(max(1, int(max_concurrent_flushes)))
+        self._window_task: asyncio.Task[None] | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._predicted: OrderedDict[str, int] = OrderedDict()
+        self._outcomes: dict[int, list[int]] = {}
+
+    async def observe_hit(self, key: str, level: int | None = None) -> None:
+        await self._fallback.observe_hit(key, level)
+        predicted = self._predicted.pop(key, None)
+        if predicted is None or level is None:
+            return
+        correct = predicted == level
+        TIER_PREDICTIONS.labels(
+            tier=str(predicted), outcome="correct" if correct else "incorrect"
+        ).inc()
+        counts = self._outcomes.setdefault(predicted, [0, 0])
+        counts[0] += int(correct)
+        counts[1] += 1
+
+    async def observe_miss(self, key: str) -> None:
+        await self._fallback.observe_miss(key)
+        self._predicted.pop(key, None)
+
+    def accuracy(self) -> dict[int, float]:
+        return {tier: ok / total for tier, (ok, total) in self._outcomes.items() if total}
+
+    async def predict_index(self, key: str, n_levels: int) -> int:
+        prefix = _key_prefix(key)
+        idx = self._memo.get(prefix)
+        if idx is not None:
+            self._memo.move_to_end(prefix)
+            TIER_PREDICTION_SOURCE.labels(source="memo").inc()
+        elif self._failed_recently(prefix):
+            TIER_PREDICTION_SOURCE.labels(source="ewma").inc()
+            return await self._fallback.predict_index(key, n_levels)
+        else:
+            fut = self._pending.get(prefix) or self._inflight.get(prefix) or self._enqueue(prefix)
+            if self._budget > 0:
+                try:
+                    idx = await asyncio.wait_for(asyncio.shield(fut), self._budget)
+                except TimeoutError:
+                    idx = None
+            elif fut.done():
+                idx = fut.result()
+            if idx is None:
+                TIER_PREDICTION_SOURCE.labels(source="ewma").inc()
+                return await self._fallback.predict_index(key, n_levels)
+            TIER_PREDICTION_SOURCE.labels(source="model").inc()
+        idx = min(int(idx), n_levels - 1)
+        self._predicted[key] = idx
+        if len(self._predicted) > self._memo_size:
+            self._predicted.popitem(last=False)
+        return idx
+
+    async def recommend_index(self, key: str, value: Any, n_levels: int) -> int:
+        return await self.predict_index(key, n_levels)
+
+    def _failed_recently(self, prefix: str) -> bool:
+        until = self._failed.get(prefix)
+        if until is None:
+            return False
+        if until > time.monotonic():
+            return True
+        del self._failed[prefix]
+        return False
+
+    def _enqueue(self, prefix: str) -> asyncio.Future[int | None]:
+        fut: asyncio.Future[int | None] = asyncio.get_running_loop().create_future()
+        self._pending[prefix] = fut
+        if len(self._pending) == self._max_batch:
+            self._spawn(self._flush())
+        elif self._window_task is None:
+            self._window_task = self._spawn(self._flush_after_window())
+        return fut
+
+    def _spawn(self, coro: Any) -> asyncio.Task[None]:
+        task: asyncio.Task[None] = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _flush_after_window(self) -> None:
+        try:
+            await asyncio.sleep(self._window)
+        finally:
+            self._window_task = None
+        await self._flush()
+
+    async def _flush(self) -> None:
+        async with self._flush_slots:
+            batch, self._pending = self._pending, {}
+            if not batch:
+                return
+            self._inflight.update(batch)
+            try:
+                await self._score(batch)
+            finally:
+                for prefix, fut in batch.items():
+                    if self._inflight.get(prefix) is fut:
+                        del self._inflight[prefix]
+                    if not fut.done():
+                        fut.set_result(None)
+
+    async def _score(self, batch: dict[str, asyncio.Future[int | None]]) -> None:
+        prefixes = list(batch)
+        labels: list[int] = []
+        try:
+            probs = await asyncio.to_thread(self._model.predict_proba, prefixes)
+            labels = _labels_from_proba(probs, self._map)
+        except Exception as exc:
+            logger.warning(
+                "cache.tier_prediction.error",
+                extra={"batch_size": len(prefixes), "error": str(exc)},
+            )
+        failed_until = time.monotonic() + self._failure_ttl
+        for i, prefix in enumerate(prefixes):
+            label = labels[i] if i < len(labels) else None
+            if label is not None:
+                self._memo[prefix] = label
+                self._memo.move_to_end(prefix)
+            elif self._failure_ttl > 0:
+                self._failed[prefix] = failed_until
+                self._failed.move_to_end(prefix)
+            fut = batch[prefix]
+            if not fut.done():
+                fut.set_result(label)
+        while len(self._memo) > self._memo_size:
+            self._memo.popitem(last=False)
+        while len(self._failed) > self._memo_size:
+            self._failed.popitem(last=False)
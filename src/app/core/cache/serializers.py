@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import importlib
-from typing import Any
+import os
+from typing import Any, Protocol
 
 from app.core.logging import get_logger
 
@@ -84,3 +85,276 @@ def loads(data: bytes | bytearray | memoryview | None) -> Any:
                 error_message=str(exc),
             )
     return _std_json_loads(b)
+
+
+# Binary frames: one header byte followed by the (optionally compressed) codec payload.
+# Bit 7 marks a frame, so legacy UTF-8 JSON values (which never start above 0x7F) still
+# decode. Bits 3-5 carry the codec id and bits 0-2 the compressor id; bit 6 is reserved
+# for a future frame layout.
+FRAME_FLAG = 0x80
+_CODEC_SHIFT = 3
+_FIELD_MASK = 0x07
+_HEADERS = tuple(bytes((FRAME_FLAG | i,)) for i in range(64))
+
+CODEC_JSON = 1
+CODEC_MSGPACK = 2
+CODEC_NUMPY = 3
+CODEC_RAW = 4
+
+COMPRESS_NONE = 0
+COMPRESS_ZSTD = 1
+COMPRESS_LZ4 = 2
+
+msgpack: Any | None = _optional_import("msgpack")
+zstandard: Any | None = _optional_import("zstandard")
+lz4_frame: Any | None = _optional_import("lz4.frame")
+np: Any | None = _optional_import("numpy")
+
+
+class Codec(Protocol):
+    codec_id: int
+
+    def accepts(self, obj: Any) -> bool: ...
+    def encode(self, obj: Any) -> bytes: ...
+    def decode(self, payload: memoryview) -> Any: ...
+
+
+class Compressor(Protocol):
+    compressor_id: int
+
+    def compress(self, data: bytes) -> bytes: ...
+    def decompress(self, data: memoryview) -> bytes: ...
+
+
+class RawBytesCodec:
+    codec_id = CODEC_RAW
+
+    def accepts(self, obj: Any) -> bool:
+        return isinstance(obj, bytes | bytearray | memoryview)
+
+    def encode(self, obj: Any) -> bytes:
+        return bytes(obj)
+
+    def decode(self, payload: memoryview) -> Any:
+        return bytes(payload)
+
+
+class JsonCodec:
+    codec_id = CODEC_JSON
+
+    def accepts(self, obj: Any) -> bool:
+        return True
+
+    def encode(self, obj: Any) -> bytes:
+        return dumps(obj)
+
+    def decode(self, payload: memoryview) -> Any:
+        if msgspec is not None:
+            return msgspec.json.decode(payload)
+        return loads(payload)
+
+
+class MsgpackCodec:
+    codec_id = CODEC_MSGPACK
+
+    def __init__(self) -> None:
+        self._encoder = msgspec.msgpack.Encoder() if msgspec is not None else None
+        self._decoder = msgspec.msgpack.Decoder() if msgspec is not None else None
+
+    def accepts(self, obj: Any) -> bool:
+        return msgspec is not None or msgpack is not None
+
+    def encode(self, obj: Any) -> bytes:
+        if self._encoder is not None:
+            return bytes(self._encoder.encode(obj))
+        if msgpack is not None:
+            return bytes(msgpack.packb(obj, use_bin_type=True))
+        raise RuntimeError("msgpack encoding requires msgspec or msgpack")
+
+    def decode(self, payload: memoryview) -> Any:
+        if self._decoder is not None:
+            return self._decoder.decode(payload)
+        if msgpack is not None:
+            return msgpack.unpackb(payload, raw=False)
+        raise RuntimeError("msgpack decoding requires msgspec or msgpack")
+
+
+class NumpyCodec:
+    """Raw ndarray buffer prefixed by ``<len><dtype>|<shape>``; decodes without copying."""
+
+    codec_id = CODEC_NUMPY
+
+    def accepts(self, obj: Any) -> bool:
+        return (
+            np is not None
+            and isinstance(obj, np.ndarray)
+            and not obj.dtype.hasobject
+            and obj.dtype.names is None
+        )
+
+    def encode(self, obj: Any) -> bytes:
+        assert np is not None
+        arr = np.ascontiguousarray(obj)
+        meta = f"{arr.dtype.str}|{','.join(str(d) for d in arr.shape)}".encode("ascii")
+        data: bytes = arr.tobytes()
+        return bytes((len(meta),)) + meta + data
+
+    def decode(self, payload: memoryview) -> Any:
+        if np is None:
+            raise RuntimeError("numpy payload requires numpy")
+        meta_len = payload[0]
+        dtype, _, shape = bytes(payload[1 : 1 + meta_len]).decode("ascii").partition("|")
+        dims = tuple(int(d) for d in shape.split(",") if d)
+        return np.frombuffer(payload[1 + meta_len :], dtype=np.dtype(dtype)).reshape(dims)
+
+
+class ZstdCompressor:
+    compressor_id = COMPRESS_ZSTD
+
+    def __init__(self, level: int = 3) -> None:
+        if zstandard is None:
+            raise RuntimeError("zstandard is not installed")
+        self._c = zstandard.ZstdCompressor(level=level)
+        self._d = zstandard.ZstdDecompressor()
+
+    def compress(self, data: bytes) -> bytes:
+        return bytes(self._c.compress(data))
+
+    def decompress(self, data: memoryview) -> bytes:
+        return bytes(self._d.decompress(data))
+
+
+class Lz4Compressor:
+    compressor_id = COMPRESS_LZ4
+
+    def __init__(self) -> None:
+        if lz4_frame is None:
+            raise RuntimeError("lz4 is not installed")
+
+    def compress(self, data: bytes) -> bytes:
+        assert lz4_frame is not None
+        return bytes(lz4_frame.compress(data))
+
+    def decompress(self, data: memoryview) -> bytes:
+        assert lz4_frame is not None
+        return bytes(lz4_frame.decompress(data))
+
+
+def _default_compressors() -> list[Compressor]:
+    out: list[Compressor] = []
+    if zstandard is not None:
+        out.append(ZstdCompressor())
+    if lz4_frame is not None:
+        out.append(Lz4Compressor())
+    return out
+
+
+class BinaryCodec:
+    def __init__(
+        self,
+        codecs: list[Codec] | None = None,
+        compressors: list[Compressor] | None = None,
+        compress_threshold: int = 1024,
+        frames: bool = True,
+    ) -> None:
+        self._codecs: list[Codec] = (
+            codecs
+            if codecs is not None
+            else [RawBytesCodec(), NumpyCodec(), MsgpackCodec(), JsonCodec()]
+        )
+        self._compressors = compressors if compressors is not None else _default_compressors()
+        self._by_codec_id = {c.codec_id: c for c in [JsonCodec(), *self._codecs]}
+        self._by_compressor_id = {c.compressor_id: c for c in self._compressors}
+        self.compress_threshold = compress_threshold
+        self.frames = frames
+
+    def register_codec(self, codec: Codec, preferred: bool = True) -> None:
+        if not 0 < codec.codec_id <= _FIELD_MASK:
+            raise ValueError("codec_id must be between 1 and 7")
+        self._codecs = [c for c in self._codecs if c.codec_id != codec.codec_id]
+        self._codecs.insert(0 if preferred else len(self._codecs), codec)
+        self._by_codec_id[codec.codec_id] = codec
+
+    def encode(self, obj: Any) -> bytes:
+        if isinstance(obj, int) and not isinstance(obj, bool):
+            # Plain decimal keeps Redis INCRBY/DECRBY working on cached counters.
+            return str(obj).encode("ascii")
+        if not self.frames and not _needs_frame(obj):
+            return dumps(obj)
+        codec_id = CODEC_JSON
+        payload: bytes | None = None
+        for codec in self._codecs:
+            if not codec.accepts(obj):
+                continue
+            try:
+                payload = codec.encode(obj)
+                codec_id = codec.codec_id
+                break
+            except Exception as exc:
+                logger.debug(
+                    "cache.serializers.codec_encode_failed",
+                    codec_id=codec.codec_id,
+                    error_type=type(exc).__name__,
+                )
+        if payload is None:
+            payload = dumps(obj)
+        compressor_id = COMPRESS_NONE
+        if self._compressors and len(payload) >= self.compress_threshold:
+            compressor = self._compressors[0]
+            packed = compressor.compress(payload)
+            if len(packed) < len(payload):
+                payload = packed
+                compressor_id = compressor.compressor_id
+        return _HEADERS[(codec_id << _CODEC_SHIFT) | compressor_id] + payload
+
+    def decode(self, data: bytes | bytearray | memoryview | None) -> Any:
+        if data is None:
+            return None
+        view = memoryview(data)
+        if not view.nbytes or view[0] & FRAME_FLAG == 0:
+            return loads(view)
+        header = view[0]
+        codec = self._by_codec_id.get((header >> _CODEC_SHIFT) & _FIELD_MASK)
+        if codec is None:
+            raise ValueError(f"unknown cache codec in header 0x{header:02x}")
+        payload = view[1:]
+        compressor_id = header & _FIELD_MASK
+        if compressor_id != COMPRESS_NONE:
+            compressor = self._by_compressor_id.get(compressor_id)
+            if compressor is None:
+                compressor = _compressor_for(compressor_id)
+                self._by_compressor_id[compressor_id] = compressor
+            payload = memoryview(compressor.decompress(payload))
+        return codec.decode(payload)
+
+
+def _needs_frame(obj: Any) -> bool:
+    """Bytes and arrays have no JSON form, so they are framed even with frames disabled."""
+    return isinstance(obj, bytes | bytearray | memoryview) or (
+        np is not None and isinstance(obj, np.ndarray)
+    )
+
+
+def _compressor_for(compressor_id: int) -> Compressor:
+    if compressor_id == COMPRESS_ZSTD:
+        return ZstdCompressor()
+    if compressor_id == COMPRESS_LZ4:
+        return Lz4Compressor()
+    raise ValueError(f"unknown cache compressor id {compressor_id}")
+
+
+# Replicas from before binary frames read Redis values as UTF-8 JSON and fail on frames.
+# For a rolling upgrade, deploy with CACHE_BINARY_FRAMES=0 so every replica keeps writing
+# JSON, which both versions read, then enable frames once no old replica is left. Bytes
+# and arrays are framed either way; old replicas could not cache those as JSON anyway.
+default_codec = BinaryCodec(
+    frames=os.getenv("CACHE_BINARY_FRAMES", "1").lower() in {"1", "true", "yes"}
+)
+
+
+def encode(obj: Any) -> bytes:
+    return default_codec.encode(obj)
+
+
+def decode(data: bytes | bytearray | memoryview | None) -> Any:
+    return default_codec.decode(data)
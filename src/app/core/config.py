@@ -168,6 +168,10 @@ class LLMConfig(BaseModel):
     enable_response_caching: bool = True
     cache_ttl_seconds: int = Field(default=3600, ge=0)
     max_context_length: int = Field(default=16000, ge=100)
+    http2: bool = True
+    max_connections_per_host: int = Field(default=20, ge=1)
+    max_keepalive_connections: int = Field(default=10, ge=0)
+    keepalive_expiry_seconds: float = Field(default=60.0, ge=0)
 
 
 class ObservabilityConfig(BaseModel):
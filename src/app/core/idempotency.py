@@ -0,0 +1,247 @@
+"""Shared store of in-flight and completed idempotent requests."""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import os
+import time
+from collections.abc import Awaitable
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import TYPE_CHECKING, Protocol, cast
+
+from app.core.logging import get_logger
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+logger = get_logger(__name__)
+
+_LEASE = b"__lease__"
+
+
+@dataclass(frozen=True, slots=True)
+class IdempotencyConfig:
+    enable: bool = os.getenv("IDEMPOTENCY", "1").lower() in {"1", "true", "yes"}
+    backend: str = os.getenv("IDEMPOTENCY_BACKEND", "redis").lower()
+    paths: tuple[str, ...] = tuple(
+        p.strip()
+        for p in os.getenv("IDEMPOTENCY_PATHS", "/api/chat,/api/deploy,/api/deploy/start").split(
+            ","
+        )
+        if p.strip()
+    )
+    # Responses to requests with an Idempotency-Key are kept this long; requests keyed
+    # only by their body digest are deduplicated for the shorter window, so a user
+    # deliberately repeating a request soon after still gets it run.
+    key_ttl_seconds: int = int(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", "86400"))
+    digest_ttl_seconds: int = int(os.getenv("IDEMPOTENCY_DIGEST_TTL_SECONDS", "30"))
+    lease_seconds: int = int(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "300"))
+    wait_seconds: float = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "120"))
+    max_body_bytes: int = int(os.getenv("IDEMPOTENCY_MAX_BODY_BYTES", str(1024 * 1024)))
+
+
+class ClaimState(StrEnum):
+    ACQUIRED = "acquired"
+    PENDING = "pending"
+    DONE = "done"
+
+
+@dataclass(frozen=True, slots=True)
+class StoredResponse:
+    status: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+
+    def dumps(self) -> bytes:
+        return json.dumps(
+            {
+                "s": self.status,
+                "h": [[k.decode("latin-1"), v.decode("latin-1")] for k, v in self.headers],
+                "b": base64.b64encode(self.body).decode(),
+            }
+        ).encode()
+
+    @classmethod
+    def loads(cls, raw: bytes) -> StoredResponse:
+        data = json.loads(raw)
+        return cls(
+            status=int(data["s"]),
+            headers=[(k.encode("latin-1"), v.encode("latin-1")) for k, v in data["h"]],
+            body=base64.b64decode(data["b"]),
+        )
+
+
+class IdempotencyStore(Protocol):
+    async def claim(self, key: str, lease_seconds: int) -> tuple[ClaimState, StoredResponse | None]:
+        """Take the lease on ``key``, or report that it is held or already answered."""
+        ...
+
+    async def complete(self, key: str, response: StoredResponse, ttl: int) -> None: ...
+
+    async def release(self, key: str) -> None:
+        """Drop the lease without a response, so a waiting duplicate can run instead."""
+        ...
+
+    async def wait(self, key: str, timeout: float) -> None:
+        """Return once ``key`` changes state, or after ``timeout`` seconds."""
+        ...
+
+
+class InMemoryIdempotencyStore:
+    """Single-process store, for development and tests."""
+
+    def __init__(self) -> None:
+        self._entries: dict[str, tuple[float, bytes]] = {}
+        self._events: dict[str, asyncio.Event] = {}
+
+    async def claim(self, key: str, lease_seconds: int) -> tuple[ClaimState, StoredResponse | None]:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= now:
+            self._entries[key] = (now + lease_seconds, _LEASE)
+            return ClaimState.ACQUIRED, None
+        if entry[1] == _LEASE:
+            return ClaimState.PENDING, None
+        return ClaimState.DONE, StoredResponse.loads(entry[1])
+
+    async def complete(self, key: str, response: StoredResponse, ttl: int) -> None:
+        self._entries[key] = (time.monotonic() + ttl, response.dumps())
+        self._notify(key)
+
+    async def release(self, key: str) -> None:
+        self._entries.pop(key, None)
+        self._notify(key)
+
+    async def wait(self, key: str, timeout: float) -> None:
+        event = self._events.setdefault(key, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except TimeoutError:
+            pass
+
+    def _notify(self, key: str) -> None:
+        event = self._events.pop(key, None)
+        if event is not None:
+            event.set()
+
+
+class RedisIdempotencyStore:
+    """Leases and responses as Redis keys with a TTL, completions announced over pub/sub.
+
+    All waiters in the process share one pattern subscription, so a burst of duplicate
+    requests holds a single connection rather than one per request. Waiters also poll
+    on their timeout, so a lease left by a crashed replica is taken over once it expires.
+    """
+
+    def __init__(self, client: Redis | None = None, prefix: str = "idem") -> None:
+        self._client = client
+        self._prefix = prefix
+        self._events: dict[str, asyncio.Event] = {}
+        self._waiters: dict[str, int] = {}
+        self._listener: asyncio.Task[None] | None = None
+        self._listening = asyncio.Event()
+
+    async def claim(self, key: str, lease_seconds: int) -> tuple[ClaimState, StoredResponse | None]:
+        cli = await self._get_client()
+        k = self._key(key)
+        while True:
+            if await cli.set(k, _LEASE, nx=True, ex=lease_seconds):
+                return ClaimState.ACQUIRED, None
+            raw = await cast("Awaitable[bytes | None]", cli.get(k))
+            if raw is None:
+                continue  # expired or released in between; try to take it again
+            if raw == _LEASE:
+                return ClaimState.PENDING, None
+            return ClaimState.DONE, StoredResponse.loads(raw)
+
+    async def complete(self, key: str, response: StoredResponse, ttl: int) -> None:
+        cli = await self._get_client()
+        async with cli.pipeline(transaction=True) as pipe:
+            pipe.set(self._key(key), response.dumps(), ex=ttl)
+            pipe.publish(self._channel(key), b"done")
+            await pipe.execute()
+
+    async def release(self, key: str) -> None:
+        cli = await self._get_client()
+        async with cli.pipeline(transaction=True) as pipe:
+            pipe.delete(self._key(key))
+            pipe.publish(self._channel(key), b"released")
+            await pipe.execute()
+
+    async def wait(self, key: str, timeout: float) -> None:
+        cli = await self._get_client()
+        await self._ensure_listener(cli)
+        event = self._events.setdefault(key, asyncio.Event())
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            # The state may have changed before the subscription took effect.
+            raw = await cast("Awaitable[bytes | None]", cli.get(self._key(key)))
+            if raw != _LEASE:
+                return
+            await asyncio.wait_for(event.wait(), timeout)
+        except TimeoutError:
+            pass
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                if self._events.get(key) is event:
+                    del self._events[key]
+
+    async def _ensure_listener(self, cli: Redis) -> None:
+        if self._listener is None or self._listener.done():
+            if self._listener is not None and not self._listener.cancelled():
+                self._listener.exception()  # already logged by _listen
+            self._listening.clear()
+            self._listener = asyncio.create_task(self._listen(cli))
+        listening = asyncio.create_task(self._listening.wait())
+        await asyncio.wait({listening, self._listener}, return_when=asyncio.FIRST_COMPLETED)
+        if not listening.done():
+            listening.cancel()
+            self._listener.result()  # re-raise why the subscription failed
+
+    async def _listen(self, cli: Redis) -> None:
+        channel_prefix = self._channel("").encode()
+        pubsub = cli.pubsub()
+        try:
+            await pubsub.psubscribe(self._channel("*"))
+            self._listening.set()
+            async for msg in pubsub.listen():
+                if msg.get("type") != "pmessage":
+                    continue
+                channel = msg["channel"]
+                if isinstance(channel, str):
+                    channel = channel.encode()
+                event = self._events.pop(channel[len(channel_prefix) :].decode(), None)
+                if event is not None:
+                    event.set()
+        except Exception as exc:
+            logger.warning("idempotency_subscription_lost", error=str(exc))
+            raise
+        finally:
+            self._listening.clear()
+            # Wake every waiter so it re-checks the store instead of sleeping out its timeout.
+            for event in self._events.values():
+                event.set()
+            self._events.clear()
+            await pubsub.aclose()  # type: ignore[no-untyped-call]
+
+    async def _get_client(self) -> Redis:
+        if self._client is None:
+            from app.core.cache.backends.redis_backend import RedisCache
+            from app.core.cache.dependency import get_cache
+
+            store = (await get_cache()).levels[-1]
+            if not isinstance(store, RedisCache):
+                raise RuntimeError("Redis idempotency store needs a Redis cache level")
+            self._client = await store.client()
+        return self._client
+
+    def _key(self, key: str) -> str:
+        return f"{self._prefix}:{key}"
+
+    def _channel(self, key: str) -> str:
+        return f"{self._prefix}:done:{key}"
@@ -1,61 +1,402 @@
+"""Fan-out streaming of deployment logs to any number of subscribers."""
+
 from __future__ import annotations
 
 import asyncio
-from collections.abc import AsyncIterator
+import os
+import time
+import uuid
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Sequence
 from contextlib import asynccontextmanager
-from typing import Final
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import TYPE_CHECKING, Any, Protocol, cast
+
+from prometheus_client import Counter, Gauge
+
+from app.core.logging import get_logger
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+logger = get_logger(__name__)
+
+STREAM_SUBSCRIBERS = Gauge("log_stream_subscribers", "Connected log stream subscribers")
+STREAM_DROPPED_LINES = Counter(
+    "log_stream_dropped_lines_total", "Lines a slow subscriber never received", ["policy"]
+)
+
+NO_ACTIVE_STREAM = "No active stream"
+
+
+class OverflowPolicy(StrEnum):
+    DROP_OLDEST = "drop_oldest"
+    DISCONNECT = "disconnect"
+
+
+@dataclass(frozen=True, slots=True)
+class StreamConfig:
+    backend: str = os.getenv("LOG_STREAM_BACKEND", "memory").lower()
+    subscriber_buffer: int = int(os.getenv("LOG_STREAM_SUBSCRIBER_BUFFER", "1000"))
+    overflow: OverflowPolicy = OverflowPolicy(os.getenv("LOG_STREAM_OVERFLOW", "drop_oldest"))
+    replay_lines: int = int(os.getenv("LOG_STREAM_REPLAY_LINES", "500"))
+    retention_seconds: int = int(os.getenv("LOG_STREAM_RETENTION_SECONDS", "3600"))
+    batch_lines: int = int(os.getenv("LOG_STREAM_BATCH_LINES", "100"))
+    batch_interval: float = float(os.getenv("LOG_STREAM_BATCH_INTERVAL", "0.05"))
+    redis_block_ms: int = int(os.getenv("LOG_STREAM_REDIS_BLOCK_MS", "5000"))
+    redis_url: str = os.getenv(
+        "LOG_STREAM_REDIS_URL", os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    )
+    # Every Redis subscriber holds a connection in a blocking XREAD, so tailing has its
+    # own pool of this size instead of sharing (and exhausting) the cache's.
+    redis_max_subscribers: int = int(os.getenv("LOG_STREAM_REDIS_MAX_SUBSCRIBERS", "1000"))
+
+
+class StreamNotFoundError(LookupError):
+    pass
+
+
+class SlowConsumerError(RuntimeError):
+    """A subscriber fell a full buffer behind under the ``disconnect`` policy."""
+
+
+class StreamBackend(Protocol):
+    async def open(self, key: str) -> str:
+        """Start a new run under ``key``, ending any earlier one; returns its generation."""
+        ...
+
+    async def publish(self, key: str, lines: Sequence[str]) -> None: ...
+
+    async def close(self, key: str, generation: str) -> None:
+        """End the run, unless a later ``open`` has already replaced it."""
+        ...
 
-END_MARKER: Final[str] = "__STREAM_END__"
+    def subscribe(self, key: str) -> AsyncIterator[list[str]]: ...
+
+
+class _Subscriber:
+    """Bounded ring buffer between one publisher and one slow or fast reader."""
+
+    def __init__(self, config: StreamConfig) -> None:
+        self._config = config
+        self._lines: deque[str] = deque(maxlen=config.subscriber_buffer)
+        self._ready = asyncio.Event()
+        self._closed = False
+        self._overflowed = False
+
+    def push(self, lines: Sequence[str]) -> None:
+        free = self._config.subscriber_buffer - len(self._lines)
+        if len(lines) > free:
+            if self._config.overflow is OverflowPolicy.DISCONNECT:
+                self._overflowed = True
+                self._ready.set()
+                return
+            STREAM_DROPPED_LINES.labels(policy=self._config.overflow.value).inc(len(lines) - free)
+        self._lines.extend(lines)
+        self._ready.set()
+
+    def close(self) -> None:
+        self._closed = True
+        self._ready.set()
+
+    async def take(self) -> list[str] | None:
+        """Next batch of lines, or None once the stream ended and the buffer is drained."""
+        while not self._lines and not self._closed and not self._overflowed:
+            self._ready.clear()
+            await self._ready.wait()
+        if self._overflowed:
+            raise SlowConsumerError(
+                f"subscriber fell {self._config.subscriber_buffer} lines behind"
+            )
+        if not self._lines:
+            return None
+        if len(self._lines) < self._config.batch_lines and not self._closed:
+            # Let a burst of lines accumulate so it goes out as one frame.
+            await asyncio.sleep(self._config.batch_interval)
+        n = min(len(self._lines), self._config.batch_lines)
+        return [self._lines.popleft() for _ in range(n)]
+
+
+@dataclass(slots=True)
+class _Channel:
+    replay: deque[str]
+    generation: str
+    subscribers: set[_Subscriber] = field(default_factory=set)
+    closed_at: float | None = None
+
+
+class InMemoryStreamBackend:
+    """Streams inside one process; finished streams stay replayable for the retention time."""
+
+    def __init__(self, config: StreamConfig) -> None:
+        self._config = config
+        self._channels: dict[str, _Channel] = {}
+
+    async def open(self, key: str) -> str:
+        self._prune()
+        previous = self._channels.get(key)
+        if previous is not None:
+            self._end(previous)
+        generation = uuid.uuid4().hex
+        self._channels[key] = _Channel(deque(maxlen=self._config.replay_lines), generation)
+        return generation
+
+    async def publish(self, key: str, lines: Sequence[str]) -> None:
+        channel = self._channels.get(key)
+        if channel is None or not lines:
+            return
+        channel.replay.extend(lines)
+        for sub in channel.subscribers:
+            sub.push(lines)
+
+    async def close(self, key: str, generation: str) -> None:
+        channel = self._channels.get(key)
+        if channel is not None and channel.generation == generation:
+            self._end(channel)
+
+    async def subscribe(self, key: str) -> AsyncIterator[list[str]]:
+        self._prune()
+        channel = self._channels.get(key)
+        if channel is None:
+            raise StreamNotFoundError(key)
+        # Snapshot the replay and register in one step so no line is missed or repeated.
+        replay = list(channel.replay)
+        sub = _Subscriber(self._config)
+        if channel.closed_at is None:
+            channel.subscribers.add(sub)
+        else:
+            sub.close()
+        STREAM_SUBSCRIBERS.inc()
+        try:
+            for i in range(0, len(replay), self._config.batch_lines):
+                yield replay[i : i + self._config.batch_lines]
+            while (batch := await sub.take()) is not None:
+                yield batch
+        finally:
+            STREAM_SUBSCRIBERS.dec()
+            channel.subscribers.discard(sub)
+
+    @staticmethod
+    def _end(channel: _Channel) -> None:
+        if channel.closed_at is None:
+            channel.closed_at = time.monotonic()
+        for sub in channel.subscribers:
+            sub.close()
+        channel.subscribers.clear()
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - self._config.retention_seconds
+        for key in [k for k, c in self._channels.items() if c.closed_at and c.closed_at < cutoff]:
+            del self._channels[key]
+
+
+# Ends the stream only while it still belongs to the closing writer's run.
+_CLOSE_SCRIPT = """
+local current = redis.call('GET', KEYS[2])
+if current and current ~= ARGV[1] then
+  return 0
+end
+redis.call('XADD', KEYS[1], '*', 'end', '')
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+
+class RedisStreamBackend:
+    """One Redis Stream per key, so any API replica can tail a deployment run elsewhere.
+
+    The stream is capped at about ``replay_lines`` entries, which is both the replay
+    window and how far a reader may fall behind: each reader pulls at its own pace with
+    XREAD, and lines trimmed before a slow reader gets to them are lost to it. Readers
+    block on a dedicated connection pool; writes go through the cache's Redis client.
+    """
+
+    _OPEN = b"open"
+    _LINE = b"line"
+    _END = b"end"
+
+    def __init__(self, config: StreamConfig, client: Redis | None = None) -> None:
+        self._config = config
+        self._client = client
+        self._tail_client = client
+
+    async def open(self, key: str) -> str:
+        cli = await self._get_client()
+        generation = uuid.uuid4().hex
+        async with cli.pipeline(transaction=True) as pipe:
+            pipe.delete(self._key(key))
+            pipe.xadd(self._key(key), {self._OPEN: b""})
+            pipe.expire(self._key(key), self._config.retention_seconds)
+            pipe.set(self._generation_key(key), generation, ex=self._config.retention_seconds)
+            await pipe.execute()
+        return generation
+
+    async def publish(self, key: str, lines: Sequence[str]) -> None:
+        if not lines:
+            return
+        cli = await self._get_client()
+        async with cli.pipeline(transaction=False) as pipe:
+            for line in lines:
+                pipe.xadd(
+                    self._key(key),
+                    {self._LINE: line.encode()},
+                    maxlen=self._config.replay_lines,
+                    approximate=True,
+                )
+            pipe.expire(self._key(key), self._config.retention_seconds)
+            pipe.expire(self._generation_key(key), self._config.retention_seconds)
+            await pipe.execute()
+
+    async def close(self, key: str, generation: str) -> None:
+        cli = await self._get_client()
+        await cast(
+            "Awaitable[int]",
+            cli.eval(
+                _CLOSE_SCRIPT,
+                2,
+                self._key(key),
+                self._generation_key(key),
+                generation,
+                self._config.retention_seconds,
+            ),
+        )
+
+    async def subscribe(self, key: str) -> AsyncIterator[list[str]]:
+        cli = self._get_tail_client()
+        stream = self._key(key)
+        if not await cli.exists(stream):
+            raise StreamNotFoundError(key)
+        last = b"0-0"
+        STREAM_SUBSCRIBERS.inc()
+        try:
+            while True:
+                fut = cast(
+                    "Awaitable[list[Any] | None]",
+                    cli.xread(
+                        {stream: last},
+                        count=self._config.batch_lines,
+                        block=self._config.redis_block_ms,
+                    ),
+                )
+                reply = await fut
+                if not reply:
+                    if not await cli.exists(stream):
+                        return
+                    continue
+                batch: list[str] = []
+                for entry_id, fields in reply[0][1]:
+                    # A later open marker means the key was re-opened for a new run.
+                    replaced = self._OPEN in fields and last != b"0-0"
+                    last = entry_id
+                    if replaced or self._END in fields:
+                        if batch:
+                            yield batch
+                        return
+                    if self._LINE in fields:
+                        batch.append(fields[self._LINE].decode())
+                if batch:
+                    yield batch
+        finally:
+            STREAM_SUBSCRIBERS.dec()
+
+    async def _get_client(self) -> Redis:
+        if self._client is None:
+            from app.core.cache.backends.redis_backend import RedisCache
+            from app.core.cache.dependency import get_cache
+
+            store = (await get_cache()).levels[-1]
+            if not isinstance(store, RedisCache):
+                raise RuntimeError("Redis log streaming needs a Redis cache level")
+            self._client = await store.client()
+        return self._client
+
+    def _get_tail_client(self) -> Redis:
+        if self._tail_client is None:
+            from redis.asyncio import ConnectionPool
+            from redis.asyncio import Redis as AsyncRedis
+
+            pool = ConnectionPool.from_url(
+                self._config.redis_url, max_connections=self._config.redis_max_subscribers
+            )
+            self._tail_client = AsyncRedis(connection_pool=pool)
+        return self._tail_client
+
+    @staticmethod
+    def _key(key: str) -> str:
+        return f"logstream:{key}"
+
+    @classmethod
+    def _generation_key(cls, key: str) -> str:
+        # Tagged with the whole stream key, so on Redis Cluster both share a slot.
+        return f"{{{cls._key(key)}}}:generation"
 
 
 class StreamWriter:
-    def __init__(self, subscribers: set[asyncio.Queue[str]]) -> None:
-        self._subscribers = subscribers
+    def __init__(self, backend: StreamBackend, key: str, generation: str) -> None:
+        self._backend = backend
+        self._key = key
+        self._generation = generation
 
     async def send(self, message: str) -> None:
-        if not self._subscribers:
-            return
-        await asyncio.gather(*(q.put(message) for q in list(self._subscribers)))
+        await self._backend.publish(self._key, [message])
+
+    async def send_many(self, messages: Sequence[str]) -> None:
+        await self._backend.publish(self._key, messages)
 
     async def close(self) -> None:
-        if not self._subscribers:
-            return
-        await asyncio.gather(*(q.put(END_MARKER) for q in list(self._subscribers)))
+        await self._backend.close(self._key, self._generation)
 
 
 class StreamingHandler:
-    def __init__(self) -> None:
-        self._streams: dict[str, set[asyncio.Queue[str]]] = {}
+    """Publishes log lines per key and fans them out to subscribers.
+
+    Publishing never waits on subscribers: each one reads from its own bounded buffer
+    (or, with the Redis backend, straight from the stream), and late joiners first get
+    the most recent ``replay_lines`` lines.
+    """
+
+    def __init__(
+        self, backend: StreamBackend | None = None, config: StreamConfig | None = None
+    ) -> None:
+        self.config = config or StreamConfig()
+        self._backend = backend
+
+    @property
+    def backend(self) -> StreamBackend:
+        if self._backend is None:
+            if self.config.backend == "redis":
+                self._backend = RedisStreamBackend(self.config)
+            else:
+                self._backend = InMemoryStreamBackend(self.config)
+        return self._backend
 
     @asynccontextmanager
     async def stream(self, key: str) -> AsyncIterator[StreamWriter]:
-        subs = self._streams.setdefault(key, set())
+        generation = await self.backend.open(key)
+        writer = StreamWriter(self.backend, key, generation)
         try:
-            yield StreamWriter(subs)
+            yield writer
         finally:
-            await StreamWriter(subs).close()
-            self._streams.pop(key, None)
+            await writer.close()
 
     @asynccontextmanager
     async def stream_deployment(self, deployment_id: str) -> AsyncIterator[StreamWriter]:
         async with self.stream(deployment_id) as writer:
             yield writer
 
-    async def stream_logs(self, key: str) -> AsyncIterator[str]:
-        subs = self._streams.get(key)
-        if subs is None:
-            yield "No active stream"
-            return
-        q: asyncio.Queue[str] = asyncio.Queue()
-        subs.add(q)
+    async def stream_batches(self, key: str) -> AsyncIterator[list[str]]:
+        """Lines in batches, for transports that frame several lines per message."""
         try:
-            while True:
-                message = await q.get()
-                if message == END_MARKER:
-                    break
-                yield message
-        finally:
-            subs.discard(q)
+            async for batch in self.backend.subscribe(key):
+                yield batch
+        except StreamNotFoundError:
+            yield [NO_ACTIVE_STREAM]
+
+    async def stream_logs(self, key: str) -> AsyncIterator[str]:
+        async for batch in self.stream_batches(key):
+            for line in batch:
+                yield line
 
 
 streaming_handler = StreamingHandler()
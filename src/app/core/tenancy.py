@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+import contextvars
+
+# Tenant of the request being served: the user id of a caller whose token signature was
+# verified by the route's auth dependency. None for anonymous or unverified requests.
+current_tenant: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "current_tenant", default=None
+)
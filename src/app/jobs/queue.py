@@ -3,14 +3,18 @@ from __future__ import annotations
 import asyncio
 import json
 import uuid
-from collections.abc import Callable, Coroutine
+from collections import deque
+from collections.abc import Awaitable, Callable, Coroutine, Sequence
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
 from typing import Any, cast
 
+from app.core.cache.backends.redis_backend import RedisCache
 from app.core.cache.base import CacheBackend
 from app.core.cache.dependency import get_cache
+from app.core.cache.hybrid_cache import HybridCache
+from app.core.cache.serializers import encode
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
@@ -58,11 +62,16 @@ class JobQueue:
         queue_name: str = "default",
         max_workers: int = 10,
         poll_interval: int = 1,
+        prefetch: int = 1,
     ):
         self.cache = cache
+        # Queue lists and job records must be shared between processes, so they bypass
+        # the per-process levels of a hybrid cache and go to its last (shared) level.
+        self.store: CacheBackend = cache.levels[-1] if isinstance(cache, HybridCache) else cache
         self.queue_name = queue_name
         self.max_workers = max_workers
         self.poll_interval = poll_interval
+        self.prefetch = max(1, prefetch)
         self.handlers: dict[str, Callable[[Job], Coroutine[Any, Any, Any]]] = {}
         self.workers: list[asyncio.Task[Any]] = []
         self._running = False
@@ -74,10 +83,15 @@ class JobQueue:
         queue_name: str = "default",
         max_workers: int = 10,
         poll_interval: int = 1,
+        prefetch: int = 1,
     ) -> JobQueue:
         cache = await get_cache()
         return cls(
-            cache, queue_name=queue_name, max_workers=max_workers, poll_interval=poll_interval
+            cache,
+            queue_name=queue_name,
+            max_workers=max_workers,
+            poll_interval=poll_interval,
+            prefetch=prefetch,
         )
 
     def register_handler(
@@ -94,29 +108,85 @@ class JobQueue:
         timeout: int = 300,
         delay: int = 0,
     ) -> str:
+        ids = await self.enqueue_many(
+            job_name,
+            [payload or {}],
+            priority=priority,
+            max_retries=max_retries,
+            timeout=timeout,
+            delay=delay,
+        )
+        return ids[0]
+
+    async def enqueue_many(
+        self,
+        job_name: str,
+        payloads: Sequence[dict[str, Any]],
+        priority: JobPriority = JobPriority.NORMAL,
+        max_retries: int = 3,
+        timeout: int = 300,
+        delay: int = 0,
+    ) -> list[str]:
+        """Enqueue one job per payload, writing all records and list entries in one batch."""
+        jobs = [
+            self._new_job(job_name, payload, priority, max_retries, timeout, delay)
+            for payload in payloads
+        ]
+        if not jobs:
+            return []
+        await self._push_jobs(jobs, records=True)
+        return [job.id for job in jobs]
+
+    def _new_job(
+        self,
+        job_name: str,
+        payload: dict[str, Any],
+        priority: JobPriority,
+        max_retries: int,
+        timeout: int,
+        delay: int,
+    ) -> Job:
         job = Job(
             name=job_name,
-            payload=payload or {},
+            payload=payload,
             priority=priority,
             max_retries=max_retries,
             timeout=timeout,
         )
-
         if delay > 0:
             job.metadata["scheduled_for"] = (
                 datetime.utcnow() + timedelta(seconds=delay)
             ).isoformat()
+        return job
+
+    async def _push_jobs(self, jobs: Sequence[Job], records: bool = False) -> None:
+        """LPUSH jobs onto their priority lists, optionally storing their records too."""
+        by_queue: dict[str, list[str]] = {}
+        stored: dict[str, str] = {}
+        for job in jobs:
+            data = self._serialize_job(job)
+            by_queue.setdefault(self._get_queue_key(job.priority), []).append(data)
+            if records:
+                stored[self._get_job_key(job.id)] = data
+
+        if isinstance(self.store, RedisCache):
+            cli = await self.store.client()
+            async with cli.pipeline(transaction=False) as pipe:
+                for key, data in stored.items():
+                    pipe.set(key, encode(data))
+                for queue_key, items in by_queue.items():
+                    pipe.lpush(queue_key, *(encode(d) for d in items))
+                await cast("Awaitable[list[Any]]", pipe.execute())
+            return
 
-        queue_key = self._get_queue_key(priority)
-        await self.cache.lpush(queue_key, self._serialize_job(job))
-        job_key = self._get_job_key(job.id)
-        await self.cache.set(job_key, self._serialize_job(job), ttl=0)
-
-        return job.id
+        if stored:
+            await self.store.set_many(stored, ttl=0)
+        for queue_key, items in by_queue.items():
+            await self.store.lpush(queue_key, *items)
 
     async def get_job(self, job_id: str) -> Job | None:
         job_key = self._get_job_key(job_id)
-        data = await self.cache.get(job_key)
+        data = await self.store.get(job_key)
         return self._deserialize_job(data) if data else None
 
     async def cancel_job(self, job_id: str) -> bool:
@@ -149,30 +219,47 @@ class JobQueue:
             self.workers.clear()
 
     async def _worker(self, worker_id: int) -> None:
+        buffer: deque[Job] = deque()
         while self._running:
             try:
-                job = await self._get_next_job()
-                if job:
-                    await self._process_job(job)
+                if not buffer:
+                    buffer.extend(await self._get_next_jobs(self.prefetch))
+                if buffer:
+                    await self._process_job(buffer.popleft())
                 else:
                     await asyncio.sleep(self.poll_interval)
             except asyncio.CancelledError:
+                if buffer:
+                    await self._push_jobs(list(buffer))
                 break
             except Exception as e:
                 logger.exception("Worker %d error: %s", worker_id, e)
                 await asyncio.sleep(self.poll_interval)
 
     async def _get_next_job(self) -> Job | None:
+        jobs = await self._get_next_jobs(1)
+        return jobs[0] if jobs else None
+
+    async def _get_next_jobs(self, limit: int) -> list[Job]:
+        """Pop up to ``limit`` runnable jobs, highest priority first, one RPOP per list."""
+        ready: list[Job] = []
         for priority in sorted(JobPriority, key=lambda p: p.value, reverse=True):
             queue_key = self._get_queue_key(priority)
-            data = await self.cache.rpop(queue_key)
-            if data:
-                job = self._deserialize_job(data)
-                if job and self._should_process_job(job):
-                    return job
-                if job:
-                    await self.cache.lpush(queue_key, self._serialize_job(job))
-        return None
+            data = await self.store.rpop(queue_key, limit - len(ready))
+            if not data:
+                continue
+            not_ready: list[Job] = []
+            for item in data:
+                job = self._deserialize_job(item)
+                if self._should_process_job(job):
+                    ready.append(job)
+                elif job.status != JobStatus.CANCELLED:
+                    not_ready.append(job)
+            if not_ready:
+                await self._push_jobs(not_ready)
+            if len(ready) >= limit:
+                break
+        return ready
 
     async def _process_job(self, job: Job) -> None:
         handler = self.handlers.get(job.name)
@@ -213,16 +300,14 @@ class JobQueue:
                 datetime.utcnow() + timedelta(seconds=job.retry_delay * job.retry_count)
             ).isoformat()
 
-            queue_key = self._get_queue_key(job.priority)
-            await self.cache.lpush(queue_key, self._serialize_job(job))
+            await self._push_jobs([job])
 
     async def _update_job(self, job: Job) -> None:
         job_key = self._get_job_key(job.id)
-        await self.cache.set(job_key, self._serialize_job(job), ttl=0)
-
         if job.status in [JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED]:
-            ttl = 86400
-            await self.cache.expire(job_key, ttl)
+            await self.store.set(job_key, self._serialize_job(job), ttl=86400)
+        else:
+            await self.store.set(job_key, self._serialize_job(job), ttl=0)
 
     def _get_queue_key(self, priority: JobPriority) -> str:
         return f"queue:{self.queue_name}:{priority.name.lower()}"
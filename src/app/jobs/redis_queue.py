@@ -0,0 +1,426 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import time
+from collections import deque
+from collections.abc import Awaitable, Sequence
+from datetime import datetime, timedelta
+from typing import Any, cast
+
+from prometheus_client import Counter
+
+from app.core.cache.backends.redis_backend import RedisCache
+from app.core.cache.serializers import decode, encode
+from app.core.logging import get_logger
+from app.jobs.queue import Job, JobPriority, JobQueue, JobStatus
+
+logger = get_logger(__name__)
+
+JOBS_CLAIMED = Counter("job_queue_claimed_total", "Jobs claimed by a worker", ["queue"])
+JOBS_REQUEUED = Counter(
+    "job_queue_requeued_total",
+    "Jobs moved back to the ready set by the scheduler",
+    ["queue", "reason"],
+)
+
+# Ready jobs are scored so that ZPOPMAX yields the highest priority first and, within a
+# priority, the oldest job first. Jobs added together are spaced a millisecond apart so
+# they keep their order instead of falling back to ZPOPMAX's member-string tie-break.
+_PRIORITY_STRIDE = 10**13
+
+# KEYS: ready, inflight  ARGV: now_ms, grace_ms, count
+# Returns the claimed members. Jobs claimed together run one after another, so each
+# deadline also covers the timeouts of the jobs ahead of it in the batch. Job records
+# are read afterwards: their keys are not known before the pop, and a script may only
+# touch the keys it is given on Redis Cluster.
+_CLAIM_SCRIPT = """
+local popped = redis.call('ZPOPMAX', KEYS[1], tonumber(ARGV[3]))
+if #popped == 0 then
+  return false
+end
+local deadline = tonumber(ARGV[1]) + tonumber(ARGV[2])
+local out = {}
+for i = 1, #popped, 2 do
+  local member = popped[i]
+  deadline = deadline + tonumber(string.match(member, '^%d+|(%d+)|')) * 1000
+  redis.call('ZADD', KEYS[2], string.format('%.0f', deadline), member)
+  out[#out + 1] = member
+end
+return out
+"""
+
+# KEYS: ready, delayed, inflight, wakeup  ARGV: now_ms, batch, max_tokens
+_PROMOTE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local counts = {}
+for i, src in ipairs({KEYS[2], KEYS[3]}) do
+  local due = redis.call(
+    'ZRANGEBYSCORE', src, '-inf', now, 'WITHSCORES', 'LIMIT', 0, tonumber(ARGV[2]))
+  for j = 1, #due, 2 do
+    local member = due[j]
+    redis.call('ZREM', src, member)
+    local priority = tonumber(string.match(member, '^(%d+)|'))
+    -- Aged from the due time, so jobs promoted together keep their order.
+    local score = priority * 1e13 - tonumber(due[j + 1])
+    redis.call('ZADD', KEYS[1], string.format('%.0f', score), member)
+  end
+  counts[i] = #due / 2
+end
+local moved = counts[1] + counts[2]
+if moved > 0 then
+  local tokens = math.min(moved, tonumber(ARGV[3]))
+  for _ = 1, tokens do
+    redis.call('LPUSH', KEYS[4], '1')
+  end
+  redis.call('LTRIM', KEYS[4], 0, tonumber(ARGV[3]) - 1)
+end
+local next_delayed = redis.call('ZRANGE', KEYS[2], 0, 0, 'WITHSCORES')[2] or false
+local next_inflight = redis.call('ZRANGE', KEYS[3], 0, 0, 'WITHSCORES')[2] or false
+return {counts[1], counts[2], next_delayed, next_inflight}
+"""
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class RedisJobQueue(JobQueue):
+    """Redis-native engine for :class:`JobQueue` with at-least-once delivery.
+
+    Job ids live in three sorted sets per queue: ``ready`` (scored by priority, then
+    age), ``delayed`` (scheduled and retrying jobs, scored by due time) and ``inflight``
+    (claimed jobs, scored by visibility deadline). A worker claims a job with one
+    script that pops the best ready job, records its deadline in ``inflight`` and
+    returns the job record. Idle workers block on a wakeup list instead of polling,
+    and a single scheduler task per queue promotes due jobs and puts claimed jobs
+    whose worker died back into ``ready`` once their deadline
+    (``timeout + visibility_grace``) passes. Jobs are acknowledged by removing them
+    from ``inflight`` after their final state is stored.
+
+    With ``prefetch`` above one a worker claims up to that many jobs per round trip and
+    runs them in order; jobs it has not started are put back in ``ready`` when the
+    worker stops.
+
+    Each idle worker holds one pooled connection in a blocking pop, so the cache's
+    connection pool must allow ``max_workers`` plus headroom.
+
+    The sets and the wakeup list of a queue share the ``{queue_name}`` hash tag, so the
+    scripts also run on Redis Cluster.
+    """
+
+    def __init__(
+        self,
+        cache: RedisCache,
+        queue_name: str = "default",
+        max_workers: int = 10,
+        poll_interval: int = 1,
+        block_timeout: float = 5.0,
+        visibility_grace: int = 30,
+        promote_interval: float = 5.0,
+        promote_batch: int = 500,
+        prefetch: int = 1,
+    ):
+        super().__init__(
+            cache,
+            queue_name=queue_name,
+            max_workers=max_workers,
+            poll_interval=poll_interval,
+            prefetch=prefetch,
+        )
+        self._redis_cache = cache
+        self.block_timeout = block_timeout
+        self.visibility_grace = visibility_grace
+        self.promote_interval = promote_interval
+        self.promote_batch = promote_batch
+        self._timer_wakeup = asyncio.Event()
+        self._scheduler: asyncio.Task[None] | None = None
+        prefix = f"queue:{{{queue_name}}}"
+        self._ready_key = f"{prefix}:ready"
+        self._delayed_key = f"{prefix}:delayed"
+        self._inflight_key = f"{prefix}:inflight"
+        self._wakeup_key = f"{prefix}:wakeup"
+
+    @classmethod
+    async def create(
+        cls,
+        queue_name: str = "default",
+        max_workers: int = 10,
+        poll_interval: int = 1,
+        prefetch: int = 1,
+    ) -> RedisJobQueue:
+        cache = RedisCache(
+            url=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            max_connections=max_workers + 16,
+        )
+        return cls(
+            cache,
+            queue_name=queue_name,
+            max_workers=max_workers,
+            poll_interval=poll_interval,
+            prefetch=prefetch,
+        )
+
+    async def enqueue_many(
+        self,
+        job_name: str,
+        payloads: Sequence[dict[str, Any]],
+        priority: JobPriority = JobPriority.NORMAL,
+        max_retries: int = 3,
+        timeout: int = 300,
+        delay: int = 0,
+    ) -> list[str]:
+        jobs = [
+            self._new_job(job_name, payload, priority, max_retries, timeout, delay)
+            for payload in payloads
+        ]
+        if not jobs:
+            return []
+        cli = await self._redis_cache.client()
+        async with cli.pipeline(transaction=True) as pipe:
+            for seq, job in enumerate(jobs):
+                pipe.set(self._get_job_key(job.id), encode(self._serialize_job(job)))
+                self._schedule(pipe, job, delay, wake=False, seq=seq)
+            if delay <= 0:
+                self._wake(pipe, len(jobs))
+            await pipe.execute()
+        if delay > 0:
+            self._timer_wakeup.set()
+        return [job.id for job in jobs]
+
+    async def cancel_job(self, job_id: str) -> bool:
+        job = await self.get_job(job_id)
+        if not job or job.status not in [JobStatus.PENDING, JobStatus.RETRYING]:
+            return False
+
+        job.status = JobStatus.CANCELLED
+        job.completed_at = datetime.utcnow()
+        member = self._member(job)
+        cli = await self._redis_cache.client()
+        async with cli.pipeline(transaction=True) as pipe:
+            pipe.zrem(self._ready_key, member)
+            pipe.zrem(self._delayed_key, member)
+            await pipe.execute()
+        await self._update_job(job)
+        return True
+
+    async def start(self) -> None:
+        async with self._lock:
+            if self._running:
+                return
+            self._running = True
+            await self._migrate_legacy_lists()
+            self._scheduler = asyncio.create_task(self._run_scheduler())
+            for i in range(self.max_workers):
+                self.workers.append(asyncio.create_task(self._worker(i)))
+
+    async def stop(self) -> None:
+        async with self._lock:
+            self._running = False
+            tasks = [*self.workers, *([self._scheduler] if self._scheduler else [])]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.workers.clear()
+            self._scheduler = None
+
+    async def queue_depths(self) -> dict[str, int]:
+        cli = await self._redis_cache.client()
+        async with cli.pipeline(transaction=False) as pipe:
+            for key in (self._ready_key, self._delayed_key, self._inflight_key):
+                pipe.zcard(key)
+            ready, delayed, inflight = await pipe.execute()
+        return {"ready": int(ready), "delayed": int(delayed), "inflight": int(inflight)}
+
+    async def _worker(self, worker_id: int) -> None:
+        buffer: deque[tuple[str, Job | None]] = deque()
+        while self._running:
+            try:
+                if not buffer:
+                    buffer.extend(await self._claim(self.prefetch))
+                if not buffer:
+                    cli = await self._redis_cache.client()
+                    fut = cast(
+                        "Awaitable[Any]", cli.brpop([self._wakeup_key], timeout=self.block_timeout)
+                    )
+                    await fut
+                    continue
+                member, job = buffer.popleft()
+                if job is not None:
+                    await self._handle_claimed(job)
+                await self._ack(member)
+            except asyncio.CancelledError:
+                if buffer:
+                    await self._release([m for m, _ in buffer])
+                break
+            except Exception as e:
+                logger.exception("Worker %d error: %s", worker_id, e)
+                await asyncio.sleep(self.poll_interval)
+
+    async def _handle_claimed(self, job: Job) -> None:
+        if job.status in (JobStatus.CANCELLED, JobStatus.COMPLETED, JobStatus.FAILED):
+            return
+        if self._should_process_job(job):
+            await self._process_job(job)
+            return
+        # Promoted early, e.g. by a host whose clock runs ahead: put it back.
+        cli = await self._redis_cache.client()
+        async with cli.pipeline(transaction=True) as pipe:
+            self._schedule(pipe, job, self._remaining_delay(job))
+            await pipe.execute()
+        self._timer_wakeup.set()
+
+    async def _claim(self, count: int = 1) -> list[tuple[str, Job | None]]:
+        cli = await self._redis_cache.client()
+        fut = cast(
+            "Awaitable[list[bytes] | None]",
+            cli.eval(
+                _CLAIM_SCRIPT,
+                2,
+                self._ready_key,
+                self._inflight_key,
+                _now_ms(),
+                self.visibility_grace * 1000,
+                count,
+            ),
+        )
+        res = await fut
+        if not res:
+            return []
+        members = [m.decode() if isinstance(m, bytes) else str(m) for m in res]
+        async with cli.pipeline(transaction=False) as pipe:
+            for member in members:
+                pipe.get(self._get_job_key(member.split("|", 2)[2]))
+            records = await pipe.execute()
+        claimed: list[tuple[str, Job | None]] = []
+        for member, record in zip(members, records, strict=True):
+            if record is None:
+                logger.warning("Claimed job has no record", member=member)
+                claimed.append((member, None))
+            else:
+                claimed.append((member, self._deserialize_job(decode(record))))
+        JOBS_CLAIMED.labels(queue=self.queue_name).inc(len(claimed))
+        return claimed
+
+    async def _release(self, members: Sequence[str]) -> None:
+        """Return claimed but unstarted jobs to ``ready`` without waiting for their deadline."""
+        now = _now_ms()
+        cli = await self._redis_cache.client()
+        async with cli.pipeline(transaction=True) as pipe:
+            pipe.zrem(self._inflight_key, *members)
+            pipe.zadd(
+                self._ready_key,
+                {
+                    m: int(m.split("|", 1)[0]) * _PRIORITY_STRIDE - now - seq
+                    for seq, m in enumerate(members)
+                },
+            )
+            self._wake(pipe, len(members))
+            await pipe.execute()
+        JOBS_REQUEUED.labels(queue=self.queue_name, reason="released").inc(len(members))
+
+    async def _ack(self, member: str) -> None:
+        cli = await self._redis_cache.client()
+        await cli.zrem(self._inflight_key, member)
+
+    async def _retry_job(self, job: Job) -> None:
+        if job.retry_count < job.max_retries:
+            job.retry_count += 1
+            job.status = JobStatus.RETRYING
+            delay = job.retry_delay * job.retry_count
+            job.metadata["retry_at"] = (datetime.utcnow() + timedelta(seconds=delay)).isoformat()
+            cli = await self._redis_cache.client()
+            async with cli.pipeline(transaction=True) as pipe:
+                self._schedule(pipe, job, delay)
+                await pipe.execute()
+            self._timer_wakeup.set()
+
+    async def _run_scheduler(self) -> None:
+        """Promote due delayed jobs and reclaim expired claims, sleeping until the next one."""
+        while self._running:
+            try:
+                delay = await self._promote()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.exception("Job scheduler error: %s", e)
+                delay = self.promote_interval
+            self._timer_wakeup.clear()
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._timer_wakeup.wait(), timeout=delay)
+
+    async def _promote(self) -> float:
+        cli = await self._redis_cache.client()
+        now = _now_ms()
+        fut = cast(
+            "Awaitable[list[Any]]",
+            cli.eval(
+                _PROMOTE_SCRIPT,
+                4,
+                self._ready_key,
+                self._delayed_key,
+                self._inflight_key,
+                self._wakeup_key,
+                now,
+                self.promote_batch,
+                self.max_workers,
+            ),
+        )
+        promoted, reclaimed, next_delayed, next_inflight = await fut
+        if promoted:
+            JOBS_REQUEUED.labels(queue=self.queue_name, reason="due").inc(promoted)
+        if reclaimed:
+            JOBS_REQUEUED.labels(queue=self.queue_name, reason="expired").inc(reclaimed)
+            logger.warning(
+                "Reclaimed jobs from expired claims", queue=self.queue_name, count=reclaimed
+            )
+        if promoted >= self.promote_batch or reclaimed >= self.promote_batch:
+            return 0.0
+        upcoming = [float(s) for s in (next_delayed, next_inflight) if s]
+        if not upcoming:
+            return self.promote_interval
+        return min(self.promote_interval, max(0.0, (min(upcoming) - now) / 1000))
+
+    async def _migrate_legacy_lists(self) -> None:
+        """Move jobs left in the list-based queue's per-priority lists into the sorted sets."""
+        moved = 0
+        for priority in JobPriority:
+            while (data := await self.cache.rpop(self._get_queue_key(priority))) is not None:
+                job = self._deserialize_job(data)
+                if job.status == JobStatus.CANCELLED:
+                    continue
+                cli = await self._redis_cache.client()
+                async with cli.pipeline(transaction=True) as pipe:
+                    self._schedule(pipe, job, self._remaining_delay(job))
+                    await pipe.execute()
+                moved += 1
+        if moved:
+            logger.info("Migrated legacy queued jobs", queue=self.queue_name, count=moved)
+
+    def _schedule(self, pipe: Any, job: Job, delay: float, wake: bool = True, seq: int = 0) -> None:
+        """Add ``job`` to ``ready`` or ``delayed``; ``seq`` orders jobs of one batch."""
+        member = self._member(job)
+        now = _now_ms() + seq
+        if delay > 0:
+            pipe.zadd(self._delayed_key, {member: now + int(delay * 1000)})
+            return
+        pipe.zadd(self._ready_key, {member: job.priority.value * _PRIORITY_STRIDE - now})
+        if wake:
+            self._wake(pipe, 1)
+
+    def _wake(self, pipe: Any, jobs: int) -> None:
+        """Push one wakeup token per ready job, up to one per worker."""
+        pipe.lpush(self._wakeup_key, *([1] * min(jobs, self.max_workers)))
+        pipe.ltrim(self._wakeup_key, 0, self.max_workers - 1)
+
+    @staticmethod
+    def _member(job: Job) -> str:
+        return f"{job.priority.value}|{max(0, int(job.timeout))}|{job.id}"
+
+    @staticmethod
+    def _remaining_delay(job: Job) -> float:
+        due = job.metadata.get("retry_at" if job.status == JobStatus.RETRYING else "scheduled_for")
+        if not due:
+            return 0.0
+        return max(0.0, (datetime.fromisoformat(due) - datetime.utcnow()).total_seconds())
@@ -13,6 +13,7 @@ class AzureQuotaCheck(Tool):
     """
 
     name = "azure_quota_check"
+    side_effects = False
     description = (
         "Check Azure Compute quotas and usage for a region to catch failures before deployment."
     )
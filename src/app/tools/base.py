@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import abc
-from typing import Any, TypedDict
+from collections.abc import Mapping
+from typing import Any, ClassVar, TypedDict
 
 
 class ToolResult(TypedDict, total=False):
@@ -17,6 +18,13 @@ class Tool(abc.ABC):
     name: str
     description: str
     schema: dict[str, Any]
+    # Read-only tools set this to False so several calls from one model turn can run
+    # concurrently; tools that may change state always run one at a time.
+    side_effects: ClassVar[bool] = True
+
+    def has_side_effects(self, args: Mapping[str, Any]) -> bool:
+        """Whether a call with ``args`` may change state; defaults to ``side_effects``."""
+        return self.side_effects
 
     @abc.abstractmethod
     async def run(self, **kwargs: Any) -> ToolResult:
@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 from enum import Enum
 from typing import Any
 
+from app.tools.finops.cost_frame import CostFrame
 from app.tools.finops.cost_ingestion import CostIngestionService
 from app.tools.finops.cost_ingestion import ResourceCost as RawResourceCost
 from app.tools.finops.forecasting import ForecastingService
@@ -105,55 +106,14 @@ class CostManagementSystem:
             await self.cost_ingestion.get_resource_costs(scope, resource_ids, start_date, end_date)
         )
 
-        usage_by_resource: dict[str, float] = {}
-        for row in usage_data or []:
-            rid = (
-                row.get("resourceId")
-                or row.get("ResourceId")
-                or row.get("resource_id")
-                or row.get("id")
-            )
-            if not rid:
-                continue
-            raw_val = (
-                row.get("cost_usd")
-                if row.get("cost_usd") is not None
-                else (
-                    row.get("preTaxCost")
-                    if row.get("preTaxCost") is not None
-                    else row.get("Cost") if row.get("Cost") is not None else row.get("cost")
-                )
-            )
-            try:
-                usage_by_resource[rid] = usage_by_resource.get(rid, 0.0) + float(raw_val or 0.0)
-            except (TypeError, ValueError):
-                continue
-
-        costs: list[AnalyzedResourceCost] = []
-        period_days = (end_date - start_date).days or 1
-        for resource in resources:
-            resource_id = resource["id"]
-            cost_info = raw_resource_costs.get(resource_id, {})
-            period_cost = float(cost_info.get("cost_usd", 0.0))
-            if resource_id in usage_by_resource:
-                period_cost = usage_by_resource[resource_id]
-            daily_cost = period_cost / period_days
-            monthly_cost = daily_cost * 30.0
-
-            resource_cost = AnalyzedResourceCost(
-                resource_id=resource_id,
-                resource_name=resource.get("name", ""),
-                resource_type=resource.get("type", ""),
-                category=self._categorize_resource(resource.get("type", "")),
-                location=resource.get("location", ""),
-                daily_cost=daily_cost,
-                monthly_cost=monthly_cost,
-                yearly_cost=monthly_cost * 12.0,
-                tags=resource.get("tags", {}),
-                optimization_potential=monthly_cost * 0.2,
-                recommendations=[],
-            )
-            costs.append(resource_cost)
+        frame = CostFrame.build(
+            resources,
+            raw_resource_costs,
+            usage_data,
+            period_days=(end_date - start_date).days,
+            categorize=lambda t: self._categorize_resource(t).value,
+        )
+        monthly = frame.monthly_cost
 
         forecast: Any = await self.forecasting.forecast_costs(subscription_id, forecast_days=30)
         anomalies: list[Any] = await self.forecasting.detect_cost_anomalies(
@@ -161,16 +121,16 @@ class CostManagementSystem:
         )
 
         analysis: dict[str, Any] = {
-            "total_cost": sum(c.monthly_cost for c in costs),
+            "total_cost": float(monthly.sum()),
             "period": {
                 "start": start_date.isoformat(),
                 "end": end_date.isoformat(),
             },
-            "breakdown_by_category": self._group_by_category(costs),
-            "breakdown_by_location": self._group_by_location(costs),
-            "breakdown_by_resource_type": self._group_by_resource_type(costs),
-            "top_expensive_resources": self._get_top_expensive(costs, 10),
-            "optimization_potential": sum(c.optimization_potential for c in costs),
+            "breakdown_by_category": frame.category.sum(monthly),
+            "breakdown_by_location": frame.location.sum(monthly),
+            "breakdown_by_resource_type": frame.resource_type.sum(monthly),
+            "top_expensive_resources": self._get_top_expensive(frame, 10),
+            "optimization_potential": float(monthly.sum()) * 0.2,
             "forecast": {
                 "next_30_days": float(forecast.predicted_cost),
                 "confidence_interval": tuple(forecast.confidence_interval),
@@ -191,11 +151,9 @@ class CostManagementSystem:
         if group_by:
             for group in group_by:
                 if group == "tags":
-                    analysis[f"breakdown_by_{group}"] = self._group_by_tags(costs)
-                elif group == "department":
-                    analysis[f"breakdown_by_{group}"] = self._group_by_department(costs)
-                elif group == "project":
-                    analysis[f"breakdown_by_{group}"] = self._group_by_project(costs)
+                    analysis[f"breakdown_by_{group}"] = frame.by_tags()
+                elif group in ("department", "project"):
+                    analysis[f"breakdown_by_{group}"] = frame.by_tag(group)
 
         return analysis
 
@@ -458,63 +416,17 @@ class CostManagementSystem:
             return ResourceCategory.BACKUP
         return ResourceCategory.OTHER
 
-    def _group_by_category(self, costs: list[AnalyzedResourceCost]) -> dict[str, float]:
-        grouped: dict[str, float] = {}
-        for cost in costs:
-            category = cost.category.value
-            grouped[category] = grouped.get(category, 0.0) + cost.monthly_cost
-        return grouped
-
-    def _group_by_location(self, costs: list[AnalyzedResourceCost]) -> dict[str, float]:
-        grouped: dict[str, float] = {}
-        for cost in costs:
-            grouped[cost.location] = grouped.get(cost.location, 0.0) + cost.monthly_cost
-        return grouped
-
-    def _group_by_resource_type(self, costs: list[AnalyzedResourceCost]) -> dict[str, float]:
-        grouped: dict[str, float] = {}
-        for cost in costs:
-            grouped[cost.resource_type] = grouped.get(cost.resource_type, 0.0) + cost.monthly_cost
-        return grouped
-
-    def _group_by_tags(self, costs: list[AnalyzedResourceCost]) -> dict[str, dict[str, float]]:
-        grouped: dict[str, dict[str, float]] = {}
-        for cost in costs:
-            for tag_key, tag_value in cost.tags.items():
-                if tag_key not in grouped:
-                    grouped[tag_key] = {}
-                grouped[tag_key][tag_value] = (
-                    grouped[tag_key].get(tag_value, 0.0) + cost.monthly_cost
-                )
-        return grouped
-
-    def _group_by_department(self, costs: list[AnalyzedResourceCost]) -> dict[str, float]:
-        grouped: dict[str, float] = {}
-        for cost in costs:
-            dept = cost.tags.get("department", "unassigned")
-            grouped[dept] = grouped.get(dept, 0.0) + cost.monthly_cost
-        return grouped
-
-    def _group_by_project(self, costs: list[AnalyzedResourceCost]) -> dict[str, float]:
-        grouped: dict[str, float] = {}
-        for cost in costs:
-            project = cost.tags.get("project", "unassigned")
-            grouped[project] = grouped.get(project, 0.0) + cost.monthly_cost
-        return grouped
-
-    def _get_top_expensive(
-        self, costs: list[AnalyzedResourceCost], limit: int
-    ) -> list[dict[str, Any]]:
-        sorted_costs = sorted(costs, key=lambda c: c.monthly_cost, reverse=True)
+    def _get_top_expensive(self, frame: CostFrame, limit: int) -> list[dict[str, Any]]:
+        monthly = frame.monthly_cost
         return [
             {
-                "resource_id": c.resource_id,
-                "resource_name": c.resource_name,
-                "resource_type": c.resource_type,
-                "monthly_cost": c.monthly_cost,
-                "optimization_potential": c.optimization_potential,
+                "resource_id": frame.resource_id[i],
+                "resource_name": frame.resource_name[i],
+                "resource_type": frame.resource_type.labels[frame.resource_type.codes[i]],
+                "monthly_cost": float(monthly[i]),
+                "optimization_potential": float(monthly[i]) * 0.2,
             }
-            for c in sorted_costs[:limit]
+            for i in frame.top_k(monthly, limit).tolist()
         ]
 
 
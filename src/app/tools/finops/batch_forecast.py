@@ -0,0 +1,133 @@
+"""Forecasts for many daily cost series at once."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from statistics import NormalDist
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+_WEEK = 7
+_MIN_WEEKS_FOR_SEASONALITY = 2
+_SEASONALITY_VARIANCE_THRESHOLD = 0.1
+_TREND_CHANGE_THRESHOLD = 5.0
+
+
+@dataclass(frozen=True, slots=True)
+class BatchForecast:
+    """Per-series results; row ``i`` of every array belongs to series ``i``."""
+
+    fitted: NDArray[np.float64]  # (n, days)
+    predictions: NDArray[np.float64]  # (n, horizon)
+    total: NDArray[np.float64]  # (n,)
+    lower: NDArray[np.float64]  # (n,)
+    upper: NDArray[np.float64]  # (n,)
+    residual_std: NDArray[np.float64]  # (n,)
+    r2: NDArray[np.float64]  # (n,)
+    trend: NDArray[np.str_]  # (n,) increasing / decreasing / stable
+    seasonal: NDArray[np.bool_]  # (n,)
+    z_scores: NDArray[np.float64]  # (n, days)
+    anomalies: NDArray[np.bool_]  # (n, days)
+
+
+class BatchForecaster:
+    """Trend plus day-of-week model fitted to ``n`` aligned series in one least squares.
+
+    Every series shares the same day axis, so the design matrix is built once and
+    ``np.linalg.lstsq`` solves for all of them as columns of one right-hand side.
+    Days without cost should be passed as 0.
+    """
+
+    def __init__(
+        self,
+        trend_degree: int = 1,
+        weekly: bool = True,
+        confidence_level: float = 0.95,
+        anomaly_z: float = 2.0,
+    ) -> None:
+        self.trend_degree = trend_degree
+        self.weekly = weekly
+        self.confidence_level = confidence_level
+        self.anomaly_z = anomaly_z
+
+    def fit(self, series: ArrayLike, horizon: int) -> BatchForecast:
+        y = np.atleast_2d(np.asarray(series, dtype=np.float64))
+        n, days = y.shape
+        weekly = self.weekly and days >= _MIN_WEEKS_FOR_SEASONALITY * _WEEK
+        X = self._design(np.arange(days), days, weekly)
+        future = self._design(np.arange(days, days + horizon), days, weekly)
+
+        coef = np.linalg.lstsq(X, y.T, rcond=None)[0]  # (features, n)
+        fitted = (X @ coef).T
+        predictions = (future @ coef).T
+        residuals = y - fitted
+
+        # Residuals below this are rounding error, e.g. on a constant series.
+        noise = 1e-9 * np.sqrt(np.einsum("ij,ij->i", y, y) / max(days, 1))
+        ss_res = np.einsum("ij,ij->i", residuals, residuals)
+        centred = y - y.mean(axis=1, keepdims=True)
+        ss_tot = np.einsum("ij,ij->i", centred, centred)
+        exact = np.sqrt(ss_res / max(days, 1)) <= noise
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r2 = np.where(ss_tot > 0, 1.0 - ss_res / ss_tot, np.where(exact, 1.0, 0.0))
+
+        dof = max(days - X.shape[1], 1)
+        residual_std = np.sqrt(ss_res / dof)
+        z = float(NormalDist().inv_cdf((1.0 + self.confidence_level) / 2.0))
+        total = predictions.sum(axis=1)
+        margin = z * residual_std * np.sqrt(horizon)
+
+        spread = residuals.std(axis=1, ddof=1) if days > 1 else np.zeros(n)
+        spread = np.where(spread > noise, spread, np.inf)[:, None]
+        z_scores = np.abs(residuals - residuals.mean(axis=1, keepdims=True)) / spread
+
+        return BatchForecast(
+            fitted=fitted,
+            predictions=predictions,
+            total=total,
+            lower=total - margin,
+            upper=total + margin,
+            residual_std=residual_std,
+            r2=r2,
+            trend=self._trend(predictions),
+            seasonal=self._seasonal(y),
+            z_scores=z_scores,
+            anomalies=z_scores > self.anomaly_z,
+        )
+
+    def _design(self, t: NDArray[np.int_], days: int, weekly: bool) -> NDArray[np.float64]:
+        # Scaling time to [0, 1] over the history keeps higher trend powers well conditioned.
+        scaled = t / max(days - 1, 1)
+        columns = [scaled**p for p in range(self.trend_degree + 1)]
+        if weekly:
+            # Day-of-week offsets relative to the first weekday of the history.
+            columns.extend((t % _WEEK == d).astype(np.float64) for d in range(1, _WEEK))
+        return np.column_stack(columns)
+
+    @staticmethod
+    def _trend(predictions: NDArray[np.float64]) -> NDArray[np.str_]:
+        window = min(_WEEK, predictions.shape[1])
+        if window == 0:
+            return np.full(predictions.shape[0], "stable")
+        first = predictions[:, :window].mean(axis=1)
+        last = predictions[:, -window:].mean(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change = np.where(first > 0, (last - first) / first * 100.0, 0.0)
+        return np.select(
+            [change > _TREND_CHANGE_THRESHOLD, change < -_TREND_CHANGE_THRESHOLD],
+            ["increasing", "decreasing"],
+            "stable",
+        )
+
+    @staticmethod
+    def _seasonal(y: NDArray[np.float64]) -> NDArray[np.bool_]:
+        """Weekday means explain over 10% of the variance, as ``_detect_seasonality``."""
+        n, days = y.shape
+        if days < _MIN_WEEKS_FOR_SEASONALITY * _WEEK:
+            return np.zeros(n, dtype=bool)
+        pattern = np.column_stack([y[:, d::_WEEK].mean(axis=1) for d in range(_WEEK)])
+        total_var = y.var(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where(total_var > 0, pattern.var(axis=1) / total_var, 0.0)
+        return ratio > _SEASONALITY_VARIANCE_THRESHOLD
@@ -0,0 +1,257 @@
+"""Per-resource costs from a few grouped Cost Management queries."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Callable, Sequence
+from datetime import datetime
+from functools import partial
+
+from azure.core.exceptions import AzureError, HttpResponseError
+from azure.core.rest import HttpRequest
+from azure.mgmt.costmanagement import CostManagementClient
+from azure.mgmt.costmanagement.models import (
+    QueryAggregation,
+    QueryComparisonExpression,
+    QueryDataset,
+    QueryDefinition,
+    QueryFilter,
+    QueryGrouping,
+    QueryResult,
+    QueryTimePeriod,
+    TimeframeType,
+)
+from prometheus_client import Counter
+
+from app.core.logging import get_logger
+from app.tools.finops.cost_ingestion import ResourceCost
+
+logger = get_logger(__name__)
+
+COST_QUERY_CALLS = Counter(
+    "finops_cost_query_calls_total", "Cost Management query calls", ["outcome"]
+)
+
+_COST_COLUMNS = ("totalCost", "PreTaxCost", "Cost")
+_COST_USD_COLUMNS = ("totalCostUSD", "PreTaxCostUSD", "CostUSD")
+_RETRY_AFTER_HEADERS = (
+    "x-ms-ratelimit-microsoft.costmanagement-entity-retry-after",
+    "x-ms-ratelimit-microsoft.costmanagement-tenant-retry-after",
+    "x-ms-ratelimit-microsoft.costmanagement-qpu-retry-after",
+    "retry-after",
+)
+
+
+class AdaptiveLimiter:
+    """Concurrency limit that backs off on throttling and recovers on success.
+
+    The limit halves on a 429 and every caller pauses until the server's retry-after
+    has passed; each ``increase_after`` consecutive successes raise it by one again,
+    up to ``maximum``.
+    """
+
+    def __init__(
+        self, initial: int = 4, minimum: int = 1, maximum: int = 16, increase_after: int = 4
+    ) -> None:
+        self.limit = initial
+        self._minimum = minimum
+        self._maximum = maximum
+        self._increase_after = increase_after
+        self._active = 0
+        self._successes = 0
+        self._resume_at = 0.0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            while True:
+                delay = self._resume_at - time.monotonic()
+                if delay > 0:
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), delay)
+                    except TimeoutError:
+                        pass
+                    continue
+                if self._active < self.limit:
+                    self._active += 1
+                    return
+                await self._cond.wait()
+
+    async def release(self, throttled: bool = False, retry_after: float = 0.0) -> None:
+        async with self._cond:
+            self._active -= 1
+            if throttled:
+                self.limit = max(self._minimum, self.limit // 2)
+                self._successes = 0
+                self._resume_at = max(self._resume_at, time.monotonic() + retry_after)
+            else:
+                self._successes += 1
+                if self._successes >= self._increase_after and self.limit < self._maximum:
+                    self.limit += 1
+                    self._successes = 0
+            self._cond.notify_all()
+
+
+class BulkCostEngine:
+    """Costs for many resources from grouped ``ResourceId`` queries.
+
+    Resource ids are split into chunks of ``chunk_size``; each chunk is one query
+    filtered to its ids and grouped by resource, with ``nextLink`` pages followed, so a
+    subscription costs ``ceil(n / chunk_size)`` calls plus any extra pages instead of
+    one call per resource. Chunks run concurrently under an :class:`AdaptiveLimiter`
+    and are retried when throttled.
+    """
+
+    def __init__(
+        self,
+        client: CostManagementClient,
+        chunk_size: int = 1000,
+        limiter: AdaptiveLimiter | None = None,
+        max_retries: int = 5,
+    ) -> None:
+        self._client = client
+        self._chunk_size = chunk_size
+        self._limiter = limiter or AdaptiveLimiter()
+        self._max_retries = max_retries
+
+    async def resource_costs(
+        self,
+        scope: str,
+        resource_ids: Sequence[str],
+        start_date: datetime,
+        end_date: datetime,
+    ) -> dict[str, ResourceCost]:
+        unique = list(dict.fromkeys(resource_ids))
+        chunks = [unique[i : i + self._chunk_size] for i in range(0, len(unique), self._chunk_size)]
+        results = await asyncio.gather(
+            *(self._chunk_costs(scope, chunk, start_date, end_date) for chunk in chunks)
+        )
+        costs: dict[str, ResourceCost] = {}
+        for chunk_costs in results:
+            costs.update(chunk_costs)
+        logger.info("bulk_resource_costs", scope=scope, resources=len(unique), chunks=len(chunks))
+        return costs
+
+    async def _chunk_costs(
+        self, scope: str, chunk: list[str], start_date: datetime, end_date: datetime
+    ) -> dict[str, ResourceCost]:
+        query = self._query(chunk, start_date, end_date)
+        try:
+            rows = await self._call(lambda: self._client.query.usage(scope, query))
+            found = self._parse(rows)
+            while rows is not None and rows.next_link:
+                request = HttpRequest("POST", rows.next_link, json=query.as_dict())
+                rows = await self._call(partial(self._page, request))
+                found.update(self._parse(rows))
+        except AzureError as exc:
+            logger.warning("bulk_resource_costs_chunk_failed", size=len(chunk), error=str(exc))
+            return {
+                rid: {
+                    "cost": 0.0,
+                    "cost_usd": 0.0,
+                    "currency": "USD",
+                    "error": "Failed to retrieve cost",
+                }
+                for rid in chunk
+            }
+        return {
+            rid: found.get(rid.lower(), {"cost": 0.0, "cost_usd": 0.0, "currency": "USD"})
+            for rid in chunk
+        }
+
+    async def _call(self, fn: Callable[[], QueryResult | None]) -> QueryResult | None:
+        attempt = 0
+        while True:
+            await self._limiter.acquire()
+            try:
+                result: QueryResult | None = await asyncio.to_thread(fn)
+            except HttpResponseError as exc:
+                if exc.status_code != 429 or attempt == self._max_retries:
+                    await self._limiter.release()
+                    COST_QUERY_CALLS.labels(outcome="error").inc()
+                    raise
+                retry_after = self._retry_after(exc, attempt)
+                await self._limiter.release(throttled=True, retry_after=retry_after)
+                COST_QUERY_CALLS.labels(outcome="throttled").inc()
+                logger.info("cost_query_throttled", retry_after=retry_after, attempt=attempt)
+                attempt += 1
+                continue
+            except BaseException:
+                await self._limiter.release()
+                COST_QUERY_CALLS.labels(outcome="error").inc()
+                raise
+            await self._limiter.release()
+            COST_QUERY_CALLS.labels(outcome="ok").inc()
+            return result
+
+    def _page(self, request: HttpRequest) -> QueryResult:
+        response = self._client.send_request(request)
+        if response.status_code >= 400:
+            raise HttpResponseError(response=response)
+        return QueryResult(response.json())
+
+    @staticmethod
+    def _query(chunk: list[str], start_date: datetime, end_date: datetime) -> QueryDefinition:
+        return QueryDefinition(
+            type="ActualCost",
+            timeframe=TimeframeType.CUSTOM,
+            time_period=QueryTimePeriod(from_property=start_date, to=end_date),
+            dataset=QueryDataset(
+                granularity="None",
+                aggregation={
+                    "totalCost": QueryAggregation(name="PreTaxCost", function="Sum"),
+                    "totalCostUSD": QueryAggregation(name="PreTaxCostUSD", function="Sum"),
+                },
+                grouping=[QueryGrouping(type="Dimension", name="ResourceId")],
+                filter=QueryFilter(
+                    dimensions=QueryComparisonExpression(
+                        name="ResourceId", operator="In", values_property=chunk
+                    )
+                ),
+            ),
+        )
+
+    @staticmethod
+    def _parse(result: QueryResult | None) -> dict[str, ResourceCost]:
+        """Costs by lower-cased resource id; one resource may span rows (e.g. currencies)."""
+        if result is None or not result.rows:
+            return {}
+        names = [getattr(c, "name", "") or "" for c in result.columns or []]
+        lowered = [n.lower() for n in names]
+
+        def index(candidates: Sequence[str], default: int | None) -> int | None:
+            for name in candidates:
+                if name.lower() in lowered:
+                    return lowered.index(name.lower())
+            return default
+
+        rid_i = index(("ResourceId",), None)
+        if rid_i is None:
+            return {}
+        cost_i = index(_COST_COLUMNS, 0)
+        usd_i = index(_COST_USD_COLUMNS, 1)
+        cur_i = index(("Currency",), None)
+        out: dict[str, ResourceCost] = {}
+        for row in result.rows:
+            rid = str(row[rid_i]).lower()
+            entry = out.setdefault(rid, {"cost": 0.0, "cost_usd": 0.0, "currency": "USD"})
+            if cost_i is not None and cost_i < len(row):
+                entry["cost"] += float(row[cost_i] or 0.0)
+            if usd_i is not None and usd_i < len(row):
+                entry["cost_usd"] += float(row[usd_i] or 0.0)
+            if cur_i is not None and row[cur_i]:
+                entry["currency"] = str(row[cur_i])
+        return out
+
+    @staticmethod
+    def _retry_after(exc: HttpResponseError, attempt: int) -> float:
+        headers = getattr(exc.response, "headers", None) or {}
+        for name in _RETRY_AFTER_HEADERS:
+            value = headers.get(name)
+            if value:
+                try:
+                    return float(value)
+                except ValueError:
+                    continue
+        return float(min(60, 2**attempt))
@@ -0,0 +1,210 @@
+"""Columnar per-resource cost data for FinOps aggregations."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+
+from app.tools.finops.cost_ingestion import ResourceCost
+
+_ID_COLUMNS = ("resourceId", "ResourceId", "resource_id", "id")
+_COST_COLUMNS = ("cost_usd", "preTaxCost", "Cost", "cost")
+
+
+@dataclass(frozen=True, slots=True)
+class Categorical:
+    """Integer codes into ``labels``, numbered in order of first appearance."""
+
+    codes: NDArray[np.intp]
+    labels: list[str]
+
+    @classmethod
+    def encode(cls, values: Iterable[str]) -> Categorical:
+        index: dict[str, int] = {}
+        codes = [index.setdefault(v, len(index)) for v in values]
+        return cls(np.asarray(codes, dtype=np.intp), list(index))
+
+    def sum(self, weights: NDArray[np.float64]) -> dict[str, float]:
+        totals = np.bincount(self.codes, weights=weights, minlength=len(self.labels))
+        return dict(zip(self.labels, totals.tolist(), strict=True))
+
+
+@dataclass(frozen=True, slots=True)
+class _Tags:
+    """Sparse resource tags: one entry per (resource, key, value)."""
+
+    row: NDArray[np.intp]
+    key: Categorical
+    value: Categorical
+
+
+def _group_sum(
+    codes: NDArray[np.intp], weights: NDArray[np.float64]
+) -> tuple[list[int], list[float]]:
+    """Distinct codes in order of first appearance, with the summed weights of each."""
+    distinct, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+    totals = np.bincount(inverse, weights=weights, minlength=len(distinct))
+    order = np.argsort(first)
+    return distinct[order].tolist(), totals[order].tolist()
+
+
+def _column(rows: Sequence[Mapping[str, Any]], candidates: Sequence[str]) -> list[Any]:
+    """Per row, the first of ``candidates`` that is set.
+
+    Ingestion rows share one set of keys, so usually a single candidate is present
+    and the column is read straight through.
+    """
+    keys = set().union(*rows)
+    present = [c for c in candidates if c in keys]
+    if len(present) == 1:
+        name = present[0]
+        return [row.get(name) for row in rows]
+    return [next((row[c] for c in present if row.get(c) is not None), None) for row in rows]
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value or 0.0)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _numbers(values: Sequence[Any]) -> NDArray[np.float64]:
+    """``values`` as floats; unset values are 0 and unparseable ones NaN."""
+    try:
+        out = np.asarray([v or 0.0 for v in values], dtype=np.float64)
+        if out.ndim == 1:
+            return out
+    except (TypeError, ValueError):
+        pass
+    return np.fromiter((_number(v) for v in values), dtype=np.float64, count=len(values))
+
+
+@dataclass(frozen=True, slots=True)
+class CostFrame:
+    """One row per resource, built once from ingestion output.
+
+    Text columns are :class:`Categorical`, so every breakdown is a single
+    ``np.bincount`` over codes instead of a Python loop over resources.
+    """
+
+    resource_id: list[str]
+    resource_name: list[str]
+    resource_type: Categorical
+    location: Categorical
+    category: Categorical
+    period_cost: NDArray[np.float64]
+    period_days: int
+    tags: _Tags
+
+    @classmethod
+    def build(
+        cls,
+        resources: Sequence[Mapping[str, Any]],
+        resource_costs: Mapping[str, ResourceCost],
+        usage_rows: Sequence[Mapping[str, Any]] | None,
+        period_days: int,
+        categorize: Callable[[str], str],
+    ) -> CostFrame:
+        """Usage rows, where they name a resource, take precedence over ``resource_costs``."""
+        ids = [str(r["id"]) for r in resources]
+        position = {rid: i for i, rid in enumerate(ids)}
+        period_cost = np.fromiter(
+            (float(resource_costs.get(rid, {}).get("cost_usd", 0.0)) for rid in ids),
+            dtype=np.float64,
+            count=len(ids),
+        )
+
+        if usage_rows:
+            idx = np.fromiter(
+                (position.get(rid, -1) for rid in _column(usage_rows, _ID_COLUMNS)),
+                dtype=np.intp,
+                count=len(usage_rows),
+            )
+            values = _numbers(_column(usage_rows, _COST_COLUMNS))
+            keep = (idx >= 0) & ~np.isnan(values)
+            usage = np.bincount(idx[keep], weights=values[keep], minlength=len(ids))
+            has_usage = np.bincount(idx[keep], minlength=len(ids)) > 0
+            period_cost = np.where(has_usage, usage, period_cost)
+
+        types = Categorical.encode(str(r.get("type", "")) for r in resources)
+        type_category = [categorize(t) for t in types.labels]
+        category = Categorical.encode(type_category[c] for c in types.codes.tolist())
+
+        tag_rows: list[int] = []
+        tag_keys: list[str] = []
+        tag_values: list[str] = []
+        for i, r in enumerate(resources):
+            for k, v in (r.get("tags") or {}).items():
+                tag_rows.append(i)
+                tag_keys.append(str(k))
+                tag_values.append(str(v))
+
+        return cls(
+            resource_id=ids,
+            resource_name=[str(r.get("name", "")) for r in resources],
+            resource_type=types,
+            location=Categorical.encode(str(r.get("location", "")) for r in resources),
+            category=category,
+            period_cost=period_cost,
+            period_days=max(period_days, 1),
+            tags=_Tags(
+                row=np.asarray(tag_rows, dtype=np.intp),
+                key=Categorical.encode(tag_keys),
+                value=Categorical.encode(tag_values),
+            ),
+        )
+
+    def __len__(self) -> int:
+        return len(self.resource_id)
+
+    @property
+    def daily_cost(self) -> NDArray[np.float64]:
+        return self.period_cost / self.period_days
+
+    @property
+    def monthly_cost(self) -> NDArray[np.float64]:
+        return self.daily_cost * 30.0
+
+    def by_tag(self, key: str, default: str = "unassigned") -> dict[str, float]:
+        """Monthly cost per value of tag ``key``; untagged resources go under ``default``."""
+        labels = self.tags.value.labels
+        per_row = np.full(len(self), len(labels), dtype=np.intp)
+        if default in labels:
+            per_row[:] = labels.index(default)
+        if key in self.tags.key.labels:
+            mask = self.tags.key.codes == self.tags.key.labels.index(key)
+            per_row[self.tags.row[mask]] = self.tags.value.codes[mask]
+        codes, totals = _group_sum(per_row, self.monthly_cost)
+        return {
+            labels[c] if c < len(labels) else default: t for c, t in zip(codes, totals, strict=True)
+        }
+
+    def by_tags(self) -> dict[str, dict[str, float]]:
+        """Monthly cost per tag key and value, for resources carrying that key."""
+        n_values = max(len(self.tags.value.labels), 1)
+        pairs = self.tags.key.codes * n_values + self.tags.value.codes
+        grouped: dict[str, dict[str, float]] = {}
+        for pair, total in zip(*_group_sum(pairs, self.monthly_cost[self.tags.row]), strict=True):
+            key_code, value_code = divmod(pair, n_values)
+            key = self.tags.key.labels[key_code]
+            grouped.setdefault(key, {})[self.tags.value.labels[value_code]] = total
+        return grouped
+
+    def top_k(self, values: NDArray[np.float64], k: int) -> NDArray[np.intp]:
+        """Indices of the ``k`` largest values, descending, ties in row order."""
+        n = len(values)
+        if k <= 0 or n == 0:
+            return np.empty(0, dtype=np.intp)
+        if k < n:
+            threshold = np.partition(values, n - k)[n - k]
+            above = np.flatnonzero(values > threshold)
+            ties = np.flatnonzero(values == threshold)[: k - len(above)]
+            picked = np.concatenate([above, ties])
+        else:
+            picked = np.arange(n)
+        return picked[np.lexsort((picked, -values[picked]))]
@@ -0,0 +1,208 @@
+"""Daily cost history per scope, kept locally and synced incrementally."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Awaitable, Callable, Mapping
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import cache
+from pathlib import Path
+
+from prometheus_client import Counter
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+COST_HISTORY_FETCHES = Counter(
+    "finops_cost_history_fetches_total",
+    "Cost Management queries made to sync the local cost history",
+    ["kind"],
+)
+
+DailyFetch = Callable[[date, date], Awaitable[Mapping[date, float]]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_cost (
+    scope TEXT NOT NULL,
+    day TEXT NOT NULL,
+    cost REAL NOT NULL,
+    PRIMARY KEY (scope, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sync_state (
+    scope TEXT PRIMARY KEY,
+    first_day TEXT NOT NULL,
+    last_day TEXT NOT NULL,
+    refreshed_at REAL NOT NULL
+);
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class CostHistoryConfig:
+    # Unset keeps the history in memory, private to the process. Set it to a file in a
+    # directory the app owns to share the history between workers; the file is created
+    # readable by this user only.
+    path: str = os.getenv("COST_HISTORY_PATH", "")
+    # Costs for the most recent days are still being rated, so they are fetched again
+    # whenever the history is refreshed.
+    settle_days: int = int(os.getenv("COST_HISTORY_SETTLE_DAYS", "3"))
+    refresh_seconds: float = float(os.getenv("COST_HISTORY_REFRESH_SECONDS", "3600"))
+    retention_days: int = int(os.getenv("COST_HISTORY_RETENTION_DAYS", "400"))
+
+
+@dataclass(frozen=True, slots=True)
+class _SyncState:
+    first_day: date
+    last_day: date
+    refreshed_at: float
+
+
+class CostHistoryStore:
+    """Daily cost per scope in SQLite, shared by the workers on a host when on disk.
+
+    Each scope records the contiguous range of days it holds. A read fetches only the
+    days before or after that range, plus the last ``settle_days`` once the previous
+    refresh is ``refresh_seconds`` old, and answers from the local rows. If a fetch
+    fails while local rows exist, those are served instead.
+    """
+
+    def __init__(self, config: CostHistoryConfig | None = None) -> None:
+        self.config = config or CostHistoryConfig()
+        self._conn: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+        self._sync_locks: dict[str, asyncio.Lock] = {}
+
+    async def daily_costs(
+        self, scope: str, start: date, end: date, fetch: DailyFetch
+    ) -> list[tuple[date, float]]:
+        """Cost per day from ``start`` to ``end`` inclusive; days without cost are absent."""
+        async with self._sync_locks.setdefault(scope, asyncio.Lock()):
+            await self._sync(scope, start, end, fetch)
+        return await asyncio.to_thread(self._read, scope, start, end)
+
+    async def _sync(self, scope: str, start: date, end: date, fetch: DailyFetch) -> None:
+        state = await asyncio.to_thread(self._state, scope)
+        for lo, hi, kind in self._missing(state, start, end, time.time()):
+            try:
+                costs = await fetch(lo, hi)
+            except Exception as exc:
+                if state is None:
+                    raise
+                logger.warning("cost_history_sync_failed", scope=scope, kind=kind, error=str(exc))
+                return
+            COST_HISTORY_FETCHES.labels(kind=kind).inc()
+            await asyncio.to_thread(self._write, scope, lo, hi, costs, kind == "refresh")
+            logger.debug("cost_history_synced", scope=scope, kind=kind, start=lo, end=hi)
+
+    def _missing(
+        self, state: _SyncState | None, start: date, end: date, now: float
+    ) -> list[tuple[date, date, str]]:
+        start = max(start, date.today() - timedelta(days=self.config.retention_days))
+        if start > end:
+            return []
+        if state is None:
+            return [(start, end, "refresh")]
+        ranges: list[tuple[date, date, str]] = []
+        if start < state.first_day:
+            ranges.append((start, state.first_day - timedelta(days=1), "backfill"))
+        settled = state.last_day - timedelta(days=self.config.settle_days)
+        stale = now - state.refreshed_at >= self.config.refresh_seconds
+        if end > state.last_day or (stale and end > settled):
+            # Extending from the last synced day keeps the range contiguous.
+            lo = settled + timedelta(days=1) if stale else state.last_day + timedelta(days=1)
+            ranges.append((max(lo, state.first_day), max(end, state.last_day), "refresh"))
+        return ranges
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            path = self.config.path or ":memory:"
+            try:
+                if path != ":memory:":
+                    _prepare_db_file(Path(path))
+                conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+            except (OSError, sqlite3.Error) as exc:
+                logger.warning("cost_history_store_unavailable", path=path, error=str(exc))
+                conn = sqlite3.connect(":memory:", check_same_thread=False)
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _state(self, scope: str) -> _SyncState | None:
+        with self._db_lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT first_day, last_day, refreshed_at FROM sync_state WHERE scope = ?",
+                    (scope,),
+                )
+                .fetchone()
+            )
+        if row is None:
+            return None
+        return _SyncState(date.fromisoformat(row[0]), date.fromisoformat(row[1]), float(row[2]))
+
+    def _read(self, scope: str, start: date, end: date) -> list[tuple[date, float]]:
+        with self._db_lock:
+            rows = (
+                self._connect()
+                .execute(
+                    "SELECT day, cost FROM daily_cost WHERE scope = ? AND day BETWEEN ? AND ?"
+                    " ORDER BY day",
+                    (scope, start.isoformat(), end.isoformat()),
+                )
+                .fetchall()
+            )
+        return [(date.fromisoformat(day), float(cost)) for day, cost in rows]
+
+    def _write(
+        self, scope: str, lo: date, hi: date, costs: Mapping[date, float], refreshed: bool
+    ) -> None:
+        """Replace the days ``lo``..``hi`` of ``scope`` and widen its synced range."""
+        cutoff = (date.today() - timedelta(days=self.config.retention_days)).isoformat()
+        rows = [(scope, d.isoformat(), float(c)) for d, c in costs.items() if lo <= d <= hi]
+        refreshed_at = time.time() if refreshed else 0.0
+        with self._db_lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "DELETE FROM daily_cost WHERE scope = ? AND day BETWEEN ? AND ?",
+                    (scope, lo.isoformat(), hi.isoformat()),
+                )
+                conn.executemany("INSERT INTO daily_cost VALUES (?, ?, ?)", rows)
+                conn.execute(
+                    "INSERT INTO sync_state VALUES (?, ?, ?, ?) ON CONFLICT(scope) DO UPDATE SET"
+                    " first_day = MIN(first_day, excluded.first_day),"
+                    " last_day = MAX(last_day, excluded.last_day),"
+                    " refreshed_at = MAX(refreshed_at, excluded.refreshed_at)",
+                    (scope, lo.isoformat(), hi.isoformat(), refreshed_at),
+                )
+                conn.execute("DELETE FROM daily_cost WHERE scope = ? AND day < ?", (scope, cutoff))
+                conn.execute(
+                    "UPDATE sync_state SET first_day = MAX(first_day, ?) WHERE scope = ?",
+                    (cutoff, scope),
+                )
+
+
+def _prepare_db_file(path: Path) -> None:
+    """Create ``path`` readable by this user only; refuse one owned by another user."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0), 0o600)
+    try:
+        owner = os.fstat(fd).st_uid
+    finally:
+        os.close(fd)
+    if hasattr(os, "getuid") and owner != os.getuid():
+        raise PermissionError(f"{path} is owned by another user")
+
+
+@cache
+def get_cost_history_store() -> CostHistoryStore:
+    """Process-wide store; with ``COST_HISTORY_PATH`` set, workers share its rows."""
+    return CostHistoryStore()
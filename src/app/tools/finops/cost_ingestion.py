@@ -2,10 +2,12 @@ from __future__ import annotations
 
 import asyncio
 import re
+from collections import OrderedDict
 from datetime import date, datetime, timedelta
-from typing import Any, NotRequired, TypedDict, cast
+from typing import TYPE_CHECKING, Any, NotRequired, TypedDict, cast
 
-from azure.core.exceptions import AzureError
+from azure.core.exceptions import AzureError, HttpResponseError
+from azure.core.rest import HttpRequest
 from azure.mgmt.consumption import ConsumptionManagementClient
 from azure.mgmt.consumption.models import Budget, BudgetTimePeriod
 from azure.mgmt.costmanagement import CostManagementClient
@@ -27,6 +29,7 @@ from azure.mgmt.costmanagement.models import (
     QueryDefinition,
     QueryFilter,
     QueryGrouping,
+    QueryResult,
     QueryTimePeriod,
     TimeframeType,
 )
@@ -34,6 +37,9 @@ from azure.mgmt.costmanagement.models import (
 from app.core.azure_auth import build_credential
 from app.core.exceptions import ExternalServiceException, retry_on_error
 
+if TYPE_CHECKING:
+    from app.tools.finops.bulk_costs import BulkCostEngine
+
 
 class ResourceCost(TypedDict, total=False):
     cost: float
@@ -62,8 +68,10 @@ class CostIngestionService:
         self._cost_client: CostManagementClient | None = None
         self._consumption_client: ConsumptionManagementClient | None = None
         self._consumption_client_sub_id: str | None = None
-        self._cache: dict[str, tuple[list[dict[str, Any]], float]] = {}
+        self._cache: OrderedDict[str, tuple[list[dict[str, Any]], float]] = OrderedDict()
         self._cache_ttl: float = 3600.0
+        self._cache_max_entries: int = 256
+        self._bulk_engine: BulkCostEngine | None = None
 
     def _get_cost_client(self) -> CostManagementClient:
         if self._cost_client is None:
@@ -99,7 +107,9 @@ class CostIngestionService:
         if cache_key in self._cache:
             cached_data, cached_time = self._cache[cache_key]
             if time.time() - cached_time < self._cache_ttl:
+                self._cache.move_to_end(cache_key)
                 return cached_data
+            del self._cache[cache_key]
         client = self._get_cost_client()
         dataset = QueryDataset(
             granularity=granularity,
@@ -126,20 +136,36 @@ class CostIngestionService:
         )
         try:
             result = await asyncio.to_thread(client.query.usage, scope, query_def)
-            usage_data: list[dict[str, Any]] = []
-            if result and result.rows:
-                columns: list[str] = []
-                if result.columns:
-                    for i, col in enumerate(result.columns):
-                        name = getattr(col, "name", None)
-                        columns.append(name if isinstance(name, str) and name else f"col_{i}")
-                for row in result.rows:
-                    usage_data.append(dict(zip(columns, row, strict=False)))
+            usage_data = self._query_rows(result)
+            # Large grouped queries are split into pages; follow them all.
+            while result is not None and result.next_link:
+                request = HttpRequest("POST", result.next_link, json=query_def.as_dict())
+                result = await asyncio.to_thread(self._query_page, request)
+                usage_data.extend(self._query_rows(result))
             self._cache[cache_key] = (usage_data, time.time())
+            while len(self._cache) > self._cache_max_entries:
+                self._cache.popitem(last=False)
             return usage_data
         except AzureError as e:
             raise ExternalServiceException(f"Failed to get usage details: {e}") from e
 
+    def _query_page(self, request: HttpRequest) -> QueryResult:
+        response = self._get_cost_client().send_request(request)
+        if response.status_code >= 400:
+            raise HttpResponseError(response=response)
+        return QueryResult(response.json())
+
+    @staticmethod
+    def _query_rows(result: QueryResult | None) -> list[dict[str, Any]]:
+        if not result or not result.rows:
+            return []
+        columns: list[str] = []
+        if result.columns:
+            for i, col in enumerate(result.columns):
+                name = getattr(col, "name", None)
+                columns.append(name if isinstance(name, str) and name else f"col_{i}")
+        return [dict(zip(columns, row, strict=False)) for row in result.rows]
+
     async def get_resource_costs(
         self,
         scope: str,
@@ -147,53 +173,17 @@ class CostIngestionService:
         start_date: datetime,
         end_date: datetime,
     ) -> dict[str, ResourceCost]:
-        client = self._get_cost_client()
-        resource_costs: dict[str, ResourceCost] = {}
-        for resource_id in resource_ids:
-            dataset = QueryDataset(
-                granularity="None",
-                aggregation={
-                    "totalCost": QueryAggregation(name="PreTaxCost", function="Sum"),
-                    "totalCostUSD": QueryAggregation(name="PreTaxCostUSD", function="Sum"),
-                },
-                filter=QueryFilter(
-                    dimensions=QueryComparisonExpression(
-                        name="ResourceId",
-                        operator="In",
-                        values=[resource_id],
-                    )
-                ),
-            )
-            query_def = QueryDefinition(
-                type="ActualCost",
-                timeframe=TimeframeType.CUSTOM,
-                time_period=QueryTimePeriod(from_property=start_date, to=end_date),
-                dataset=dataset,
-            )
-            try:
-                result = await asyncio.to_thread(client.query.usage, scope, query_def)
-                if result and result.rows and len(result.rows) > 0:
-                    cost_row = result.rows[0]
-                    resource_costs[resource_id] = {
-                        "cost": float(cost_row[0]) if len(cost_row) > 0 else 0.0,
-                        "cost_usd": float(cost_row[1]) if len(cost_row) > 1 else 0.0,
-                        "currency": "USD",
-                    }
-                else:
-                    resource_costs[resource_id] = {
-                        "cost": 0.0,
-                        "cost_usd": 0.0,
-                        "currency": "USD",
-                    }
-            except AzureError:
-                resource_costs[resource_id] = {
-                    "cost": 0.0,
-                    "cost_usd": 0.0,
-                    "currency": "USD",
-                    "error": "Failed to retrieve cost",
-                }
-            await asyncio.sleep(0.1)
-        return resource_costs
+        """Costs per resource from grouped queries; see :class:`BulkCostEngine`."""
+        return await self._get_bulk_engine().resource_costs(
+            scope, resource_ids, start_date, end_date
+        )
+
+    def _get_bulk_engine(self) -> BulkCostEngine:
+        if self._bulk_engine is None:
+            from app.tools.finops.bulk_costs import BulkCostEngine
+
+            self._bulk_engine = BulkCostEngine(self._get_cost_client())
+        return self._bulk_engine
 
     async def get_forecast(
         self,
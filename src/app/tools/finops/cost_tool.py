@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+from collections.abc import Mapping
 from datetime import datetime, timedelta
 from typing import Any
 
@@ -18,6 +19,7 @@ class ParsingError(ValueError):
 
 class AzureCosts(Tool):
     name = "azure_costs"
+    side_effects = False
     description = (
         "Analyze Azure resource costs, detect anomalies, create budgets, and suggest optimizations."
     )
@@ -51,6 +53,11 @@ class AzureCosts(Tool):
         self.analyzer = CostAnalyzer()
         self.cms = CostManagementSystem()
 
+    def has_side_effects(self, args: Mapping[str, Any]) -> bool:
+        # budget_status with an amount creates or updates the monthly budget.
+        action = str(args.get("action") or "").lower()
+        return action == "budget_status" and args.get("amount") is not None
+
     async def run(self, **kwargs: Any) -> ToolResult:
         act = (kwargs.get("action") or "").lower()
 
@@ -3,6 +3,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from datetime import date as date_type
 from datetime import datetime, timedelta
+from datetime import time as time_type
+from functools import partial
 from statistics import NormalDist
 from typing import Any, Protocol, TypedDict
 
@@ -11,6 +13,9 @@ from numpy.typing import NDArray
 from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import PolynomialFeatures
 
+from app.tools.finops.batch_forecast import BatchForecaster
+from app.tools.finops.cost_frame import Categorical
+from app.tools.finops.cost_history import get_cost_history_store
 from app.tools.finops.cost_ingestion import CostIngestionService
 
 # Constants for magic values
@@ -36,11 +41,29 @@ MODERATE_DEVIATION_THRESHOLD = 20.0
 AGGRESSIVE_OPTIMIZATION_THRESHOLD = 20.0
 BALANCED_OPTIMIZATION_THRESHOLD = 10.0
 
+_USAGE_COST_COLUMNS = ("totalCost", "PreTaxCost", "Cost")
+
 
 def _z_score(confidence_level: float) -> float:
     return float(NormalDist().inv_cdf((1.0 + confidence_level) / 2.0))
 
 
+def _usage_cost(item: dict[str, Any]) -> float:
+    """Cost of a usage row, named after the query's aggregation alias or its source column."""
+    for name in _USAGE_COST_COLUMNS:
+        value = item.get(name)
+        if value is not None:
+            return float(value)
+    return 0.0
+
+
+def _usage_date(item: dict[str, Any]) -> date_type | None:
+    date_str = item.get("UsageDate", item.get("Date", ""))
+    if not date_str:
+        return None
+    return datetime.fromisoformat(str(date_str).replace("Z", "+00:00")).date()
+
+
 class ForecastModel(Protocol):
     """Protocol for forecasting models."""
 
@@ -101,6 +124,7 @@ class ImpactAnalysisDict(TypedDict):
 class ForecastingService:
     def __init__(self) -> None:
         self.cost_ingestion = CostIngestionService()
+        self.cost_history = get_cost_history_store()
 
     async def forecast_costs(
         self,
@@ -152,6 +176,66 @@ class ForecastingService:
             model_accuracy=accuracy,
         )
 
+    async def forecast_costs_by(
+        self,
+        subscription_id: str,
+        dimension: str,
+        days: int = 90,
+        forecast_days: int = 30,
+        confidence_level: float = 0.95,
+        anomaly_sensitivity: float = 2.0,
+    ) -> dict[str, dict[str, Any]]:
+        """Forecast every value of ``dimension`` (e.g. ``ResourceGroupName``) in one batch."""
+        end = datetime.utcnow().date()
+        start = end - timedelta(days=days)
+        usage_data = await self.cost_ingestion.get_usage_details(
+            f"/subscriptions/{subscription_id}",
+            datetime.combine(start, time_type.min),
+            datetime.combine(end, time_type(23, 59, 59)),
+            granularity="Daily",
+            group_by=[dimension],
+        )
+        rows = [(item, day) for item in usage_data if (day := _usage_date(item)) is not None]
+        if not rows:
+            return {}
+
+        names = Categorical.encode(str(item.get(dimension) or "unassigned") for item, _ in rows)
+        day_index = np.fromiter(
+            ((day - start).days for _, day in rows), dtype=np.intp, count=len(rows)
+        )
+        costs = np.fromiter(
+            (_usage_cost(item) for item, _ in rows), dtype=np.float64, count=len(rows)
+        )
+        n_days = days + 1
+        keep = (day_index >= 0) & (day_index < n_days)
+        series = np.bincount(
+            names.codes[keep] * n_days + day_index[keep],
+            weights=costs[keep],
+            minlength=len(names.labels) * n_days,
+        ).reshape(len(names.labels), n_days)
+
+        forecaster = BatchForecaster(
+            confidence_level=confidence_level, anomaly_z=anomaly_sensitivity
+        )
+        result = forecaster.fit(series, forecast_days)
+        anomaly_rows, anomaly_days = np.nonzero(result.anomalies)
+        anomaly_dates: dict[int, list[str]] = {}
+        for i, d in zip(anomaly_rows.tolist(), anomaly_days.tolist(), strict=True):
+            anomaly_dates.setdefault(i, []).append((start + timedelta(days=d)).isoformat())
+
+        return {
+            name: {
+                "predicted_cost": float(result.total[i]),
+                "confidence_interval": (float(result.lower[i]), float(result.upper[i])),
+                "confidence_level": confidence_level,
+                "trend": str(result.trend[i]),
+                "seasonality_detected": bool(result.seasonal[i]),
+                "model_accuracy": float(result.r2[i]),
+                "anomaly_dates": anomaly_dates.get(i, []),
+            }
+            for i, name in enumerate(names.labels)
+        }
+
     async def detect_cost_anomalies(
         self,
         subscription_id: str,
@@ -416,40 +500,42 @@ class ForecastingService:
         subscription_id: str,
         days: int,
     ) -> list[dict[str, Any]]:
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
+        end = datetime.utcnow().date()
+        history = await self._daily_costs(subscription_id, end - timedelta(days=days), end)
+        return [
+            {"date": datetime.combine(d, datetime.min.time()), "cost": cost} for d, cost in history
+        ]
+
+    async def _get_current_month_cost(self, subscription_id: str) -> float:
+        end = datetime.utcnow().date()
+        history = await self._daily_costs(subscription_id, end.replace(day=1), end)
+        return float(sum(cost for _, cost in history))
+
+    async def _daily_costs(
+        self, subscription_id: str, start: date_type, end: date_type
+    ) -> list[tuple[date_type, float]]:
         scope = f"/subscriptions/{subscription_id}"
+        return await self.cost_history.daily_costs(
+            scope, start, end, partial(self._fetch_daily_costs, scope)
+        )
+
+    async def _fetch_daily_costs(
+        self, scope: str, start: date_type, end: date_type
+    ) -> dict[date_type, float]:
         usage_data = await self.cost_ingestion.get_usage_details(
             scope,
-            start_date,
-            end_date,
+            datetime.combine(start, time_type.min),
+            datetime.combine(end, time_type(23, 59, 59)),
             granularity="Daily",
         )
         daily_costs: dict[date_type, float] = {}
         for item in usage_data:
-            date_str = item.get("UsageDate", item.get("Date", ""))
-            if not date_str:
+            dkey = _usage_date(item)
+            if dkey is None:
                 continue
-            dt = datetime.fromisoformat(str(date_str).replace("Z", "+00:00"))
-            dkey: date_type = dt.date()
-            cost = float(item.get("Cost", 0))
+            cost = _usage_cost(item)
             daily_costs[dkey] = daily_costs.get(dkey, 0.0) + cost
-        return [
-            {"date": datetime.combine(d, datetime.min.time()), "cost": cost}
-            for d, cost in sorted(daily_costs.items())
-        ]
-
-    async def _get_current_month_cost(self, subscription_id: str) -> float:
-        now = datetime.utcnow()
-        start_date = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        scope = f"/subscriptions/{subscription_id}"
-        usage_data = await self.cost_ingestion.get_usage_details(
-            scope,
-            start_date,
-            now,
-            granularity="None",
-        )
-        return float(sum(float(item.get("Cost", 0)) for item in usage_data))
+        return daily_costs
 
     async def _get_current_costs_by_resource_type(
         self,
@@ -468,7 +554,7 @@ class ForecastingService:
         costs_by_type: dict[str, float] = {}
         for item in usage_data:
             resource_type = str(item.get("ResourceType", "Unknown"))
-            cost = float(item.get("Cost", 0))
+            cost = _usage_cost(item)
             costs_by_type[resource_type] = costs_by_type.get(resource_type, 0.0) + cost
         return costs_by_type
 
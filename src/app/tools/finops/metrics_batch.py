@@ -0,0 +1,341 @@
+"""Azure Monitor metrics for many resources, batched, bounded and cached."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict, defaultdict
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+from azure.core.exceptions import AzureError
+from numpy.typing import NDArray
+from prometheus_client import Counter
+
+from app.core.logging import get_logger
+
+if TYPE_CHECKING:
+    from app.tools.finops.resource_discovery import ResourceDiscoveryService
+
+logger = get_logger(__name__)
+
+METRICS_REQUESTS = Counter(
+    "finops_metrics_requests_total", "Azure Monitor metrics requests", ["mode", "outcome"]
+)
+METRICS_CACHE = Counter("finops_metrics_cache_total", "Metrics cache lookups", ["result"])
+
+_AGGREGATIONS = ("average", "minimum", "maximum", "total", "count")
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)([DHMS])")
+_METRIC_ID_SUFFIX = "/providers/microsoft.insights/metrics/"
+
+
+def _metrics_client_class() -> Any:
+    """``MetricsClient``, the multi-resource batch API, if installed.
+
+    ``azure-monitor-querymetrics`` ships it now; ``azure-monitor-query`` 1.x had it before
+    it was split out.
+    """
+    try:
+        from azure.monitor.querymetrics import MetricsClient  # type: ignore[import-untyped,import-not-found,unused-ignore]
+    except ImportError:
+        try:
+            from azure.monitor.query import MetricsClient  # type: ignore[import-untyped,import-not-found,unused-ignore,no-redef]
+        except ImportError:
+            return None
+    return MetricsClient
+
+
+def _result_resource_id(result: Any) -> str | None:
+    """Lower-cased resource id of a batch result, read from its metric ids.
+
+    ``MetricsQueryResult`` does not carry the resource id itself; each metric id is the
+    resource id followed by ``/providers/Microsoft.Insights/metrics/<name>``.
+    """
+    for metric in getattr(result, "metrics", None) or []:
+        head, sep, _ = str(getattr(metric, "id", None) or "").lower().partition(_METRIC_ID_SUFFIX)
+        if sep:
+            return head
+    return None
+
+
+def _timespan_delta(timespan: str) -> timedelta:
+    """Length of an ISO-8601 duration such as ``PT1H`` or ``P7D`` (``PT7D`` is accepted)."""
+    units = {"D": "days", "H": "hours", "M": "minutes", "S": "seconds"}
+    parts = _DURATION_PART.findall(timespan.upper())
+    if not parts:
+        raise ValueError(f"Unsupported metrics timespan: {timespan}")
+    return timedelta(**{units[unit]: float(value) for value, unit in parts})
+
+
+@dataclass(frozen=True, slots=True)
+class MetricsBatchConfig:
+    max_concurrency: int = int(os.getenv("FINOPS_METRICS_MAX_CONCURRENCY", "8"))
+    # The batch API takes at most 50 resources, all of one type and region, per call.
+    batch_size: int = int(os.getenv("FINOPS_METRICS_BATCH_SIZE", "50"))
+    use_batch_api: bool = os.getenv("FINOPS_METRICS_BATCH_API", "1").lower() in {"1", "true", "yes"}
+    cache_ttl_seconds: float = float(os.getenv("FINOPS_METRICS_CACHE_TTL_SECONDS", "900"))
+    # Failed fetches are remembered briefly so a throttled resource is not asked again
+    # straight away, e.g. by the per-resource analyses that follow a warm-up.
+    failure_ttl_seconds: float = float(os.getenv("FINOPS_METRICS_FAILURE_TTL_SECONDS", "60"))
+    cache_max_entries: int = int(os.getenv("FINOPS_METRICS_CACHE_MAX_ENTRIES", "20000"))
+
+
+@dataclass(frozen=True, slots=True)
+class MetricSeries:
+    """Datapoints of one metric; aggregations a datapoint lacks are NaN."""
+
+    timestamps: NDArray[np.float64]  # epoch seconds
+    average: NDArray[np.float64]
+    minimum: NDArray[np.float64]
+    maximum: NDArray[np.float64]
+    total: NDArray[np.float64]
+    count: NDArray[np.float64]
+
+    @classmethod
+    def from_datapoints(cls, datapoints: Sequence[Any]) -> MetricSeries:
+        n = len(datapoints)
+
+        def column(name: str) -> NDArray[np.float64]:
+            values = (getattr(p, name, None) for p in datapoints)
+            return np.fromiter(
+                (np.nan if v is None else float(v) for v in values), dtype=np.float64, count=n
+            )
+
+        stamps = (
+            getattr(p, "timestamp", None) or getattr(p, "time_stamp", None) for p in datapoints
+        )
+        timestamps = np.fromiter(
+            (s.timestamp() if isinstance(s, datetime) else np.nan for s in stamps),
+            dtype=np.float64,
+            count=n,
+        )
+        return cls(timestamps, *(column(a) for a in _AGGREGATIONS))
+
+    @classmethod
+    def empty(cls) -> MetricSeries:
+        return cls.from_datapoints([])
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+
+class MetricsBatchService:
+    """Metrics for many resources with as few Monitor calls as possible.
+
+    Resources are grouped by region and type and fetched up to ``batch_size`` at a time
+    through the metrics batch API when ``azure-monitor-querymetrics`` is installed. Otherwise,
+    or when a batch call fails, each resource is fetched with the management API. Either
+    way at most ``max_concurrency`` calls are in flight. Results are cached per resource,
+    metric and timespan for ``cache_ttl_seconds``; resources whose fetch failed get empty
+    series for ``failure_ttl_seconds``.
+    """
+
+    def __init__(
+        self,
+        discovery: ResourceDiscoveryService,
+        config: MetricsBatchConfig | None = None,
+    ) -> None:
+        self.config = config or MetricsBatchConfig()
+        self._discovery = discovery
+        self._semaphore = asyncio.Semaphore(self.config.max_concurrency)
+        self._cache: OrderedDict[tuple[str, str, str], tuple[float, MetricSeries]] = OrderedDict()
+        self._batch_clients: dict[str, Any] = {}
+        self._batch_client_class: Any = (
+            _metrics_client_class() if self.config.use_batch_api else None
+        )
+
+    async def get_metrics(
+        self,
+        subscription_id: str,
+        resources: Iterable[Mapping[str, Any]],
+        metric_names: Sequence[str],
+        timespan: str = "PT1H",
+    ) -> dict[str, dict[str, MetricSeries]]:
+        """Series per resource id and metric name; unavailable metrics are empty series."""
+        out: dict[str, dict[str, MetricSeries]] = {}
+        missing: list[Mapping[str, Any]] = []
+        now = time.monotonic()
+        for resource in resources:
+            rid = str(resource["id"])
+            cached = self._cached(rid, metric_names, timespan, now)
+            if cached is None:
+                missing.append(resource)
+            else:
+                out[rid] = cached
+        METRICS_CACHE.labels(result="hit").inc(len(out))
+        METRICS_CACHE.labels(result="miss").inc(len(missing))
+
+        if missing:
+            fetched = await self._fetch(subscription_id, missing, metric_names, timespan)
+            now = time.monotonic()
+            for resource in missing:
+                rid = str(resource["id"])
+                got = fetched.get(rid.lower(), {})
+                out[rid] = {name: got.get(name, MetricSeries.empty()) for name in metric_names}
+                ttl = (
+                    self.config.cache_ttl_seconds
+                    if rid.lower() in fetched
+                    else self.config.failure_ttl_seconds
+                )
+                self._store(rid, out[rid], timespan, now + ttl)
+        return out
+
+    async def resource_metrics(
+        self,
+        subscription_id: str,
+        resource: Mapping[str, Any],
+        metric_names: Sequence[str],
+        timespan: str = "PT1H",
+    ) -> dict[str, MetricSeries]:
+        found = await self.get_metrics(subscription_id, [resource], metric_names, timespan)
+        return found[str(resource["id"])]
+
+    def _cached(
+        self, rid: str, metric_names: Sequence[str], timespan: str, now: float
+    ) -> dict[str, MetricSeries] | None:
+        found: dict[str, MetricSeries] = {}
+        for name in metric_names:
+            key = (rid.lower(), name, timespan)
+            entry = self._cache.get(key)
+            if entry is None or entry[0] <= now:
+                return None
+            self._cache.move_to_end(key)
+            found[name] = entry[1]
+        return found
+
+    def _store(
+        self, rid: str, series: Mapping[str, MetricSeries], timespan: str, expires: float
+    ) -> None:
+        for name, values in series.items():
+            key = (rid.lower(), name, timespan)
+            self._cache[key] = (expires, values)
+            self._cache.move_to_end(key)
+        while len(self._cache) > self.config.cache_max_entries:
+            self._cache.popitem(last=False)
+
+    async def _fetch(
+        self,
+        subscription_id: str,
+        resources: Sequence[Mapping[str, Any]],
+        metric_names: Sequence[str],
+        timespan: str,
+    ) -> dict[str, dict[str, MetricSeries]]:
+        """Fetched series keyed by lower-cased resource id; failed resources are absent."""
+        singles: list[str] = []
+        groups: dict[tuple[str, str], list[str]] = defaultdict(list)
+        for resource in resources:
+            rid = str(resource["id"])
+            location = str(resource.get("location") or "").replace(" ", "").lower()
+            rtype = str(resource.get("type") or "")
+            if self._batch_client_class is not None and location and rtype:
+                groups[(location, rtype)].append(rid)
+            else:
+                singles.append(rid)
+
+        size = max(self.config.batch_size, 1)
+        jobs = [
+            self._fetch_batch(
+                subscription_id, location, rtype, ids[i : i + size], metric_names, timespan
+            )
+            for (location, rtype), ids in groups.items()
+            for i in range(0, len(ids), size)
+        ]
+        jobs.extend(
+            self._fetch_one(subscription_id, rid, metric_names, timespan) for rid in singles
+        )
+        out: dict[str, dict[str, MetricSeries]] = {}
+        for found in await asyncio.gather(*jobs):
+            out.update(found)
+        return out
+
+    async def _fetch_batch(
+        self,
+        subscription_id: str,
+        location: str,
+        rtype: str,
+        resource_ids: list[str],
+        metric_names: Sequence[str],
+        timespan: str,
+    ) -> dict[str, dict[str, MetricSeries]]:
+        try:
+            client = self._batch_client(location)
+            async with self._semaphore:
+                results = await asyncio.to_thread(
+                    client.query_resources,
+                    resource_ids=resource_ids,
+                    metric_namespace=rtype,
+                    metric_names=list(metric_names),
+                    timespan=_timespan_delta(timespan),
+                )
+        except (AzureError, ValueError) as exc:
+            METRICS_REQUESTS.labels(mode="batch", outcome="error").inc()
+            logger.warning(
+                "finops_metrics_batch_failed", location=location, type=rtype, error=str(exc)
+            )
+            found = await asyncio.gather(
+                *(
+                    self._fetch_one(subscription_id, rid, metric_names, timespan)
+                    for rid in resource_ids
+                )
+            )
+            return {k: v for f in found for k, v in f.items()}
+        METRICS_REQUESTS.labels(mode="batch", outcome="ok").inc()
+        # One result per requested id, in request order. The metric ids name the resource
+        # as well; when they do, they win over the position.
+        requested = {rid.lower() for rid in resource_ids}
+        out: dict[str, dict[str, MetricSeries]] = {}
+        for rid, result in zip(resource_ids, results or [], strict=False):
+            key = _result_resource_id(result)
+            if key not in requested:
+                key = rid.lower()
+            out[key] = self._parse(result)
+        return out
+
+    async def _fetch_one(
+        self,
+        subscription_id: str,
+        resource_id: str,
+        metric_names: Sequence[str],
+        timespan: str,
+    ) -> dict[str, dict[str, MetricSeries]]:
+        monitor_client = self._discovery._get_monitor_client(subscription_id)
+        try:
+            async with self._semaphore:
+                result = await asyncio.to_thread(
+                    monitor_client.metrics.list,
+                    resource_id,
+                    timespan=timespan,
+                    metricnames=",".join(metric_names),
+                )
+        except AzureError as exc:
+            METRICS_REQUESTS.labels(mode="single", outcome="error").inc()
+            logger.warning("finops_metrics_fetch_failed", resource_id=resource_id, error=str(exc))
+            return {}
+        METRICS_REQUESTS.labels(mode="single", outcome="ok").inc()
+        return {resource_id.lower(): self._parse(result)}
+
+    def _batch_client(self, location: str) -> Any:
+        if location not in self._batch_clients:
+            self._batch_clients[location] = self._batch_client_class(
+                f"https://{location}.metrics.monitor.azure.com",
+                self._discovery._credential,
+            )
+        return self._batch_clients[location]
+
+    @staticmethod
+    def _parse(result: Any) -> dict[str, MetricSeries]:
+        """Series per metric name from a batch ``MetricsQueryResult`` or a ``Response``."""
+        series: dict[str, MetricSeries] = {}
+        for metric in getattr(result, "metrics", None) or getattr(result, "value", None) or []:
+            name = getattr(metric, "name", None)
+            name = getattr(name, "value", name) or "unknown"
+            points = [
+                p for ts in getattr(metric, "timeseries", None) or [] for p in (ts.data or [])
+            ]
+            series[str(name)] = MetricSeries.from_datapoints(points)
+        return series
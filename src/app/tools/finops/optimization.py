@@ -6,9 +6,15 @@ from datetime import datetime, timedelta
 from enum import Enum
 from typing import Any
 
+import numpy as np
+
 from app.tools.finops.cost_ingestion import CostIngestionService, ResourceCost
+from app.tools.finops.metrics_batch import MetricsBatchService
 from app.tools.finops.resource_discovery import ResourceDiscoveryService
 
+VM_METRICS = ["Percentage CPU", "Available Memory Bytes", "Disk Read Bytes", "Disk Write Bytes"]
+SQL_METRICS = ["cpu_percent", "dtu_consumption_percent", "storage_percent"]
+
 
 class OptimizationStrategy(Enum):
     AGGRESSIVE = "aggressive"
@@ -36,6 +42,7 @@ class OptimizationService:
     def __init__(self) -> None:
         self.discovery: ResourceDiscoveryService = ResourceDiscoveryService()
         self.cost_ingestion: CostIngestionService = CostIngestionService()
+        self.metrics: MetricsBatchService = MetricsBatchService(self.discovery)
 
     async def analyze_optimization_opportunities(
         self,
@@ -58,11 +65,29 @@ class OptimizationService:
 
         recommendations: list[OptimizationRecommendation] = []
 
-        tasks = [
-            self._analyze_vm_optimization(subscription_id, r, costs.get(r["id"], {}), strategy)
+        vms = [
+            r
             for r in resources
             if r["type"].lower().startswith("microsoft.compute/virtualmachines")
         ]
+        databases = [
+            r for r in resources if "sql" in r["type"].lower() or "database" in r["type"].lower()
+        ]
+        # Warm the metrics cache in batches so the per-resource analyses below hit it.
+        await asyncio.gather(
+            self.metrics.get_metrics(subscription_id, vms, VM_METRICS, "PT7D"),
+            self.metrics.get_metrics(
+                subscription_id,
+                [r for r in databases if "sql" in r["type"].lower()],
+                SQL_METRICS,
+                "PT7D",
+            ),
+        )
+
+        tasks = [
+            self._analyze_vm_optimization(subscription_id, r, costs.get(r["id"], {}), strategy)
+            for r in vms
+        ]
         tasks.extend(
             [
                 self._analyze_storage_optimization(
@@ -84,8 +109,7 @@ class OptimizationService:
                 self._analyze_database_optimization(
                     subscription_id, r, costs.get(r["id"], {}), strategy
                 )
-                for r in resources
-                if "sql" in r["type"].lower() or "database" in r["type"].lower()
+                for r in databases
             ]
         )
 
@@ -110,18 +134,13 @@ class OptimizationService:
         resource_id = resource["id"]
         monthly_cost = cost_info.get("cost_usd", 0.0)
 
-        metrics = await self.discovery.get_resource_metrics(
-            subscription_id,
-            resource_id,
-            ["Percentage CPU", "Available Memory Bytes", "Disk Read Bytes", "Disk Write Bytes"],
-            "PT7D",
-        )
+        metrics = await self.metrics.resource_metrics(subscription_id, resource, VM_METRICS, "PT7D")
 
-        cpu_metrics = metrics.get("Percentage CPU", [])
-        if cpu_metrics:
-            valid = [m["average"] for m in cpu_metrics if m.get("average") is not None]
-            if valid:
-                avg_cpu = sum(valid) / len(valid)
+        cpu_metrics = metrics.get("Percentage CPU")
+        if cpu_metrics is not None:
+            valid = cpu_metrics.average[~np.isnan(cpu_metrics.average)]
+            if valid.size:
+                avg_cpu = float(valid.mean())
 
                 if 5 < avg_cpu < 20:
                     recommendations.append(
@@ -357,18 +376,15 @@ class OptimizationService:
         monthly_cost = cost_info.get("cost_usd", 0.0)
 
         if "sql" in resource["type"].lower():
-            metrics = await self.discovery.get_resource_metrics(
-                subscription_id,
-                resource_id,
-                ["cpu_percent", "dtu_consumption_percent", "storage_percent"],
-                "PT7D",
+            metrics = await self.metrics.resource_metrics(
+                subscription_id, resource, SQL_METRICS, "PT7D"
             )
 
-            cpu_metrics = metrics.get("cpu_percent", [])
-            if cpu_metrics:
-                valid = [m["average"] for m in cpu_metrics if m.get("average") is not None]
-                if valid:
-                    avg_cpu = sum(valid) / len(valid)
+            cpu_metrics = metrics.get("cpu_percent")
+            if cpu_metrics is not None:
+                valid = cpu_metrics.average[~np.isnan(cpu_metrics.average)]
+                if valid.size:
+                    avg_cpu = float(valid.mean())
 
                     if avg_cpu < 20:
                         recommendations.append(
@@ -4,7 +4,7 @@ import asyncio
 import importlib
 import shutil
 import subprocess
-from collections.abc import Sequence
+from collections.abc import Callable, Sequence
 
 from app.core.logging import get_logger
 from app.tools.base import Tool, ToolResult
@@ -13,10 +13,18 @@ logger = get_logger(__name__)
 
 _TOOLS: dict[str, Tool] = {}
 _LOADED = False
+_LISTENERS: list[Callable[[], None]] = []
 
 
 def register(tool: Tool) -> None:
     _TOOLS[tool.name] = tool
+    for listener in _LISTENERS:
+        listener()
+
+
+def add_registry_listener(listener: Callable[[], None]) -> None:
+    """Call ``listener`` whenever a tool is registered, e.g. to drop derived caches."""
+    _LISTENERS.append(listener)
 
 
 def list_tools() -> list[Tool]:
@@ -99,4 +107,11 @@ async def run_cmd(
         return {"ok": False, "summary": "timeout", "output": out}
 
 
-__all__ = ["ensure_tools_loaded", "get_tool", "list_tools", "register", "run_cmd"]
+__all__ = [
+    "add_registry_listener",
+    "ensure_tools_loaded",
+    "get_tool",
+    "list_tools",
+    "register",
+    "run_cmd",
+]
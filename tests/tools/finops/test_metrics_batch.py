@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import pytest
+
+from app.tools.finops.metrics_batch import MetricsBatchConfig, MetricsBatchService
+
+sdk = pytest.importorskip("azure.monitor.querymetrics")
+
+SUBSCRIPTION = "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg"
+VM_TYPE = "Microsoft.Compute/virtualMachines"
+
+
+def _vm(name: str) -> dict[str, Any]:
+    return {
+        "id": f"{SUBSCRIPTION}/providers/{VM_TYPE}/{name}",
+        "location": "West Europe",
+        "type": VM_TYPE,
+    }
+
+
+def _result(resource_id: str, metric_name: str, cpu: float) -> Any:
+    start = datetime(2026, 1, 1, tzinfo=UTC)
+    points = [
+        sdk.MetricValue(timestamp=start + timedelta(minutes=i), average=cpu) for i in range(3)
+    ]
+    metric = sdk.Metric(
+        id=f"{resource_id}/providers/Microsoft.Insights/metrics/{metric_name}",
+        type="Microsoft.Insights/metrics",
+        name=metric_name,
+        unit="Percent",
+        timeseries=[sdk.TimeSeriesElement(data=points)],
+        display_description="",
+    )
+    return sdk.MetricsQueryResult(timespan="PT1H", metrics=[metric])
+
+
+class _MetricsClient:
+    """Stand-in for ``MetricsClient`` that answers with SDK result objects."""
+
+    calls: list[list[str]] = []
+
+    def __init__(self, endpoint: str, credential: Any) -> None:
+        self.endpoint = endpoint
+
+    def query_resources(
+        self,
+        *,
+        resource_ids: Sequence[str],
+        metric_namespace: str,
+        metric_names: Sequence[str],
+        timespan: timedelta,
+    ) -> list[Any]:
+        self.calls.append(list(resource_ids))
+        return [
+            _result(rid, metric_names[0], cpu=float(i + 1) * 10)
+            for i, rid in enumerate(resource_ids)
+        ]
+
+
+class _Discovery:
+    _credential = object()
+
+    def _get_monitor_client(self, subscription_id: str) -> Any:
+        raise AssertionError("the batch path must not fall back to single fetches")
+
+
+@pytest.mark.asyncio
+async def test_batch_results_are_matched_to_their_resources() -> None:
+    _MetricsClient.calls = []
+    service = MetricsBatchService(_Discovery(), MetricsBatchConfig())  # type: ignore[arg-type]
+    service._batch_client_class = _MetricsClient
+    vms = [_vm("vm-a"), _vm("vm-b"), _vm("vm-c")]
+
+    found = await service.get_metrics("sub", vms, ["Percentage CPU"])
+
+    assert _MetricsClient.calls == [[vm["id"] for vm in vms]]
+    for i, vm in enumerate(vms):
+        series = found[vm["id"]]["Percentage CPU"]
+        assert len(series) == 3
+        assert series.average.tolist() == [float(i + 1) * 10] * 3
+
+    # The results were cached as successes, so nothing is fetched again.
+    await service.get_metrics("sub", vms, ["Percentage CPU"])
+    assert len(_MetricsClient.calls) == 1